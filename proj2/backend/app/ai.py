@@ -0,0 +1,61 @@
+"""Upstream calls for AI-written copy; None whenever the model is unavailable."""
+
+import os
+from typing import Optional
+
+
+def request_run_description(
+    restaurant: str, drop_point: str, eta: str, timeout: float = 10
+) -> Optional[str]:
+    api_key = os.getenv("AI_RUN_DESC_KEY")
+    api_url = os.getenv(
+        "AI_RUN_DESC_URL", "https://api.openai.com/v1/chat/completions"
+    )
+    model = os.getenv("AI_RUN_DESC_MODEL", "gpt-4o-mini")
+    if not api_key:
+        return None
+    import httpx  # deferred: only the AI paths need an HTTP client
+
+    try:
+        response = httpx.post(
+            api_url,
+            headers={
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json",
+            },
+            json={
+                "model": model,
+                "messages": [
+                    {
+                        "role": "system",
+                        "content": (
+                            "You create short, friendly, single-sentence blurbs "
+                            "advertising a campus food run."
+                        ),
+                    },
+                    {
+                        "role": "user",
+                        "content": (
+                            "Write a concise (<=25 words) invitation for this run:\n"
+                            f"Restaurant: {restaurant}\n"
+                            f"Drop point: {drop_point}\n"
+                            f"ETA: {eta}"
+                        ),
+                    },
+                ],
+                "temperature": 0.4,
+                "max_tokens": 80,
+            },
+            timeout=timeout,
+        )
+        response.raise_for_status()
+        data = response.json()
+        suggestion = (
+            data.get("choices", [{}])[0]
+            .get("message", {})
+            .get("content", "")
+            .strip()
+        )
+    except Exception:
+        return None
+    return suggestion or None
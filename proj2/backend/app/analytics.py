@@ -1,74 +1,115 @@
 """
 Shared analytics helpers for forecasting peak hours and issuing runner rewards.
+
+The aggregate queries are SQLAlchemy constructs over the integer
+``created_epoch``/``created_hour`` columns, so they run unchanged on SQLite
+and PostgreSQL and never parse timestamps row by row.
 """
 
 from __future__ import annotations
 
-from datetime import datetime, timedelta
-from typing import Any, Dict, List, Sequence
+import hashlib
+import json
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set
 
-from sqlalchemy import desc, text
+from sqlalchemy import and_, case, desc, distinct, func, or_, union_all, update
 from sqlmodel import Session, select
 
-from .models import FoodRun, RunnerReward, User
+from .models import (
+    FoodRun,
+    Order,
+    RunnerReward,
+    User,
+    foodrun_archive,
+    order_archive,
+    runnerreward_archive,
+)
 
 # Require a small amount of historical activity before declaring peak windows
 MIN_ACTIVE_HOURS_FOR_PEAK = 3
+# Sections of the full forecast payload, selectable via ``include=``.
+PEAK_PAYLOAD_SECTIONS = (
+    "hourly_timeseries",
+    "hourly_profile",
+    "seasonal_profile",
+    "peak_forecast",
+)
+# The slim peak-hours snapshot only changes when the forecast job runs.
+PEAK_HOURS_MAX_AGE_SECONDS = 300
+SECONDS_PER_HOUR = 3600
+SECONDS_PER_DAY = 86400
+
+
+def peak_window_label(created_epoch: int) -> str:
+    """'YYYY-MM-DD HH:00' (UTC) for reward reasons."""
+    return datetime.fromtimestamp(created_epoch, timezone.utc).strftime(
+        "%Y-%m-%d %H:00"
+    )
+
+
+def _all_runs():
+    """Live and archived runs (see archive.py) as one subquery."""
+    return union_all(
+        *(
+            select(t.c.created_epoch, t.c.created_hour, t.c.capacity, t.c.status)
+            for t in (FoodRun.__table__, foodrun_archive)
+        )
+    ).subquery("runs")
 
 
-def _safe_datetime(value: Any) -> datetime | None:
-    if value is None:
-        return None
-    if isinstance(value, datetime):
-        return value
-    if isinstance(value, str):
-        for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S.%f"):
-            try:
-                return datetime.strptime(value, fmt)
-            except ValueError:
-                continue
-    return None
+def _all_orders():
+    return union_all(
+        *(
+            select(t.c.created_epoch, t.c.created_hour)
+            for t in (Order.__table__, order_archive)
+        )
+    ).subquery("orders")
 
 
-def _query_all_dicts(session: Session, sql: str) -> List[Dict[str, Any]]:
-    rows = session.exec(text(sql)).all()
+def _query_all_dicts(session: Session, stmt) -> List[Dict[str, Any]]:
+    rows = session.exec(stmt).all()
     return [dict(row._mapping) for row in rows]
 
 
-def _get_distinct_day_count(session: Session, table_name: str) -> int:
-    sql = f"SELECT COUNT(DISTINCT date(created_at)) AS day_count FROM {table_name}"
-    row = session.exec(text(sql)).first()
-    if not row:
-        return 0
-    value = row[0] if isinstance(row, Sequence) else row.day_count
-    return int(value or 0)
+def _get_distinct_day_count(session: Session, source) -> int:
+    stmt = select(func.count(distinct(source.c.created_epoch // SECONDS_PER_DAY)))
+    return int(session.exec(stmt).one() or 0)
+
+
+def _hour_block_label(hour_index: int) -> str:
+    started = datetime.fromtimestamp(hour_index * SECONDS_PER_HOUR, timezone.utc)
+    return started.strftime("%Y-%m-%d %H:00:00")
 
 
 def fetch_hourly_timeseries(session: Session) -> List[Dict[str, Any]]:
+    runs_src = _all_runs()
+    block = (runs_src.c.created_epoch // SECONDS_PER_HOUR).label("hour_index")
     runs = _query_all_dicts(
         session,
-        """
-        SELECT
-            strftime('%Y-%m-%d %H:00:00', created_at) AS hour_block,
-            COUNT(*) AS run_count,
-            SUM(capacity) AS total_capacity,
-            SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END) AS completed_runs
-        FROM foodrun
-        GROUP BY hour_block
-        ORDER BY hour_block
-        """,
+        select(
+            block,
+            func.count().label("run_count"),
+            func.sum(runs_src.c.capacity).label("total_capacity"),
+            func.sum(case((runs_src.c.status == "completed", 1), else_=0)).label(
+                "completed_runs"
+            ),
+        )
+        .where(runs_src.c.created_epoch.is_not(None))
+        .group_by(block),
     )
+    orders_src = _all_orders()
+    block = (orders_src.c.created_epoch // SECONDS_PER_HOUR).label("hour_index")
     orders = _query_all_dicts(
         session,
-        """
-        SELECT
-            strftime('%Y-%m-%d %H:00:00', created_at) AS hour_block,
-            COUNT(*) AS order_count
-        FROM "order"
-        GROUP BY hour_block
-        ORDER BY hour_block
-        """,
+        select(block, func.count().label("order_count"))
+        .where(orders_src.c.created_epoch.is_not(None))
+        .group_by(block),
     )
+    # Labels are formatted once per hour bucket, never per row.
+    for entry in runs + orders:
+        entry["hour_block"] = _hour_block_label(int(entry["hour_index"]))
     run_map = {entry["hour_block"]: entry for entry in runs}
     order_map = {entry["hour_block"]: entry["order_count"] for entry in orders}
     hours = sorted(set(run_map.keys()) | set(order_map.keys()))
@@ -95,31 +136,28 @@ def fetch_hourly_timeseries(session: Session) -> List[Dict[str, Any]]:
 
 
 def build_hourly_profile(session: Session) -> List[Dict[str, Any]]:
+    orders_src = _all_orders()
+    hour = orders_src.c.created_hour.label("hour_of_day")
     order_counts = _query_all_dicts(
         session,
-        """
-        SELECT CAST(strftime('%H', created_at) AS INTEGER) AS hour_of_day,
-               COUNT(*) AS order_count
-        FROM "order"
-        GROUP BY hour_of_day
-        """,
+        select(hour, func.count().label("order_count")).group_by(hour),
     )
+    runs_src = _all_runs()
+    hour = runs_src.c.created_hour.label("hour_of_day")
     run_counts = _query_all_dicts(
         session,
-        """
-        SELECT CAST(strftime('%H', created_at) AS INTEGER) AS hour_of_day,
-               COUNT(*) AS run_count,
-               SUM(capacity) AS capacity_sum
-        FROM foodrun
-        GROUP BY hour_of_day
-        """,
+        select(
+            hour,
+            func.count().label("run_count"),
+            func.sum(runs_src.c.capacity).label("capacity_sum"),
+        ).group_by(hour),
     )
     order_map = {entry["hour_of_day"]: entry["order_count"] for entry in order_counts}
     run_map = {entry["hour_of_day"]: entry["run_count"] for entry in run_counts}
     capacity_map = {entry["hour_of_day"]: entry["capacity_sum"] for entry in run_counts}
 
-    order_days = _get_distinct_day_count(session, '"order"')
-    run_days = _get_distinct_day_count(session, "foodrun")
+    order_days = _get_distinct_day_count(session, _all_orders())
+    run_days = _get_distinct_day_count(session, _all_runs())
 
     profile: List[Dict[str, Any]] = []
     for hour in range(24):
@@ -130,20 +168,27 @@ def build_hourly_profile(session: Session) -> List[Dict[str, Any]]:
         avg_runs = total_runs / run_days if run_days else 0.0
         avg_capacity = total_capacity / run_days if run_days else 0.0
         utilization = (total_orders / total_capacity) if total_capacity else 0.0
-        demand_score = (avg_orders * 0.6) + (avg_runs * 0.3) + (utilization * 0.1)
         profile.append(
-            {
-                "hour": hour,
-                "avg_orders_per_day": round(avg_orders, 3),
-                "avg_runs_per_day": round(avg_runs, 3),
-                "avg_capacity_per_day": round(avg_capacity, 3),
-                "utilization_ratio": round(utilization, 3),
-                "demand_score": round(demand_score, 3),
-            }
+            profile_entry(hour, avg_orders, avg_runs, avg_capacity, utilization)
         )
     return profile
 
 
+def profile_entry(
+    hour: int, orders: float, runs: float, capacity: float, utilization: float
+) -> Dict[str, Any]:
+    """One hour of a profile; the inputs are per-day averages."""
+    demand_score = (orders * 0.6) + (runs * 0.3) + (utilization * 0.1)
+    return {
+        "hour": hour,
+        "avg_orders_per_day": round(orders, 3),
+        "avg_runs_per_day": round(runs, 3),
+        "avg_capacity_per_day": round(capacity, 3),
+        "utilization_ratio": round(utilization, 3),
+        "demand_score": round(demand_score, 3),
+    }
+
+
 def forecast_peak_hours(profile: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     if not profile:
         return []
@@ -172,61 +217,189 @@ def forecast_peak_hours(profile: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     return sorted(peaks, key=lambda entry: entry["demand_score"], reverse=True)
 
 
-def generate_peak_payload(session: Session) -> Dict[str, Any]:
-    hourly_series = fetch_hourly_timeseries(session)
-    profile = build_hourly_profile(session)
-    peaks = forecast_peak_hours(profile)
-    return {
-        "hourly_timeseries": hourly_series,
-        "hourly_profile": profile,
-        "peak_forecast": peaks,
-    }
+def generate_peak_payload(
+    session: Session,
+    sections: Optional[Iterable[str]] = None,
+    weekday: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Build the forecast payload; ``sections`` limits which parts are queried.
+
+    Peaks come from the seasonal profile of ``weekday`` (default: today, UTC);
+    see forecasting.py.
+    """
+    from .forecasting import seasonal_profile
+
+    wanted = set(PEAK_PAYLOAD_SECTIONS if sections is None else sections)
+    payload: Dict[str, Any] = {}
+    if "hourly_timeseries" in wanted:
+        payload["hourly_timeseries"] = fetch_hourly_timeseries(session)
+    if "hourly_profile" in wanted:
+        payload["hourly_profile"] = build_hourly_profile(session)
+    if wanted & {"seasonal_profile", "peak_forecast"}:
+        profile = seasonal_profile(session, weekday=weekday)
+        if "seasonal_profile" in wanted:
+            payload["seasonal_profile"] = profile
+        if "peak_forecast" in wanted:
+            payload["peak_forecast"] = forecast_peak_hours(profile)
+    return payload
+
+
+class PeakHoursBody(NamedTuple):
+    windows: List[Dict[str, Any]]
+    content: bytes
+    etag: str
+
+
+class PeakHoursSnapshot:
+    """Current peak windows, pre-serialized for ``GET /analytics/peak-hours``.
+
+    Refreshed whenever a forecast is computed; the body and its content-hash
+    ETag are built once per refresh, so serving it is constant time and the
+    tag agrees across workers that computed the same windows.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._body: Optional[PeakHoursBody] = None
+
+    def update(self, peaks: List[Dict[str, Any]]) -> PeakHoursBody:
+        windows = [
+            {
+                "hour": int(entry["hour"]),
+                "demand_score": entry["demand_score"],
+                "utilization_ratio": entry["utilization_ratio"],
+            }
+            for entry in peaks
+        ]
+        digest = hashlib.sha1(
+            json.dumps(windows, sort_keys=True).encode()
+        ).hexdigest()[:16]
+        content = json.dumps(
+            {
+                "generated_at": datetime.utcnow().isoformat(timespec="seconds"),
+                "peak_forecast": windows,
+            },
+            separators=(",", ":"),
+        ).encode()
+        body = PeakHoursBody(windows, content, f'W/"peak-{digest}"')
+        with self._lock:
+            self._body = body
+        return body
+
+    def get(self) -> Optional[PeakHoursBody]:
+        with self._lock:
+            return self._body
+
+    def clear(self) -> None:
+        with self._lock:
+            self._body = None
+
+
+peak_hours_snapshot = PeakHoursSnapshot()
+
+
+def peak_hours_on(session: Session, weekday: Optional[int]) -> Set[int]:
+    """Peak hours of ``weekday``'s profile.
+
+    A completed run earns the peak bonus when it was posted in one of the peak
+    hours of the weekday it was posted on; both the ``peak_bonus`` job and
+    ``issue_peak_rewards`` decide by this.
+    """
+    peaks = generate_peak_payload(
+        session, sections=("peak_forecast",), weekday=weekday
+    )["peak_forecast"]
+    return {int(entry["hour"]) for entry in peaks if "hour" in entry}
 
 
 def issue_peak_rewards(
     session: Session,
-    peak_hours: List[Dict[str, Any]],
     points_per_run: int = 5,
     lookback_hours: int = 24,
 ) -> List[RunnerReward]:
-    if not peak_hours:
-        return []
-    target_hours = {int(entry["hour"]) for entry in peak_hours if "hour" in entry}
-    if not target_hours:
+    cutoff = int(datetime.now(timezone.utc).timestamp()) - (
+        lookback_hours * SECONDS_PER_HOUR
+    )
+    recent = (
+        FoodRun.status == "completed",
+        FoodRun.created_epoch >= cutoff,
+        FoodRun.id.not_in(select(RunnerReward.run_id)),
+    )
+    # The lookback spans a day or two; each run is checked against the peaks
+    # of its own weekday.
+    weekdays = session.exec(select(distinct(FoodRun.created_weekday)).where(*recent))
+    in_peak = []
+    for weekday in weekdays.all():
+        hours = peak_hours_on(session, weekday) if weekday is not None else set()
+        if hours:
+            in_peak.append(
+                and_(
+                    FoodRun.created_weekday == weekday,
+                    FoodRun.created_hour.in_(sorted(hours)),
+                )
+            )
+    if not in_peak:
         return []
-    cutoff = datetime.utcnow() - timedelta(hours=lookback_hours)
-    stmt = select(FoodRun).where(FoodRun.status == "completed")
-    runs = session.exec(stmt).all()
-    issued: List[RunnerReward] = []
-    for run in runs:
-        created_at = _safe_datetime(run.created_at)
-        if not created_at or created_at < cutoff:
-            continue
-        if created_at.hour not in target_hours:
-            continue
-        existing = session.exec(
-            select(RunnerReward).where(RunnerReward.run_id == run.id)
-        ).first()
-        if existing:
-            continue
-        reward = RunnerReward(
-            runner_id=run.runner_id,
-            run_id=run.id,
-            points=points_per_run,
-            reason=f"Peak hour bonus ({created_at.strftime('%Y-%m-%d %H:00')})",
+    # Index seeks on created_hour/created_epoch; already-rewarded runs are
+    # excluded in SQL rather than checked one by one.
+    runs = session.exec(select(FoodRun).where(*recent, or_(*in_peak))).all()
+    granted = [
+        run.id
+        for run in runs
+        if grant_reward(
+            session,
+            run.runner_id,
+            run.id,
+            points_per_run,
+            f"Peak hour bonus ({peak_window_label(run.created_epoch)})",
         )
-        session.add(reward)
-        runner = session.get(User, run.runner_id)
-        if runner:
-            runner.points += points_per_run
-        issued.append(reward)
-    if issued:
-        session.commit()
-        for reward in issued:
-            session.refresh(reward)
-    return issued
+    ]
+    if not granted:
+        return []
+    session.commit()
+    return list(
+        session.exec(select(RunnerReward).where(RunnerReward.run_id.in_(granted)))
+    )
+
+
+def grant_reward(
+    session: Session, runner_id: int, run_id: int, points: int, reason: str
+) -> bool:
+    """Insert ``run_id``'s reward and credit the runner, unless it already has one.
+
+    ``ON CONFLICT DO NOTHING`` on the unique ``run_id`` makes a repeated or
+    concurrent grant a no-op instead of a second payout. The caller commits.
+    """
+    if session.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    inserted = session.execute(
+        insert(RunnerReward)
+        .values(runner_id=runner_id, run_id=run_id, points=points, reason=reason)
+        .on_conflict_do_nothing(index_elements=["run_id"])
+    )
+    if inserted.rowcount != 1:
+        return False
+    session.execute(
+        update(User)
+        .where(User.id == runner_id)
+        .values(points=User.points + points)
+        .execution_options(synchronize_session=False)
+    )
+    return True
 
 
 def list_recent_rewards(session: Session, limit: int = 20) -> List[RunnerReward]:
     stmt = select(RunnerReward).order_by(desc(RunnerReward.awarded_at)).limit(limit)
-    return session.exec(stmt).all()
+    rewards = list(session.exec(stmt).all())
+    if len(rewards) >= limit:
+        # A full page of live rewards is newer than anything archived.
+        return rewards
+    archived = session.exec(
+        select(*runnerreward_archive.c[: len(RunnerReward.__table__.columns)])
+        .order_by(desc(runnerreward_archive.c.awarded_at))
+        .limit(limit - len(rewards))
+    ).all()
+    # Transient copies: shaped like live rewards, never added to the session.
+    return rewards + [RunnerReward(**row._mapping) for row in archived]
@@ -0,0 +1,97 @@
+"""
+Move finished runs out of the live tables.
+
+Hot endpoints (``/runs/available``, ``create_order``) only ever need active
+runs, yet every run ever created stayed in ``foodrun`` and ``order``. The
+archival job moves terminal runs older than ARCHIVE_AFTER_DAYS, together with
+their orders and rewards, into ``*_archive`` tables with the same columns.
+Each batch is an INSERT ... SELECT per table plus the matching DELETEs in one
+transaction, so a run is always in exactly one place. History and analytics
+read live and archived rows together (see queries.py / analytics.py).
+
+SQLite without AUTOINCREMENT hands out ``max(id) + 1`` as the next id, so
+deleting the highest row would let a new run reuse an archived id. The run
+holding the highest run, order or reward id therefore always stays live.
+"""
+
+from __future__ import annotations
+
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Set
+
+from sqlalchemy import delete, func, insert
+from sqlmodel import Session, select
+
+from .models import (
+    FoodRun,
+    Order,
+    RunnerReward,
+    foodrun_archive,
+    order_archive,
+    runnerreward_archive,
+)
+from .queries import active_status_clause
+
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "30"))
+ARCHIVE_BATCH = int(os.getenv("ARCHIVE_BATCH", "500"))
+ARCHIVE_INTERVAL_MINUTES = float(os.getenv("ARCHIVE_INTERVAL_MINUTES", "60"))
+
+# (live table, archive table, column naming the run); children first so the
+# DELETEs never orphan a row that still points at its run.
+_MOVES = (
+    (RunnerReward.__table__, runnerreward_archive, "run_id"),
+    (Order.__table__, order_archive, "run_id"),
+    (FoodRun.__table__, foodrun_archive, "id"),
+)
+
+
+def _newest_runs(session: Session) -> Set[int]:
+    """Runs owning the highest run, order or reward id (never archived)."""
+    newest = {session.exec(select(func.max(FoodRun.id))).one()}
+    for model in (Order, RunnerReward):
+        top = select(func.max(model.id)).scalar_subquery()
+        newest.add(session.exec(select(model.run_id).where(model.id == top)).first())
+    return {run_id for run_id in newest if run_id is not None}
+
+
+def _move_runs(session: Session, run_ids: list) -> None:
+    for live, archive, key in _MOVES:
+        names = [col.name for col in live.columns]
+        session.execute(
+            insert(archive).from_select(
+                names, select(*live.columns).where(live.c[key].in_(run_ids))
+            )
+        )
+    for live, _archive, key in _MOVES:
+        session.execute(delete(live).where(live.c[key].in_(run_ids)))
+
+
+def archive_finished_runs(
+    session: Session,
+    now: Optional[datetime] = None,
+    older_than_days: Optional[int] = None,
+    batch_size: Optional[int] = None,
+) -> int:
+    """Archive terminal runs created before the cutoff; returns how many."""
+    now = now or datetime.now(timezone.utc)
+    days = ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+    cutoff = int((now - timedelta(days=days)).timestamp())
+    batch_size = batch_size or ARCHIVE_BATCH
+    keep = _newest_runs(session)
+    moved = 0
+    while True:
+        stmt = select(FoodRun.id).where(
+            ~active_status_clause(), FoodRun.created_epoch < cutoff
+        )
+        if keep:
+            stmt = stmt.where(FoodRun.id.not_in(keep))
+        ids = list(session.exec(stmt.order_by(FoodRun.id).limit(batch_size)).all())
+        if not ids:
+            break
+        _move_runs(session, ids)
+        session.commit()
+        moved += len(ids)
+        if len(ids) < batch_size:
+            break
+    return moved
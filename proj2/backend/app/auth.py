@@ -1,27 +1,32 @@
+import hashlib
 import os
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, Union
+from typing import Any, Dict, Optional, Union
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+from sqlmodel import Session
+
+from .db import get_read_session, get_write_session
+from .hashing import hash_password, verify_password  # noqa: F401
+from .models import User
+
+# jose is imported on first use to keep it off the cold-start path; password
+# hashing lives in .hashing.
 
 ALGORITHM = "HS256"
 SECRET_KEY = os.getenv("SECRET_KEY", "change_me")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "120"))
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "4096"))
 
-# Use PBKDF2-SHA256 (no external C extensions required, avoids bcrypt backend issues on Windows)
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 bearer = HTTPBearer(auto_error=False)
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
-
-
-def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_context.verify(plain, hashed)
+    return hash_password(password)
 
 
 def create_access_token(sub: Union[str, int], email: str) -> str:
@@ -32,9 +37,84 @@ def create_access_token(sub: Union[str, int], email: str) -> str:
         "iat": int(now.timestamp()),
         "exp": int((now + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)).timestamp()),
     }
+    from jose import jwt
+
     return jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
 
 
+class TokenCache:
+    """Bounded LRU of verified JWT claims keyed by token digest, honouring exp."""
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[bytes, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        key = self.key(token)
+        with self._lock:
+            claims = self._entries.get(key)
+            if claims is not None and claims["exp"] > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return dict(claims)
+            if claims is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, token: str, claims: Dict[str, Any]) -> None:
+        if self.maxsize <= 0 or not isinstance(claims.get("exp"), (int, float)):
+            return
+        key = self.key(token)
+        with self._lock:
+            self._entries[key] = dict(claims)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+token_cache = TokenCache(AUTH_TOKEN_CACHE_SIZE)
+
+
+def decode_access_token(token: str) -> Dict[str, Any]:
+    cached = token_cache.get(token)
+    if cached is not None:
+        return cached
+    from jose import JWTError, jwt
+
+    try:
+        claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token"
+        )
+    token_cache.put(token, claims)
+    return claims
+
+
 def get_current_user_claims(
     credentials: HTTPAuthorizationCredentials = Depends(bearer),
 ) -> Dict[str, Any]:
@@ -42,10 +122,84 @@ def get_current_user_claims(
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing token"
         )
-    token = credentials.credentials
-    try:
-        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-    except JWTError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token"
-        )
+    return decode_access_token(credentials.credentials)
+
+
+def get_stream_claims(
+    credentials: HTTPAuthorizationCredentials = Depends(bearer),
+    token: Optional[str] = Query(default=None),
+) -> Dict[str, Any]:
+    """Like get_current_user_claims, but also accepts ?token= because browser
+    EventSource/WebSocket clients cannot send an Authorization header."""
+    if credentials and credentials.scheme.lower() == "bearer":
+        return decode_access_token(credentials.credentials)
+    if token:
+        return decode_access_token(token)
+    raise HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing token"
+    )
+
+
+class _UserLoaderStats:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.reuses = 0
+
+    def record(self, reused: bool) -> None:
+        with self._lock:
+            if reused:
+                self.reuses += 1
+            else:
+                self.loads += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.loads + self.reuses
+            return {
+                "loads": self.loads,
+                "reuses": self.reuses,
+                "hit_rate": round(self.reuses / total, 3) if total else 0.0,
+            }
+
+
+user_loader_stats = _UserLoaderStats()
+
+
+def _load_current_user(
+    request: Request, claims: Dict[str, Any], session: Session
+) -> Optional[User]:
+    if hasattr(request.state, "current_user"):
+        user_loader_stats.record(reused=True)
+        return request.state.current_user
+    user = session.get(User, int(claims["sub"]))
+    request.state.current_user = user
+    user_loader_stats.record(reused=False)
+    return user
+
+
+def get_current_user(
+    request: Request,
+    claims: Dict[str, Any] = Depends(get_current_user_claims),
+    session: Session = Depends(get_read_session),
+) -> Optional[User]:
+    """Load the caller's User row at most once per request.
+
+    FastAPI already dedupes this dependency within one dependency graph; the
+    request.state memo also covers callers outside it (route-level dependencies,
+    helpers handed the request). Returns None when the account no longer exists.
+    """
+    return _load_current_user(request, claims, session)
+
+
+def get_current_user_for_write(
+    request: Request,
+    claims: Dict[str, Any] = Depends(get_current_user_claims),
+    session: Session = Depends(get_write_session),
+) -> Optional[User]:
+    """``get_current_user`` on the request's write session.
+
+    Mutating routes already hold a write session; loading the caller through
+    it keeps them to one session and one pooled connection.
+    """
+    return _load_current_user(request, claims, session)
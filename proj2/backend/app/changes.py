@@ -0,0 +1,160 @@
+"""
+Per-table change counters and the conditional-GET dependency built on them.
+
+Every ORM flush or bulk statement that writes a tracked table bumps that
+table's row in ``changecounter`` inside the same transaction, so a counter
+moves exactly when committed data does and every worker sees the same value.
+List and forecast endpoints derive a weak ETag from the counters they read
+(one small SELECT) and answer 304 before running their own queries.
+
+Writes that bypass the ORM (raw ``text()`` SQL, migrations) are not tracked;
+the schema version is part of every tag so a migration still busts caches.
+
+No ``from __future__ import annotations`` here: the dependency signatures use
+names imported inside ``conditional_get`` and FastAPI must resolve them.
+"""
+
+import time
+import zlib
+from itertools import chain
+from typing import Callable, Dict, Iterable, Optional
+
+from sqlalchemy import event, insert, update
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import Session, select
+
+from .models import ChangeCounter, FoodRun, Order, RunnerReward
+
+TRACKED_TABLES = frozenset(
+    model.__tablename__ for model in (FoodRun, Order, RunnerReward)
+)
+
+
+def bump_versions(connection, tables: Iterable[str]) -> None:
+    counters = ChangeCounter.__table__
+    # Sorted so concurrent writers lock counter rows in the same order.
+    for name in sorted(tables):
+        result = connection.execute(
+            update(counters)
+            .where(counters.c.table_name == name)
+            .values(version=counters.c.version + 1)
+        )
+        if result.rowcount == 0:
+            connection.execute(insert(counters).values(table_name=name, version=1))
+
+
+@event.listens_for(OrmSession, "after_flush")
+def _bump_after_flush(session, flush_context) -> None:
+    touched = {
+        getattr(obj, "__tablename__", None)
+        for obj in chain(session.new, session.dirty, session.deleted)
+    } & TRACKED_TABLES
+    if touched:
+        bump_versions(session.connection(), touched)
+
+
+@event.listens_for(OrmSession, "do_orm_execute")
+def _bump_after_bulk_write(orm_execute_state) -> None:
+    # Bulk update()/delete()/insert() statements skip the flush entirely.
+    if not (
+        orm_execute_state.is_update
+        or orm_execute_state.is_delete
+        or orm_execute_state.is_insert
+    ):
+        return
+    table = getattr(orm_execute_state.statement, "table", None)
+    name = getattr(table, "name", None)
+    if name in TRACKED_TABLES:
+        bump_versions(orm_execute_state.session.connection(), {name})
+
+
+def table_versions(session: Session, tables: Iterable[str]) -> Dict[str, int]:
+    rows = session.exec(
+        select(ChangeCounter.table_name, ChangeCounter.version).where(
+            ChangeCounter.table_name.in_(list(tables))
+        )
+    ).all()
+    return {name: int(version) for name, version in rows}
+
+
+def build_etag(
+    session: Session,
+    tables: Iterable[str],
+    scope: Optional[str] = None,
+    variant: str = "",
+) -> str:
+    """``variant`` (e.g. the query string) distinguishes representations."""
+    from .db import LATEST_SCHEMA_VERSION
+
+    names = sorted(tables)
+    versions = table_versions(session, names)
+    parts = [f"s{LATEST_SCHEMA_VERSION}", scope or "all"]
+    parts += [str(versions.get(name, 0)) for name in names]
+    if variant:
+        parts.append(f"{zlib.crc32(variant.encode()):08x}")
+    return f'W/"{"-".join(parts)}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison (RFC 9110 §8.8.3.2): ignore W/ prefixes on both sides.
+    wanted = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == wanted
+        for candidate in if_none_match.split(",")
+    )
+
+
+def conditional_get(
+    *tables: str, per_user: bool = False, rollover_seconds: Optional[int] = None
+) -> Callable:
+    """Route dependency: set ETag, or raise 304 when If-None-Match still matches.
+
+    The tag is computed before the endpoint queries, so a write racing the
+    request can only make the tag older than the body, never newer.
+    ``per_user`` scopes the tag to the caller for endpoints filtered by user.
+    ``rollover_seconds`` also changes the tag on that clock, for bodies that
+    depend on the current time (the seasonal forecast moves every hour).
+    """
+    from fastapi import Depends, HTTPException, Request, Response
+
+    from .auth import get_current_user_claims
+    from .db import get_read_session
+
+    unknown = set(tables) - TRACKED_TABLES
+    if unknown:
+        raise ValueError(f"untracked tables: {sorted(unknown)}")
+
+    def check(request: Request, response: Response, session: Session, scope) -> None:
+        variant = request.url.query
+        if rollover_seconds:
+            variant += f"@{int(time.time()) // rollover_seconds}"
+        etag = build_etag(session, tables, scope, variant)
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            raise HTTPException(status_code=304, headers=headers)
+        response.headers.update(headers)
+
+    if per_user:
+
+        def dependency(
+            request: Request,
+            response: Response,
+            claims=Depends(get_current_user_claims),
+            session: Session = Depends(get_read_session),
+        ) -> None:
+            check(request, response, session, f"u{claims['sub']}")
+
+    else:
+
+        def dependency(
+            request: Request,
+            response: Response,
+            session: Session = Depends(get_read_session),
+        ) -> None:
+            check(request, response, session, None)
+
+    return dependency
@@ -1,127 +1,323 @@
 import os
 from contextlib import contextmanager
 from sqlmodel import SQLModel, create_engine, Session
-from sqlalchemy import text
+from sqlalchemy import inspect, select, text, update
+from sqlalchemy.exc import OperationalError, ProgrammingError
+
+from . import changes  # noqa: F401  (registers change-counter hooks)
+from .pool import engine_kwargs
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./dev.db")
-connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
-engine = create_engine(DATABASE_URL, echo=False, connect_args=connect_args)
+# Optional read-side URL (replica in prod, read-only SQLite URI locally, e.g.
+# sqlite:///file:./dev.db?mode=ro&uri=true). Falls back to the primary URL so the
+# read engine still gets its own pool and never queues behind writers.
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL") or DATABASE_URL
+
+
+def _connect_args(url: str) -> dict:
+    return {"check_same_thread": False} if url.startswith("sqlite") else {}
+
+
+connect_args = _connect_args(DATABASE_URL)
+engine = create_engine(
+    DATABASE_URL, echo=False, connect_args=connect_args, **engine_kwargs(DATABASE_URL)
+)
+read_engine = create_engine(
+    READ_DATABASE_URL,
+    echo=False,
+    connect_args=_connect_args(READ_DATABASE_URL),
+    **engine_kwargs(READ_DATABASE_URL, prefix="DB_READ_"),
+)
 
 
 def create_db_and_tables() -> None:
     SQLModel.metadata.create_all(engine)
 
 
-# Lightweight, startup-time safety check for SQLite dev DBs.
-# If the 'points' column was added to the User model after the DB was created,
-# make sure the column exists to avoid runtime errors without requiring a manual reset.
-def ensure_user_points_column() -> None:
-    try:
-        # Only applicable for SQLite; other engines should use proper migrations.
-        if not DATABASE_URL.startswith("sqlite"):
-            return
-        # Use a transaction so ALTER + UPDATE are committed together
-        with engine.begin() as conn:
-            cols = [row[1] for row in conn.execute(text("PRAGMA table_info('user')"))]
-            if "points" not in cols:
-                conn.execute(
-                    text("ALTER TABLE user ADD COLUMN points INTEGER DEFAULT 0")
-                )
-                conn.execute(text("UPDATE user SET points = 0 WHERE points IS NULL"))
-    except Exception:
-        # Best-effort safeguard; if anything goes wrong here, don't block startup.
-        # Users can still delete dev.db manually. Intentionally swallow to avoid crash.
-        pass
+# ---------------------------------------------------------------------------
+# Versioned migrations
+#
+# Each step runs once, in order, and is recorded in a one-row schema_version
+# table. Steps must be idempotent: a DB created by create_all (or one migrated
+# by the old per-boot ensure_* helpers) already has the columns, and two
+# replicas may race on the first boot after a deploy.
+# ---------------------------------------------------------------------------
 
 
-def ensure_foodrun_capacity_column() -> None:
-    try:
-        if not DATABASE_URL.startswith("sqlite"):
-            return
-        with engine.begin() as conn:
-            cols = [
-                row[1] for row in conn.execute(text("PRAGMA table_info('foodrun')"))
-            ]
-            if "capacity" not in cols:
-                conn.execute(
-                    text("ALTER TABLE foodrun ADD COLUMN capacity INTEGER DEFAULT 5")
-                )
-                conn.execute(
-                    text("UPDATE foodrun SET capacity = 5 WHERE capacity IS NULL")
-                )
-    except Exception:
-        # Same best-effort approach
-        pass
+def _columns(conn, table: str) -> set:
+    return {col["name"] for col in inspect(conn).get_columns(table)}
 
 
-def ensure_foodrun_description_column() -> None:
-    try:
-        if not DATABASE_URL.startswith("sqlite"):
-            return
-        with engine.begin() as conn:
-            cols = [
-                row[1] for row in conn.execute(text("PRAGMA table_info('foodrun')"))
-            ]
-            if "description" not in cols:
-                conn.execute(
-                    text("ALTER TABLE foodrun ADD COLUMN description TEXT DEFAULT ''")
-                )
+def _add_column(conn, table: str, column: str, ddl: str) -> bool:
+    if column in _columns(conn, table):
+        return False
+    quoted = conn.dialect.identifier_preparer.quote(table)
+    conn.execute(text(f"ALTER TABLE {quoted} ADD COLUMN {column} {ddl}"))
+    return True
+
+
+def _migrate_user_points(conn) -> None:
+    if _add_column(conn, "user", "points", "INTEGER DEFAULT 0"):
+        conn.execute(text('UPDATE "user" SET points = 0 WHERE points IS NULL'))
+
+
+def _migrate_foodrun_capacity(conn) -> None:
+    if _add_column(conn, "foodrun", "capacity", "INTEGER DEFAULT 5"):
+        conn.execute(text("UPDATE foodrun SET capacity = 5 WHERE capacity IS NULL"))
+
+
+def _migrate_foodrun_description(conn) -> None:
+    _add_column(conn, "foodrun", "description", "TEXT DEFAULT ''")
+    conn.execute(
+        text("UPDATE foodrun SET description = '' WHERE description IS NULL")
+    )
+
+
+def _migrate_order_pin(conn) -> None:
+    _add_column(conn, "order", "pin", "TEXT")
+
+
+def _migrate_order_tip(conn) -> None:
+    _add_column(conn, "order", "tip", "REAL DEFAULT 0.0")
+
+
+def _migrate_foodrun_status_lowercase(conn) -> None:
+    conn.execute(
+        text(
+            "UPDATE foodrun SET status=LOWER(TRIM(status)) "
+            "WHERE status IS NOT NULL AND status <> LOWER(TRIM(status))"
+        )
+    )
+
+
+def _migrate_change_counters(conn) -> None:
+    from .changes import TRACKED_TABLES
+
+    SQLModel.metadata.tables["changecounter"].create(conn, checkfirst=True)
+    present = {
+        row[0] for row in conn.execute(text("SELECT table_name FROM changecounter"))
+    }
+    for name in sorted(TRACKED_TABLES - present):
+        conn.execute(
+            text("INSERT INTO changecounter (table_name, version) VALUES (:n, 0)"),
+            {"n": name},
+        )
+
+
+def _migrate_foodrun_expires_at(conn) -> None:
+    from .expiry import run_expires_at
+    from .models import FoodRun
+
+    _add_column(conn, "foodrun", "expires_at", "TIMESTAMP WITH TIME ZONE")
+    conn.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS ix_foodrun_status_expires_at "
+            "ON foodrun (status, expires_at)"
+        )
+    )
+    # Blank statuses already meant active; store it so the sweeper's index
+    # lookup on status = 'active' sees them.
+    conn.execute(
+        text(
+            "UPDATE foodrun SET status = 'active' "
+            "WHERE status IS NULL OR TRIM(status) = ''"
+        )
+    )
+    table = FoodRun.__table__
+    pending = conn.execute(
+        select(table.c.id, table.c.eta, table.c.created_at).where(
+            table.c.status == "active", table.c.expires_at.is_(None)
+        )
+    ).all()
+    for run_id, eta, created_at in pending:
+        conn.execute(
+            update(table)
+            .where(table.c.id == run_id)
+            .values(expires_at=run_expires_at(eta, created_at))
+        )
+
+
+def _migrate_archive_tables(conn) -> None:
+    from .models import foodrun_archive, order_archive, runnerreward_archive
+
+    for table in (foodrun_archive, order_archive, runnerreward_archive):
+        table.create(conn, checkfirst=True)
+
+
+def _migrate_created_parts(conn) -> None:
+    from .sqltime import day_of_week, epoch_seconds, hour_of_day
+
+    for name in ("foodrun", "order", "foodrun_archive", "order_archive"):
+        _add_column(conn, name, "created_epoch", "BIGINT")
+        _add_column(conn, name, "created_hour", "INTEGER")
+        _add_column(conn, name, "created_weekday", "INTEGER")
+        table = SQLModel.metadata.tables[name]
+        conn.execute(
+            update(table)
+            .where(table.c.created_epoch.is_(None), table.c.created_at.is_not(None))
+            .values(
+                created_epoch=epoch_seconds(table.c.created_at),
+                created_hour=hour_of_day(table.c.created_at),
+                created_weekday=day_of_week(table.c.created_at),
+            )
+        )
+    for name in ("foodrun", "order"):
+        quoted = conn.dialect.identifier_preparer.quote(name)
+        for column in ("created_epoch", "created_hour", "created_weekday"):
             conn.execute(
                 text(
-                    "UPDATE foodrun SET description = '' "
-                    "WHERE description IS NULL"
+                    f"CREATE INDEX IF NOT EXISTS ix_{name}_{column} "
+                    f"ON {quoted} ({column})"
                 )
             )
-    except Exception:
-        # Same best-effort posture as other ensure helpers
-        pass
 
 
-def ensure_order_pin_column() -> None:
+def _migrate_forecast_cells(conn) -> None:
+    # Left empty: the first forecast refresh bootstraps it from history.
+    SQLModel.metadata.tables["forecastcell"].create(conn, checkfirst=True)
+
+
+def _migrate_job_queue(conn) -> None:
+    SQLModel.metadata.tables["jobqueue"].create(conn, checkfirst=True)
+
+
+def _migrate_reward_per_run(conn) -> None:
+    # Keep the first reward of any run paid twice before the index existed.
+    conn.execute(
+        text(
+            "DELETE FROM runnerreward WHERE id NOT IN "
+            "(SELECT MIN(id) FROM runnerreward GROUP BY run_id)"
+        )
+    )
+    conn.execute(
+        text(
+            "CREATE UNIQUE INDEX IF NOT EXISTS ux_runnerreward_run_id "
+            "ON runnerreward (run_id)"
+        )
+    )
+
+
+# (version, description, step) -- append only; never renumber.
+MIGRATIONS = [
+    (1, "user.points column", _migrate_user_points),
+    (2, "foodrun.capacity column", _migrate_foodrun_capacity),
+    (3, "foodrun.description column", _migrate_foodrun_description),
+    (4, "order.pin column", _migrate_order_pin),
+    (5, "order.tip column", _migrate_order_tip),
+    (6, "lowercase foodrun.status", _migrate_foodrun_status_lowercase),
+    (7, "changecounter table", _migrate_change_counters),
+    (8, "foodrun.expires_at column", _migrate_foodrun_expires_at),
+    (9, "run/order/reward archive tables", _migrate_archive_tables),
+    (10, "created_epoch/hour/weekday columns", _migrate_created_parts),
+    (11, "forecastcell table", _migrate_forecast_cells),
+    (12, "jobqueue table", _migrate_job_queue),
+    (13, "unique runnerreward.run_id", _migrate_reward_per_run),
+]
+LATEST_SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn) -> int:
     try:
-        if not DATABASE_URL.startswith("sqlite"):
-            return
-        with engine.begin() as conn:
-            cols = [row[1] for row in conn.execute(text("PRAGMA table_info('order')"))]
-            if "pin" not in cols:
-                conn.execute(text("ALTER TABLE 'order' ADD COLUMN pin TEXT"))
-    except Exception:
-        # Best-effort; ignore failures in dev
-        pass
+        value = conn.execute(text("SELECT MAX(version) FROM schema_version")).scalar()
+    except (OperationalError, ProgrammingError):
+        # No version table yet: a fresh DB or one predating the runner.
+        return 0
+    return int(value or 0)
 
 
-def ensure_order_tip_column() -> None:
+def run_migrations(bind=None) -> int:
+    """Bring the schema to LATEST_SCHEMA_VERSION; a single SELECT when current."""
+    from . import models  # noqa: F401  (register tables on SQLModel.metadata)
+
+    bind = bind if bind is not None else engine
+    with bind.connect() as conn:
+        current = get_schema_version(conn)
+    if current >= LATEST_SCHEMA_VERSION:
+        return current
+    with bind.begin() as conn:
+        # Creates any tables added since the recorded version (no-op otherwise).
+        SQLModel.metadata.create_all(conn)
+        conn.execute(
+            text("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)")
+        )
+        current = get_schema_version(conn)
+        for version, _description, step in MIGRATIONS:
+            if version > current:
+                step(conn)
+        conn.execute(text("DELETE FROM schema_version"))
+        conn.execute(
+            text("INSERT INTO schema_version (version) VALUES (:version)"),
+            {"version": LATEST_SCHEMA_VERSION},
+        )
+    return LATEST_SCHEMA_VERSION
+
+
+def vacuum_database(bind=None) -> None:
+    """Reclaim space left by archival deletes and refresh planner statistics.
+
+    VACUUM cannot run inside a transaction, so this uses an autocommit
+    connection. PostgreSQL's autovacuum covers the rest of the database; only
+    the tables archival churns are vacuumed here.
+    """
+    bind = bind if bind is not None else engine
+    with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if conn.dialect.name == "sqlite":
+            conn.execute(text("PRAGMA optimize"))
+            conn.execute(text("VACUUM"))
+        else:
+            conn.execute(text('VACUUM (ANALYZE) foodrun, "order", runnerreward'))
+
+
+# Legacy per-boot helpers, superseded by run_migrations(). Kept for scripts and
+# tests that patch older dev DBs directly; each swallows errors so a dev DB
+# never blocks startup. The steps are dialect-neutral, so they run anywhere.
+def _ensure_step(step) -> None:
     try:
-        if not DATABASE_URL.startswith("sqlite"):
-            return
+        # Use a transaction so ALTER + UPDATE are committed together
         with engine.begin() as conn:
-            cols = [row[1] for row in conn.execute(text("PRAGMA table_info('order')"))]
-            if "tip" not in cols:
-                conn.execute(
-                    text("ALTER TABLE 'order' ADD COLUMN tip REAL DEFAULT 0.0")
-                )
+            step(conn)
     except Exception:
+        # Best-effort safeguard; users can still delete dev.db manually.
         pass
 
 
+def ensure_user_points_column() -> None:
+    _ensure_step(_migrate_user_points)
+
+
+def ensure_foodrun_capacity_column() -> None:
+    _ensure_step(_migrate_foodrun_capacity)
+
+
+def ensure_foodrun_description_column() -> None:
+    _ensure_step(_migrate_foodrun_description)
+
+
+def ensure_order_pin_column() -> None:
+    _ensure_step(_migrate_order_pin)
+
+
+def ensure_order_tip_column() -> None:
+    _ensure_step(_migrate_order_tip)
+
+
 def ensure_foodrun_status_lowercase() -> None:
-    try:
-        if not DATABASE_URL.startswith("sqlite"):
-            return
-        with engine.begin() as conn:
-            conn.execute(
-                text(
-                    "UPDATE foodrun SET status=LOWER(TRIM(status)) "
-                    "WHERE status IS NOT NULL"
-                )
-            )
-    except Exception:
-        pass
+    _ensure_step(_migrate_foodrun_status_lowercase)
 
 
-# Dependency for FastAPI routes
+# Dependencies for FastAPI routes
 
 
-def get_session():
+def get_write_session():
     with Session(engine) as session:
         yield session
+
+
+def get_read_session():
+    # Read-side sessions never commit; autoflush off keeps them from issuing writes.
+    with Session(read_engine, autoflush=False) as session:
+        yield session
+
+
+# Backwards-compatible alias; new routes should pick a side explicitly.
+get_session = get_write_session
@@ -0,0 +1,251 @@
+"""
+In-process pub/sub for live run updates.
+
+Request handlers publish small incremental events after they commit
+(``run_created``, ``seats_changed``, ...). Streaming endpoints subscribe with a
+predicate and drain a bounded per-subscriber queue. Handlers run on threadpool
+threads, so ``publish`` hands events to each subscriber's event loop with
+``call_soon_threadsafe``. A subscriber that falls behind loses its oldest events
+and is flagged ``lagged`` so the stream can tell the client to resync.
+
+This is single-process by design: with several workers each process only sees
+its own writes, which is why clients still resync from the list endpoints.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import os
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, FrozenSet, Optional
+
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "256"))
+EVENT_REPLAY_SIZE = int(os.getenv("EVENT_REPLAY_SIZE", "512"))
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+SSE_RETRY_MS = 3000
+WS_QUEUE_SIZE = int(os.getenv("WS_QUEUE_SIZE", "64"))
+WS_HEARTBEAT_SECONDS = float(os.getenv("WS_HEARTBEAT_SECONDS", "25"))
+WS_IDLE_TIMEOUT_SECONDS = float(os.getenv("WS_IDLE_TIMEOUT_SECONDS", "70"))
+WS_SEND_TIMEOUT_SECONDS = float(os.getenv("WS_SEND_TIMEOUT_SECONDS", "10"))
+# Events a runner's socket receives for runs they own.
+RUNNER_EVENT_TYPES = frozenset({"order_joined", "order_cancelled", "order_delivered"})
+
+
+@dataclass(frozen=True)
+class Event:
+    id: int
+    type: str
+    data: Dict[str, Any]
+    # None = every authenticated user; otherwise only these user ids.
+    visible_to: Optional[FrozenSet[int]] = field(default=None)
+
+    def visible_for(self, user_id: int) -> bool:
+        return self.visible_to is None or user_id in self.visible_to
+
+    def to_sse(self) -> str:
+        payload = json.dumps({"type": self.type, **self.data}, separators=(",", ":"))
+        return f"id: {self.id}\nevent: {self.type}\ndata: {payload}\n\n"
+
+
+Predicate = Callable[[Event], bool]
+
+
+class Subscription:
+    def __init__(
+        self,
+        broker: "EventBroker",
+        loop: asyncio.AbstractEventLoop,
+        predicate: Optional[Predicate],
+        max_queue: int,
+    ) -> None:
+        self.broker = broker
+        self.loop = loop
+        self.predicate = predicate
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.lagged = False
+
+    def wants(self, event: Event) -> bool:
+        return self.predicate is None or self.predicate(event)
+
+    def _offer(self, event: Event) -> None:
+        # Runs on the subscriber's loop. Drop the oldest event rather than block.
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.lagged = True
+            self.broker._record_drop()
+        self.queue.put_nowait(event)
+
+    async def next(self, timeout: Optional[float] = None) -> Optional[Event]:
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self) -> None:
+        self.broker.unsubscribe(self)
+
+
+class EventBroker:
+    def __init__(
+        self, max_queue: int = EVENT_QUEUE_SIZE, replay: int = EVENT_REPLAY_SIZE
+    ) -> None:
+        self.max_queue = max_queue
+        self._subscribers: set[Subscription] = set()
+        self._recent: deque[Event] = deque(maxlen=replay)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(
+        self,
+        predicate: Optional[Predicate] = None,
+        last_event_id: Optional[int] = None,
+        max_queue: Optional[int] = None,
+    ) -> Subscription:
+        """Register a subscriber on the running loop, replaying missed events.
+
+        If ``last_event_id`` is older than the replay buffer the subscription
+        starts ``lagged`` so the client knows to refetch.
+        """
+        sub = Subscription(
+            self, asyncio.get_running_loop(), predicate, max_queue or self.max_queue
+        )
+        missed: list[Event] = []
+        with self._lock:
+            self._subscribers.add(sub)
+            if last_event_id is not None:
+                missed = [e for e in self._recent if e.id > last_event_id]
+                oldest = self._recent[0].id if self._recent else None
+                if oldest is not None and oldest > last_event_id + 1:
+                    sub.lagged = True
+        # Offer outside the lock: _offer may record a drop, which takes it again.
+        for event in missed:
+            if sub.wants(event):
+                sub._offer(event)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def publish(
+        self, event_type: str, visible_to: Optional[set] = None, **data: Any
+    ) -> Event:
+        """Thread-safe; call after the write that the event describes commits."""
+        with self._lock:
+            event = Event(
+                next(self._ids),
+                event_type,
+                data,
+                frozenset(visible_to) if visible_to is not None else None,
+            )
+            self._recent.append(event)
+            self.published += 1
+            targets = [sub for sub in self._subscribers if sub.wants(event)]
+        for sub in targets:
+            try:
+                sub.loop.call_soon_threadsafe(sub._offer, event)
+            except RuntimeError:
+                # The subscriber's loop is gone (client vanished mid-shutdown).
+                self.unsubscribe(sub)
+        return event
+
+    def _record_drop(self) -> None:
+        with self._lock:
+            self.dropped += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "subscribers": len(self._subscribers),
+                "published": self.published,
+                "dropped": self.dropped,
+                "last_event_id": self._recent[-1].id if self._recent else 0,
+            }
+
+
+broker = EventBroker()
+
+
+async def sse_stream(
+    sub: Subscription,
+    is_disconnected: Callable[[], Awaitable[bool]],
+    heartbeat: float = SSE_HEARTBEAT_SECONDS,
+) -> AsyncIterator[str]:
+    """Render a subscription as text/event-stream chunks until the client leaves."""
+    try:
+        yield f"retry: {SSE_RETRY_MS}\n\n"
+        while not await is_disconnected():
+            if sub.lagged:
+                sub.lagged = False
+                yield "event: resync\ndata: {}\n\n"
+            event = await sub.next(timeout=heartbeat)
+            if event is None:
+                yield ": keep-alive\n\n"
+                continue
+            yield event.to_sse()
+    finally:
+        sub.close()
+
+
+async def pump_runner_socket(
+    websocket,
+    sub: Subscription,
+    heartbeat: float = WS_HEARTBEAT_SECONDS,
+    idle_timeout: float = WS_IDLE_TIMEOUT_SECONDS,
+    send_timeout: float = WS_SEND_TIMEOUT_SECONDS,
+) -> None:
+    """Forward a runner's events over an accepted WebSocket until it goes away.
+
+    The server sends ``{"type": "ping"}`` after ``heartbeat`` seconds without
+    traffic; any client message (e.g. ``{"type": "pong"}``) counts as liveness
+    and a silent client is closed after ``idle_timeout``. A client too slow to
+    accept a send within ``send_timeout`` is closed with 1013 so it reconnects
+    and refetches; one that merely lags gets a ``resync`` message instead.
+    A single extra task per socket reads client messages.
+    """
+    loop = asyncio.get_running_loop()
+    last_seen = loop.time()
+
+    async def receive_loop() -> None:
+        nonlocal last_seen
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            last_seen = loop.time()
+
+    async def send(payload: Dict[str, Any]) -> None:
+        await asyncio.wait_for(websocket.send_json(payload), send_timeout)
+
+    reader = asyncio.create_task(receive_loop())
+    try:
+        while not reader.done():
+            if loop.time() - last_seen > idle_timeout:
+                await websocket.close(code=1001)
+                return
+            if sub.lagged:
+                sub.lagged = False
+                await send({"type": "resync"})
+            get_next = asyncio.ensure_future(sub.next(timeout=heartbeat))
+            done, _ = await asyncio.wait(
+                {get_next, reader}, return_when=asyncio.FIRST_COMPLETED
+            )
+            if get_next not in done:
+                get_next.cancel()
+                return
+            event = get_next.result()
+            if event is None:
+                await send({"type": "ping"})
+            else:
+                await send({"id": event.id, "type": event.type, **event.data})
+    except asyncio.TimeoutError:
+        await websocket.close(code=1013)
+    finally:
+        reader.cancel()
+        sub.close()
@@ -0,0 +1,179 @@
+"""
+Expire abandoned runs.
+
+A run only leaves "active" when its runner completes or cancels it, so a
+forgotten run would sit in ``/runs/available`` forever. ``create_run`` stores
+``expires_at``: the free-text ETA parsed to a deadline ("15 mins", "1 hr",
+"4:30 PM", "16:30", "by 6"; a bare number is minutes) plus a grace period, or
+a default lifetime when the ETA cannot be parsed or has already passed. A
+background sweeper flips overdue runs to "expired" in batched UPDATEs, driven
+by the ``(status, expires_at)`` index, so it only ever touches the active set.
+
+Clock-time ETAs are read in RUN_LOCAL_TIMEZONE; all stored times are UTC,
+matching the CURRENT_TIMESTAMP ``created_at`` default.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from sqlalchemy import and_, or_, update
+from sqlmodel import Session, select
+
+from .models import FoodRun
+from .queries import ACTIVE_STATUS
+
+EXPIRED_STATUS = "expired"
+RUN_EXPIRY_GRACE_MINUTES = int(os.getenv("RUN_EXPIRY_GRACE_MINUTES", "60"))
+# Lifetime of a run whose ETA cannot be parsed.
+RUN_EXPIRY_DEFAULT_MINUTES = int(os.getenv("RUN_EXPIRY_DEFAULT_MINUTES", "180"))
+RUN_EXPIRY_SWEEP_SECONDS = float(os.getenv("RUN_EXPIRY_SWEEP_SECONDS", "60"))
+RUN_EXPIRY_BATCH = int(os.getenv("RUN_EXPIRY_BATCH", "500"))
+
+try:
+    LOCAL_TZ = ZoneInfo(os.getenv("RUN_LOCAL_TIMEZONE", "America/New_York"))
+except ZoneInfoNotFoundError:  # pragma: no cover - no tz database installed
+    LOCAL_TZ = timezone.utc
+
+_DURATION = re.compile(
+    r"(\d+(?:\.\d+)?)\s*(m|mins?|minutes?|h|hrs?|hours?)?\b", re.IGNORECASE
+)
+# "4:30 PM" / "11am", then "16:45" / "5:30", then "by 6" / "at 7" (an hour on
+# the clock unless a unit or am/pm follows).
+_CLOCK = re.compile(
+    r"\b(?P<h12>\d{1,2})(?::(?P<m12>\d{2}))?\s*(?P<ampm>[ap])\.?\s*m\b\.?"
+    r"|\b(?P<h>\d{1,2}):(?P<m>\d{2})\b"
+    r"|\b(?:by|at|around)\s+(?P<hour>\d{1,2})\b"
+    r"(?!\s*(?:[.:\d]|[ap]\.?\s*m\b|[mh]\b|min|hr|hour))",
+    re.IGNORECASE,
+)
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands DateTime columns back naive; they were written as UTC.
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _next_local(local_now: datetime, hours: List[int], minute: int) -> datetime:
+    """The first of ``hours``:``minute`` (local) at or after ``local_now``."""
+    candidates = []
+    for days in (0, 1):
+        day = local_now + timedelta(days=days)
+        for hour in hours:
+            candidates.append(
+                day.replace(hour=hour, minute=minute, second=0, microsecond=0)
+            )
+    return min(c for c in candidates if c >= local_now)
+
+
+def parse_eta(eta: Optional[str], now: datetime) -> Optional[datetime]:
+    """The moment ``eta`` refers to, in UTC, or None when it is unparseable.
+
+    A clock time without am/pm ("5:30", "by 6") is its next occurrence, read
+    as 12-hour when the hour allows it. One with am/pm is today's, or
+    tomorrow's when today's is more than 12 hours gone ("12:15 AM" typed at
+    11:50 PM); a time earlier today comes back as is, already passed.
+    """
+    text = (eta or "").strip()
+    if not text:
+        return None
+    now = _as_utc(now)
+    clock = _CLOCK.search(text)
+    if clock:
+        local_now = now.astimezone(LOCAL_TZ)
+        if clock.group("ampm"):
+            hour, minute = int(clock.group("h12")), int(clock.group("m12") or 0)
+            if not 1 <= hour <= 12 or minute > 59:
+                return None
+            hour = hour % 12 + (12 if clock.group("ampm").lower() == "p" else 0)
+            target = local_now.replace(
+                hour=hour, minute=minute, second=0, microsecond=0
+            )
+            if target < local_now - timedelta(hours=12):
+                target += timedelta(days=1)
+            return target.astimezone(timezone.utc)
+        hour = int(clock.group("h") or clock.group("hour"))
+        minute = int(clock.group("m") or 0)
+        if hour > 23 or minute > 59:
+            return None
+        hours = [hour % 12, hour % 12 + 12] if 1 <= hour <= 12 else [hour]
+        return _next_local(local_now, hours, minute).astimezone(timezone.utc)
+    duration = _DURATION.search(text)
+    if duration:
+        amount = float(duration.group(1))
+        unit = (duration.group(2) or "m").lower()
+        minutes = amount * 60 if unit.startswith("h") else amount
+        return now + timedelta(minutes=minutes)
+    return None
+
+
+def run_expires_at(
+    eta: Optional[str], created_at: Optional[datetime] = None
+) -> datetime:
+    """When a run with this ETA stops being joinable (UTC).
+
+    An ETA that is unparseable or already passed ("2:30 PM" posted at 4 PM)
+    gets the default lifetime instead of a deadline in the past.
+    """
+    base = _as_utc(created_at) if created_at is not None else utcnow()
+    deadline = parse_eta(eta, base)
+    if deadline is None or deadline <= base:
+        return base + timedelta(minutes=RUN_EXPIRY_DEFAULT_MINUTES)
+    return deadline + timedelta(minutes=RUN_EXPIRY_GRACE_MINUTES)
+
+
+def expire_overdue_runs(
+    session: Session,
+    now: Optional[datetime] = None,
+    batch_size: Optional[int] = None,
+) -> List[int]:
+    """Mark active runs past ``expires_at`` as expired; returns their ids.
+
+    Each batch is one indexed SELECT of ids and one UPDATE, committed on its
+    own so the write lock is held briefly. The UPDATE re-checks the status, so
+    a run completed between the two statements is left alone. Runs without a
+    deadline (inserted around the ORM) get the default lifetime from
+    ``created_epoch``, as ``run_expires_at`` would have given them.
+    """
+    now = now or utcnow()
+    batch_size = batch_size or RUN_EXPIRY_BATCH
+    default_cutoff = int(now.timestamp()) - RUN_EXPIRY_DEFAULT_MINUTES * 60
+    overdue = or_(
+        FoodRun.expires_at <= now,
+        and_(
+            FoodRun.expires_at.is_(None), FoodRun.created_epoch <= default_cutoff
+        ),
+    )
+    expired: List[int] = []
+    while True:
+        ids = list(
+            session.exec(
+                select(FoodRun.id)
+                .where(FoodRun.status == ACTIVE_STATUS, overdue)
+                .order_by(FoodRun.expires_at)
+                .limit(batch_size)
+            ).all()
+        )
+        if not ids:
+            break
+        session.execute(
+            update(FoodRun)
+            .where(FoodRun.id.in_(ids), FoodRun.status == ACTIVE_STATUS)
+            .values(status=EXPIRED_STATUS)
+            .execution_options(synchronize_session=False)
+        )
+        session.commit()
+        expired.extend(ids)
+        if len(ids) < batch_size:
+            break
+    return expired
@@ -0,0 +1,171 @@
+"""
+Seasonal (weekday x hour) demand forecast, updated incrementally.
+
+``build_hourly_profile`` averages every day together, so quiet weekends drag
+down weekday lunch peaks and vice versa. Here each UTC (weekday, hour) slot of
+the week keeps an exponentially smoothed level of orders, runs and capacity
+per occurrence of that slot, persisted in ``forecastcell``.
+
+``refresh_forecast`` folds in only the hours that closed since its last run:
+one indexed range query on ``created_epoch`` counts their runs and orders,
+then each hour updates its own cell in O(1). Empty hours count as zero, so a
+slot that stops being busy decays. The first refresh bootstraps from the full
+live + archived history. Readers fold any hours the job has not reached yet in
+memory and write nothing, so a forecast costs two small queries.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import StaleDataError
+from sqlmodel import Session, select
+
+from .analytics import SECONDS_PER_HOUR, _all_orders, _all_runs, profile_entry
+from .models import ForecastCell
+
+# Weight of the newest week; 0.3 gives roughly the last 3-6 weeks a say.
+FORECAST_ALPHA = float(os.getenv("FORECAST_ALPHA", "0.3"))
+
+Slot = Tuple[int, int]
+Counts = Tuple[int, int, int]
+
+
+def current_hour(now: Optional[datetime] = None) -> int:
+    """Hour index (epoch // 3600) of ``now``."""
+    epoch = now.timestamp() if now is not None else time.time()
+    return int(epoch) // SECONDS_PER_HOUR
+
+
+def hour_slot(hour_index: int) -> Slot:
+    """(weekday 0 = Sunday, hour) of an hour index; 1970-01-01 was a Thursday."""
+    return (hour_index // 24 + 4) % 7, hour_index % 24
+
+
+def _hourly_counts(session: Session, first: int, last: int) -> Dict[int, Counts]:
+    """{hour index: (orders, runs, capacity)} for hours first..last inclusive."""
+    lo, hi = first * SECONDS_PER_HOUR, (last + 1) * SECONDS_PER_HOUR
+    counts: Dict[int, List[int]] = {}
+    runs = _all_runs()
+    block = runs.c.created_epoch // SECONDS_PER_HOUR
+    for hour_index, run_count, capacity in session.exec(
+        select(block, func.count(), func.sum(runs.c.capacity))
+        .where(runs.c.created_epoch >= lo, runs.c.created_epoch < hi)
+        .group_by(block)
+    ).all():
+        counts[int(hour_index)] = [0, int(run_count), int(capacity or 0)]
+    orders = _all_orders()
+    block = orders.c.created_epoch // SECONDS_PER_HOUR
+    for hour_index, order_count in session.exec(
+        select(block, func.count())
+        .where(orders.c.created_epoch >= lo, orders.c.created_epoch < hi)
+        .group_by(block)
+    ).all():
+        counts.setdefault(int(hour_index), [0, 0, 0])[0] = int(order_count)
+    return {hour_index: tuple(values) for hour_index, values in counts.items()}
+
+
+def _first_hour(session: Session) -> Optional[int]:
+    epochs = [
+        session.exec(select(func.min(source.c.created_epoch))).one()
+        for source in (_all_runs(), _all_orders())
+    ]
+    known = [int(epoch) for epoch in epochs if epoch is not None]
+    return min(known) // SECONDS_PER_HOUR if known else None
+
+
+def _start_cells(session: Session, closed: int, make=ForecastCell) -> Dict[Slot, Any]:
+    """Fresh cells positioned just before the oldest recorded run or order."""
+    first = _first_hour(session)
+    through_hour = closed if first is None else min(first, closed + 1) - 1
+    return {
+        (weekday, hour): make(
+            weekday=weekday,
+            hour=hour,
+            orders=0.0,
+            runs=0.0,
+            capacity=0.0,
+            observations=0,
+            through_hour=through_hour,
+        )
+        for weekday in range(7)
+        for hour in range(24)
+    }
+
+
+def _fold(cells: Dict[Slot, Any], session: Session, closed: int) -> int:
+    """Advance ``cells`` through hour ``closed``; returns how many hours."""
+    watermark = max(cell.through_hour for cell in cells.values())
+    if closed <= watermark:
+        return 0
+    counts = _hourly_counts(session, watermark + 1, closed)
+    for hour_index in range(watermark + 1, closed + 1):
+        cell = cells[hour_slot(hour_index)]
+        orders, runs, capacity = counts.get(hour_index, (0, 0, 0))
+        if cell.observations:
+            cell.orders += FORECAST_ALPHA * (orders - cell.orders)
+            cell.runs += FORECAST_ALPHA * (runs - cell.runs)
+            cell.capacity += FORECAST_ALPHA * (capacity - cell.capacity)
+        else:
+            cell.orders, cell.runs, cell.capacity = orders, runs, capacity
+        cell.observations += 1
+        cell.through_hour = hour_index
+    return closed - watermark
+
+
+def refresh_forecast(session: Session, now: Optional[datetime] = None) -> int:
+    """Persist every hour closed since the last refresh; returns hours folded.
+
+    Returns 0 without writing when another worker refreshed concurrently.
+    """
+    closed = current_hour(now) - 1
+    cells = {
+        (cell.weekday, cell.hour): cell
+        for cell in session.exec(select(ForecastCell)).all()
+    }
+    if not cells:
+        cells = _start_cells(session, closed)
+        session.add_all(cells.values())
+    folded = _fold(cells, session, closed)
+    try:
+        session.commit()
+    except (IntegrityError, StaleDataError):
+        session.rollback()
+        return 0
+    return folded
+
+
+def seasonal_profile(
+    session: Session, weekday: Optional[int] = None, now: Optional[datetime] = None
+) -> List[dict]:
+    """24 profile entries for ``weekday`` (default: today, UTC); read-only.
+
+    Entries have ``build_hourly_profile``'s shape, with the smoothed levels as
+    the per-day averages.
+    """
+    hour_index = current_hour(now)
+    # Plain rows rather than ORM objects: folding pending hours must not dirty
+    # the session, and building 168 model instances costs more than the fold.
+    cells = {
+        (row.weekday, row.hour): SimpleNamespace(**row._mapping)
+        for row in session.exec(select(*ForecastCell.__table__.columns)).all()
+    }
+    if not cells:
+        cells = _start_cells(session, hour_index - 1, make=SimpleNamespace)
+    _fold(cells, session, hour_index - 1)
+    if weekday is None:
+        weekday = hour_slot(hour_index)[0]
+    profile = []
+    for hour in range(24):
+        cell = cells[(weekday, hour)]
+        utilization = cell.orders / cell.capacity if cell.capacity else 0.0
+        profile.append(
+            profile_entry(hour, cell.orders, cell.runs, cell.capacity, utilization)
+        )
+    return profile
@@ -0,0 +1,138 @@
+"""
+Password hashing, offloaded to a bounded process pool.
+
+PBKDF2 is pure CPU, so running it inline lets a burst of logins pin every
+threadpool worker. ``HashPool`` runs hashes in a small ``ProcessPoolExecutor``
+behind an awaitable API and sheds load (``HashPoolBusy``) once too many requests
+are queued. Workers are spawned (not forked) and import only this module, so it
+must stay free of FastAPI/DB imports.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Tuple
+
+AUTH_HASH_WORKERS = int(
+    os.getenv("AUTH_HASH_WORKERS", str(min(4, os.cpu_count() or 1)))
+)
+AUTH_HASH_MAX_PENDING = int(os.getenv("AUTH_HASH_MAX_PENDING", "64"))
+# Target PBKDF2 work factor (see calibrate_password_hash.py). Stored hashes below
+# this cost are transparently re-hashed on the user's next successful login;
+# stronger ones are kept, so lowering the target never weakens existing hashes.
+PASSWORD_HASH_ROUNDS = int(os.getenv("PASSWORD_HASH_ROUNDS", "29000"))
+
+
+@lru_cache(maxsize=1)
+def get_pwd_context():
+    from passlib.context import CryptContext
+
+    # Use PBKDF2-SHA256 (no external C extensions required, avoids bcrypt backend issues on Windows)
+    return CryptContext(
+        schemes=["pbkdf2_sha256"],
+        deprecated="auto",
+        pbkdf2_sha256__default_rounds=PASSWORD_HASH_ROUNDS,
+        pbkdf2_sha256__min_rounds=PASSWORD_HASH_ROUNDS,
+    )
+
+
+def hash_password(password: str) -> str:
+    return get_pwd_context().hash(password)
+
+
+def verify_password(plain: str, hashed: str) -> bool:
+    return get_pwd_context().verify(plain, hashed)
+
+
+def verify_and_update(plain: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    """(matches, replacement hash or None when the stored one is current)."""
+    return get_pwd_context().verify_and_update(plain, hashed)
+
+
+class HashPoolBusy(RuntimeError):
+    """Raised when the hashing queue is full; callers should answer 503."""
+
+
+class HashPool:
+    def __init__(self, workers: int, max_pending: int) -> None:
+        # workers <= 0 keeps hashing in-process on the default thread pool.
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def _acquire(self) -> None:
+        with self._lock:
+            if self.in_flight >= self.max_pending:
+                self.rejected += 1
+                raise HashPoolBusy("password hashing queue is full")
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def _release(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        self._acquire()
+        try:
+            loop = asyncio.get_running_loop()
+            executor = self._get_executor() if self.workers > 0 else None
+            return await loop.run_in_executor(executor, fn, *args)
+        finally:
+            self._release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            busy = min(self.in_flight, self.workers) if self.workers > 0 else 0
+            return {
+                "workers": self.workers,
+                "in_flight": self.in_flight,
+                "queue_depth": self.in_flight - busy,
+                "peak_in_flight": self.peak_in_flight,
+                "max_pending": self.max_pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+hash_pool = HashPool(AUTH_HASH_WORKERS, AUTH_HASH_MAX_PENDING)
+
+
+async def hash_password_async(password: str) -> str:
+    return await hash_pool.run(hash_password, password)
+
+
+async def verify_password_async(plain: str, hashed: str) -> bool:
+    return await hash_pool.run(verify_password, plain, hashed)
+
+
+async def verify_and_update_async(
+    plain: str, hashed: str
+) -> Tuple[bool, Optional[str]]:
+    return await hash_pool.run(verify_and_update, plain, hashed)
@@ -0,0 +1,275 @@
+"""
+Durable queue for side effects that should not hold up a request.
+
+Handlers ``enqueue`` a job on their own session, so it commits (or rolls
+back) together with the write it follows and survives restarts. Workers
+(``python -m app.worker``, or the in-process drain job when
+JOB_QUEUE_IN_PROCESS is on) ``lease`` due jobs in batches. Each lease
+stamps a random token and an expiry, so a crashed worker's jobs are picked
+up again once the lease lapses, and a worker whose lease ran out cannot
+finish or fail a job that someone else now holds.
+
+Delivery is at least once, so handlers must be idempotent. A success
+deletes the row. A failure is retried with exponential backoff plus jitter
+(JOB_QUEUE_BACKOFF_SECONDS doubling up to JOB_QUEUE_BACKOFF_MAX_SECONDS).
+After ``max_attempts`` the row stays as ``dead`` with its last error, for
+inspection or requeueing by hand.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import random
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import and_, delete, or_, update
+from sqlmodel import Session, select
+
+from .models import QueuedJob
+
+JOB_QUEUE_LEASE_SECONDS = float(os.getenv("JOB_QUEUE_LEASE_SECONDS", "60"))
+JOB_QUEUE_MAX_ATTEMPTS = int(os.getenv("JOB_QUEUE_MAX_ATTEMPTS", "5"))
+JOB_QUEUE_BACKOFF_SECONDS = float(os.getenv("JOB_QUEUE_BACKOFF_SECONDS", "5"))
+JOB_QUEUE_BACKOFF_MAX_SECONDS = float(
+    os.getenv("JOB_QUEUE_BACKOFF_MAX_SECONDS", "600")
+)
+JOB_QUEUE_BATCH = int(os.getenv("JOB_QUEUE_BATCH", "20"))
+
+QUEUED, LEASED, DEAD = "queued", "leased", "dead"
+
+Handler = Callable[[Session, Dict[str, Any]], None]
+HANDLERS: Dict[str, Handler] = {}
+
+
+def task(kind: str) -> Callable[[Handler], Handler]:
+    """Register the handler for ``kind``; see app/tasks.py."""
+
+    def register(func: Handler) -> Handler:
+        HANDLERS[kind] = func
+        return func
+
+    return register
+
+
+def enqueue(
+    session: Session,
+    kind: str,
+    payload: Optional[Dict[str, Any]] = None,
+    *,
+    delay: float = 0.0,
+    unique: bool = False,
+    max_attempts: Optional[int] = None,
+    now: Optional[float] = None,
+) -> Optional[QueuedJob]:
+    """Add a job to ``session``; it is durable once the caller commits.
+
+    ``unique`` skips the insert when an identical job is already waiting,
+    for refresh-style jobs where one pending run covers every request.
+    """
+    body = json.dumps(payload or {}, sort_keys=True, separators=(",", ":"))
+    if unique:
+        waiting = session.exec(
+            select(QueuedJob.id).where(
+                QueuedJob.kind == kind,
+                QueuedJob.payload == body,
+                QueuedJob.status == QUEUED,
+            )
+        ).first()
+        if waiting is not None:
+            return None
+    now = time.time() if now is None else now
+    job = QueuedJob(
+        kind=kind,
+        payload=body,
+        max_attempts=max_attempts or JOB_QUEUE_MAX_ATTEMPTS,
+        run_after=now + delay,
+        created_at=now,
+    )
+    session.add(job)
+    return job
+
+
+def backoff_seconds(attempts: int) -> float:
+    """Delay before retry number ``attempts`` (1-based), with up to 10% jitter."""
+    base = min(
+        JOB_QUEUE_BACKOFF_SECONDS * 2 ** max(attempts - 1, 0),
+        JOB_QUEUE_BACKOFF_MAX_SECONDS,
+    )
+    return base + random.uniform(0, base * 0.1)
+
+
+def lease(
+    session: Session,
+    batch_size: Optional[int] = None,
+    lease_seconds: Optional[float] = None,
+    now: Optional[float] = None,
+) -> List[QueuedJob]:
+    """Claim up to ``batch_size`` due jobs (oldest first) for this caller."""
+    now = time.time() if now is None else now
+    lease_seconds = lease_seconds or JOB_QUEUE_LEASE_SECONDS
+    lapsed = and_(QueuedJob.status == LEASED, QueuedJob.lease_until < now)
+    # A job whose worker died on every attempt would otherwise loop forever.
+    session.execute(
+        update(QueuedJob)
+        .where(lapsed, QueuedJob.attempts >= QueuedJob.max_attempts)
+        .values(status=DEAD, lease_token=None, last_error="lease expired")
+        .execution_options(synchronize_session=False)
+    )
+    claimable = or_(
+        and_(QueuedJob.status == QUEUED, QueuedJob.run_after <= now), lapsed
+    )
+    ids = list(
+        session.exec(
+            select(QueuedJob.id)
+            .where(claimable)
+            .order_by(QueuedJob.run_after, QueuedJob.id)
+            .limit(batch_size or JOB_QUEUE_BATCH)
+        ).all()
+    )
+    if not ids:
+        session.commit()
+        return []
+    token = uuid.uuid4().hex
+    # Re-checking ``claimable`` makes the claim atomic: a row another worker
+    # took between the SELECT and this UPDATE no longer matches.
+    session.execute(
+        update(QueuedJob)
+        .where(QueuedJob.id.in_(ids), claimable)
+        .values(
+            status=LEASED,
+            lease_token=token,
+            lease_until=now + lease_seconds,
+            attempts=QueuedJob.attempts + 1,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    session.commit()
+    return list(
+        session.exec(
+            select(QueuedJob)
+            .where(QueuedJob.lease_token == token)
+            .order_by(QueuedJob.run_after, QueuedJob.id)
+        ).all()
+    )
+
+
+def _held(job: QueuedJob):
+    return and_(QueuedJob.id == job.id, QueuedJob.lease_token == job.lease_token)
+
+
+def renew(
+    session: Session,
+    job: QueuedJob,
+    lease_seconds: Optional[float] = None,
+    now: Optional[float] = None,
+) -> bool:
+    """Extend a still-valid lease; False when it lapsed or was taken over.
+
+    A batch is leased in one go but run one job at a time, so each job
+    re-checks its lease just before it starts.
+    """
+    now = time.time() if now is None else now
+    result = session.execute(
+        update(QueuedJob)
+        .where(_held(job), QueuedJob.lease_until >= now)
+        .values(lease_until=now + (lease_seconds or JOB_QUEUE_LEASE_SECONDS))
+        .execution_options(synchronize_session=False)
+    )
+    session.commit()
+    return result.rowcount == 1
+
+
+def complete(session: Session, job: QueuedJob) -> bool:
+    """Delete a finished job; False when the lease was lost meanwhile."""
+    result = session.execute(
+        delete(QueuedJob)
+        .where(_held(job))
+        .execution_options(synchronize_session=False)
+    )
+    session.commit()
+    return result.rowcount == 1
+
+
+def fail(
+    session: Session, job: QueuedJob, error: str, now: Optional[float] = None
+) -> str:
+    """Schedule a retry, or dead-letter the job; returns its new status."""
+    now = time.time() if now is None else now
+    if job.attempts >= job.max_attempts:
+        status, values = DEAD, {}
+    else:
+        status, values = QUEUED, {"run_after": now + backoff_seconds(job.attempts)}
+    session.execute(
+        update(QueuedJob)
+        .where(_held(job))
+        .values(
+            status=status,
+            lease_token=None,
+            lease_until=None,
+            last_error=error[:1000],
+            **values,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    session.commit()
+    return status
+
+
+def run_job(bind, job: QueuedJob) -> Optional[str]:
+    """Run one leased job in its own session; returns the error, if any."""
+    handler = HANDLERS.get(job.kind)
+    if handler is None:
+        return f"no handler for {job.kind!r}"
+    try:
+        with Session(bind) as session:
+            handler(session, json.loads(job.payload))
+    except Exception as exc:  # any failure is retried, then dead-lettered
+        return f"{type(exc).__name__}: {exc}"
+    return None
+
+
+def drain(
+    bind,
+    batch_size: Optional[int] = None,
+    max_batches: Optional[int] = None,
+    now: Optional[float] = None,
+) -> Dict[str, int]:
+    """Lease and run due jobs until none are left (or ``max_batches``)."""
+    from . import tasks  # noqa: F401  (registers the handlers)
+
+    counts = {"done": 0, "retried": 0, "dead": 0, "lost": 0}
+    batches = 0
+    # Leased rows stay loaded across the per-job commits below.
+    with Session(bind, expire_on_commit=False) as session:
+        while max_batches is None or batches < max_batches:
+            jobs = lease(session, batch_size=batch_size, now=now)
+            if not jobs:
+                break
+            batches += 1
+            for job in jobs:
+                if not renew(session, job, now=now):
+                    counts["lost"] += 1
+                    continue
+                error = run_job(bind, job)
+                if error is None:
+                    counts["done" if complete(session, job) else "lost"] += 1
+                    continue
+                if job.kind not in HANDLERS:
+                    job.attempts = job.max_attempts
+                status = fail(session, job, error, now=now)
+                counts["dead" if status == DEAD else "retried"] += 1
+                print(f"[queue] {job.kind} #{job.id} failed ({status}): {error}")
+            session.expunge_all()
+    return counts
+
+
+def queue_stats(session: Session) -> Dict[str, int]:
+    from sqlalchemy import func
+
+    rows = session.exec(
+        select(QueuedJob.status, func.count()).group_by(QueuedJob.status)
+    ).all()
+    return {QUEUED: 0, LEASED: 0, DEAD: 0, **{status: n for status, n in rows}}
@@ -1,78 +1,120 @@
-import asyncio
 import os
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 from dotenv import load_dotenv
-from fastapi import Depends, FastAPI, HTTPException, status
+from fastapi import (
+    Depends,
+    FastAPI,
+    HTTPException,
+    Request,
+    Response,
+    WebSocket,
+    status,
+)
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from sqlmodel import Session, select
-from sqlalchemy import func
-from sqlalchemy.exc import IntegrityError
-from contextlib import asynccontextmanager, suppress
-import httpx
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from contextlib import asynccontextmanager
+from anyio import to_thread
+from starlette.concurrency import run_in_threadpool
 
 from .db import (
-    create_db_and_tables,
-    get_session,
-    ensure_user_points_column,
-    ensure_foodrun_capacity_column,
-    ensure_order_pin_column,
-    ensure_order_tip_column,
-    ensure_foodrun_status_lowercase,
+    get_read_session,
+    get_write_session,
+    run_migrations,
     engine,
+    read_engine,
+    vacuum_database,
+)
+from .events import (
+    RUNNER_EVENT_TYPES,
+    WS_QUEUE_SIZE,
+    broker,
+    pump_runner_socket,
+    sse_stream,
 )
-from .models import User, FoodRun, Order, RunnerReward
-from .analytics import (
-    generate_peak_payload,
-    issue_peak_rewards,
-    list_recent_rewards,
+from .changes import conditional_get, etag_matches
+from .archive import ARCHIVE_INTERVAL_MINUTES, archive_finished_runs
+from .expiry import RUN_EXPIRY_SWEEP_SECONDS, expire_overdue_runs, run_expires_at
+from .pool import describe_pool
+from .jobqueue import drain, enqueue
+from .scheduler import scheduler
+from .responses import ndjson_response, prebuilt_json, wants_ndjson
+from .queries import (
+    active_status_clause,
+    all_runs,
+    archived_runner_runs,
+    available_runs,
+    is_active_status,
+    iter_archived_runner_runs,
+    iter_joined_runs_history,
+    iter_runs_with_orders,
+    joined_runs,
+    joined_runs_history,
+    live_seats_remaining,
+    load_runs_with_orders,
+    newest_first,
+    normalize_status,
+    points_summary,
+    runner_run_payload,
 )
+from .models import User, FoodRun, Order
 from .schemas import (
     AuthRequest,
     AuthResponse,
     UserOut,
     FoodRunCreate,
+    FeedResponse,
     FoodRunResponse,
     JoinedRunResponse,
     OrderCreate,
-    OrderResponse,
     OrderJoinResponse,
     PointsResponse,
     PinVerifyRequest,
     RunDescriptionRequest,
     RunDescriptionResponse,
     PeakForecastResponse,
+    PeakHoursResponse,
     RunnerRewardResponse,
     RunLoadRequest,
     RunLoadResponse,
 )
+from .hashing import (
+    HashPoolBusy,
+    hash_password_async,
+    hash_pool,
+    verify_and_update_async,
+)
 from .auth import (
-    get_password_hash,
-    verify_password,
     create_access_token,
+    decode_access_token,
+    get_current_user,
     get_current_user_claims,
+    get_current_user_for_write,
+    get_stream_claims,
+    token_cache,
+    user_loader_stats,
 )
 
 load_dotenv()
 PEAK_FORECAST_INTERVAL_MINUTES = int(os.getenv("PEAK_FORECAST_INTERVAL_MINUTES", "60"))
-PEAK_BONUS_POINTS = int(os.getenv("PEAK_BONUS_POINTS", "5"))
-_peak_forecast_task: asyncio.Task | None = None
-
-
-ACTIVE_STATUS = "active"
-
-
-def normalize_status(value: str | None) -> str:
-    cleaned = (value or "").strip().lower()
-    return cleaned or ACTIVE_STATUS
-
-
-def is_active_status(value: str | None) -> bool:
-    return normalize_status(value) == ACTIVE_STATUS
-
-
-def active_status_expr():
-    return func.lower(func.trim(FoodRun.status))
+# Delay before the first forecast cycle so it never runs on the startup path.
+PEAK_FORECAST_INITIAL_DELAY_SECONDS = float(
+    os.getenv("PEAK_FORECAST_INITIAL_DELAY_SECONDS", "60")
+)
+PEAK_REWARDS_INTERVAL_MINUTES = int(
+    os.getenv("PEAK_REWARDS_INTERVAL_MINUTES", str(PEAK_FORECAST_INTERVAL_MINUTES))
+)
+# 0 disables the periodic VACUUM.
+DB_VACUUM_INTERVAL_HOURS = float(os.getenv("DB_VACUUM_INTERVAL_HOURS", "24"))
+# Drain the job queue from this process; set 0 when `python -m app.worker` runs.
+JOB_QUEUE_IN_PROCESS = os.getenv("JOB_QUEUE_IN_PROCESS", "1").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+JOB_QUEUE_POLL_SECONDS = float(os.getenv("JOB_QUEUE_POLL_SECONDS", "2"))
 
 
 def build_default_run_description(restaurant: str, drop_point: str, eta: str) -> str:
@@ -98,18 +140,78 @@ def _serialize_rewards(rewards) -> List[RunnerRewardResponse]:
 
 
 def _run_peak_forecast_cycle() -> None:
+    from .analytics import generate_peak_payload, peak_hours_snapshot
+    from .forecasting import refresh_forecast
+
     with Session(engine) as session:
-        payload = generate_peak_payload(session)
-        rewards = issue_peak_rewards(session, payload["peak_forecast"])
-        if rewards:
-            print(f"[analytics] Issued {len(rewards)} peak-hour rewards")
+        refresh_forecast(session)
+        payload = generate_peak_payload(session, sections=("peak_forecast",))
+        peak_hours_snapshot.update(payload["peak_forecast"])
 
 
-async def _peak_forecast_scheduler(interval_minutes: int) -> None:
-    interval = max(interval_minutes, 5)
-    while True:
-        await asyncio.to_thread(_run_peak_forecast_cycle)
-        await asyncio.sleep(interval * 60)
+def _run_peak_rewards_cycle() -> None:
+    from .analytics import issue_peak_rewards
+
+    with Session(engine) as session:
+        rewards = issue_peak_rewards(session)
+    if rewards:
+        print(f"[analytics] Issued {len(rewards)} peak-hour rewards")
+
+
+def _run_expiry_sweep() -> None:
+    with Session(engine) as session:
+        expired = expire_overdue_runs(session)
+    for run_id in expired:
+        broker.publish("run_expired", run_id=run_id)
+    if expired:
+        print(f"[runs] Expired {len(expired)} overdue run(s)")
+
+
+def _run_archive_cycle() -> None:
+    with Session(engine) as session:
+        moved = archive_finished_runs(session)
+    if moved:
+        print(f"[runs] Archived {moved} finished run(s)")
+
+
+def _run_job_queue() -> None:
+    counts = drain(engine)
+    if counts["done"] or counts["dead"]:
+        print(f"[queue] Ran {counts['done']} job(s), {counts['dead']} dead")
+
+
+def _register_jobs() -> None:
+    """Background jobs; see app/scheduler.py for alignment and metrics."""
+    forecast_seconds = max(PEAK_FORECAST_INTERVAL_MINUTES, 5) * 60
+    scheduler.register(
+        "peak_forecast",
+        _run_peak_forecast_cycle,
+        forecast_seconds,
+        # Never on the startup path, but well before the first aligned hour.
+        initial_delay=PEAK_FORECAST_INITIAL_DELAY_SECONDS,
+    )
+    scheduler.register(
+        "peak_rewards",
+        _run_peak_rewards_cycle,
+        max(PEAK_REWARDS_INTERVAL_MINUTES, 5) * 60,
+        initial_delay=PEAK_FORECAST_INITIAL_DELAY_SECONDS,
+    )
+    scheduler.register(
+        "run_expiry", _run_expiry_sweep, max(RUN_EXPIRY_SWEEP_SECONDS, 5)
+    )
+    scheduler.register(
+        "archive", _run_archive_cycle, max(ARCHIVE_INTERVAL_MINUTES, 1) * 60
+    )
+    if DB_VACUUM_INTERVAL_HOURS > 0:
+        scheduler.register("vacuum", vacuum_database, DB_VACUUM_INTERVAL_HOURS * 3600)
+    if JOB_QUEUE_IN_PROCESS:
+        scheduler.register(
+            "job_queue",
+            _run_job_queue,
+            max(JOB_QUEUE_POLL_SECONDS, 0.5),
+            initial_delay=PEAK_FORECAST_INITIAL_DELAY_SECONDS,
+            jitter=0,
+        )
 
 
 def build_default_run_load_assessment(payload: RunLoadRequest) -> str:
@@ -160,25 +262,16 @@ def build_default_run_load_assessment(payload: RunLoadRequest) -> str:
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Create DB tables on startup
-    create_db_and_tables()
-    # Ensure SQLite dev DBs have newly added columns (e.g., 'points')
-    ensure_user_points_column()
-    ensure_foodrun_capacity_column()
-    ensure_order_pin_column()
-    ensure_order_tip_column()
-    ensure_foodrun_status_lowercase()
-    global _peak_forecast_task
-    _peak_forecast_task = asyncio.create_task(
-        _peak_forecast_scheduler(PEAK_FORECAST_INTERVAL_MINUTES)
-    )
+    # Create tables and apply pending migrations; a single version check once
+    # the schema is current.
+    run_migrations()
+    _register_jobs()
+    scheduler.start()
     try:
         yield
     finally:
-        if _peak_forecast_task:
-            _peak_forecast_task.cancel()
-            with suppress(asyncio.CancelledError):
-                await _peak_forecast_task
+        hash_pool.shutdown()
+        await scheduler.stop()
 
 
 origins_env = os.getenv("CORS_ORIGINS", "http://localhost:5173")
@@ -200,6 +293,80 @@ def root():
     return {"status": "ok"}
 
 
+@app.get("/metrics")
+async def metrics():
+    # async so the threadpool limiter is readable; it is loop-bound.
+    limiter = to_thread.current_default_thread_limiter()
+    return {
+        "db_pools": {
+            "write": describe_pool(engine),
+            "read": describe_pool(read_engine),
+        },
+        "threadpool": {
+            "total": int(limiter.total_tokens),
+            "in_use": int(limiter.borrowed_tokens),
+        },
+        "auth": {
+            "token_cache": token_cache.stats(),
+            "user_loader": user_loader_stats.stats(),
+            "hash_pool": hash_pool.stats(),
+        },
+        "events": broker.stats(),
+        "jobs": scheduler.stats(),
+    }
+
+
+@app.get("/events/runs")
+async def stream_run_events(request: Request, claims=Depends(get_stream_claims)):
+    """Server-Sent Events feed of run/seat changes, replacing list polling.
+
+    Events: run_created, seats_changed, run_completed, run_cancelled,
+    run_expired, plus order_joined/order_cancelled/order_delivered for the
+    runner and joiner involved. A ``resync`` event means updates were
+    dropped and the client should refetch its lists.
+    Reconnects resume from the Last-Event-ID header when still buffered.
+    """
+    user_id = int(claims["sub"])
+    last_event_id = request.headers.get("last-event-id", "")
+    sub = broker.subscribe(
+        lambda event: event.visible_for(user_id),
+        last_event_id=int(last_event_id) if last_event_id.isdigit() else None,
+    )
+    return StreamingResponse(
+        sse_stream(sub, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.websocket("/ws/runner")
+async def runner_socket(websocket: WebSocket):
+    """Push order_joined, order_cancelled and order_delivered for the caller's runs.
+
+    Authenticate with ``?token=`` (browsers cannot set headers on WebSocket
+    upgrades) or a Bearer Authorization header. The server pings when idle;
+    clients should answer with any message, e.g. ``{"type": "pong"}``.
+    """
+    token = websocket.query_params.get("token")
+    if not token:
+        scheme, _, value = websocket.headers.get("authorization", "").partition(" ")
+        token = value if scheme.lower() == "bearer" else None
+    try:
+        if not token:
+            raise HTTPException(status_code=401, detail="Missing token")
+        runner_id = int(decode_access_token(token)["sub"])
+    except (HTTPException, KeyError, ValueError):
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+    sub = broker.subscribe(
+        lambda event: event.type in RUNNER_EVENT_TYPES
+        and event.data.get("runner_id") == runner_id,
+        max_queue=WS_QUEUE_SIZE,
+    )
+    await pump_runner_socket(websocket, sub)
+
+
 @app.post("/ai/run-description", response_model=RunDescriptionResponse)
 def generate_run_description(
     payload: RunDescriptionRequest, claims=Depends(get_current_user_claims)
@@ -209,76 +376,109 @@ def generate_run_description(
     default_suggestion = build_default_run_description(
         payload.restaurant, payload.drop_point, payload.eta
     )
-    api_key = os.getenv("AI_RUN_DESC_KEY")
-    api_url = os.getenv(
-        "AI_RUN_DESC_URL", "https://api.openai.com/v1/chat/completions"
+    from .ai import request_run_description
+
+    suggestion = request_run_description(
+        payload.restaurant, payload.drop_point, payload.eta
     )
-    model = os.getenv("AI_RUN_DESC_MODEL", "gpt-4o-mini")
-    if not api_key:
-        return {"suggestion": default_suggestion}
-    try:
-        response = httpx.post(
-            api_url,
-            headers={
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json",
-            },
-            json={
-                "model": model,
-                "messages": [
-                    {
-                        "role": "system",
-                        "content": "You create short, friendly, single-sentence blurbs advertising a campus food run.",
-                    },
-                    {
-                        "role": "user",
-                        "content": (
-                            "Write a concise (<=25 words) invitation for this run:\n"
-                            f"Restaurant: {payload.restaurant}\n"
-                            f"Drop point: {payload.drop_point}\n"
-                            f"ETA: {payload.eta}"
-                        ),
-                    },
-                ],
-                "temperature": 0.4,
-                "max_tokens": 80,
-            },
-            timeout=10,
-        )
-        response.raise_for_status()
-        data = response.json()
-        suggestion = (
-            data.get("choices", [{}])[0]
-            .get("message", {})
-            .get("content", "")
-            .strip()
+    # gracefully fallback to deterministic copy
+    return {"suggestion": suggestion or default_suggestion}
+
+
+@app.get(
+    "/analytics/peak-forecast",
+    response_model=PeakForecastResponse,
+    response_model_exclude_unset=True,
+    dependencies=[
+        Depends(
+            conditional_get("foodrun", "order", "runnerreward", rollover_seconds=3600)
         )
-        if not suggestion:
-            raise ValueError("Empty AI response")
-        return {"suggestion": suggestion}
-    except Exception:
-        # gracefully fallback to deterministic copy
-        return {"suggestion": default_suggestion}
+    ],
+)
+def read_peak_forecast(
+    session: Session = Depends(get_read_session), include: Optional[str] = None
+):
+    """Full forecast payload; ``include=`` (comma-separated) limits the sections.
+
+    Sections: hourly_timeseries, hourly_profile, seasonal_profile, peak_forecast,
+    recent_rewards.
+    Omitted sections are neither queried nor returned.
+    """
+    from .analytics import (
+        PEAK_PAYLOAD_SECTIONS,
+        generate_peak_payload,
+        list_recent_rewards,
+        peak_hours_snapshot,
+    )
 
+    allowed = (*PEAK_PAYLOAD_SECTIONS, "recent_rewards")
+    if include is None:
+        sections = set(allowed)
+    else:
+        sections = {part.strip() for part in include.split(",") if part.strip()}
+        unknown = sections - set(allowed)
+        if unknown:
+            raise HTTPException(
+                status_code=422,
+                detail=f"Unknown include section(s): {', '.join(sorted(unknown))}",
+            )
+    payload = generate_peak_payload(session, sections=sections)
+    if "peak_forecast" in payload:
+        peak_hours_snapshot.update(payload["peak_forecast"])
+    if include is None:
+        payload["rewards_issued"] = []
+    if "recent_rewards" in sections:
+        payload["recent_rewards"] = _serialize_rewards(list_recent_rewards(session))
+    return payload
 
-@app.get("/analytics/peak-forecast", response_model=PeakForecastResponse)
-def read_peak_forecast(session: Session = Depends(get_session)):
-    payload = generate_peak_payload(session)
-    recent = list_recent_rewards(session)
-    return {
-        **payload,
-        "rewards_issued": [],
-        "recent_rewards": _serialize_rewards(recent),
+
+@app.get("/analytics/peak-hours", response_model=PeakHoursResponse)
+def read_peak_hours(request: Request, session: Session = Depends(get_read_session)):
+    """Current peak windows only, served from the forecast job's snapshot.
+
+    Constant-size, pre-serialized and publicly cacheable; the first call in a
+    fresh process computes the snapshot once.
+    """
+    from .analytics import (
+        PEAK_HOURS_MAX_AGE_SECONDS,
+        generate_peak_payload,
+        peak_hours_snapshot,
+    )
+
+    body = peak_hours_snapshot.get()
+    if body is None:
+        payload = generate_peak_payload(session, sections=("peak_forecast",))
+        body = peak_hours_snapshot.update(payload["peak_forecast"])
+    headers = {
+        "ETag": body.etag,
+        "Cache-Control": f"public, max-age={PEAK_HOURS_MAX_AGE_SECONDS}",
     }
+    if etag_matches(request.headers.get("if-none-match"), body.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(
+        content=body.content, media_type="application/json", headers=headers
+    )
 
 
 @app.post("/analytics/peak-forecast/run", response_model=PeakForecastResponse)
 def trigger_peak_forecast(
-    claims=Depends(get_current_user_claims), session: Session = Depends(get_session)
+    claims=Depends(get_current_user_claims),
+    session: Session = Depends(get_write_session),
 ):
     _ = claims
+    from .analytics import (
+        generate_peak_payload,
+        issue_peak_rewards,
+        list_recent_rewards,
+        peak_hours_snapshot,
+    )
+
+    from .forecasting import refresh_forecast
+
+    refresh_forecast(session)
     payload = generate_peak_payload(session)
-    rewards = issue_peak_rewards(session, payload["peak_forecast"])
+    peak_hours_snapshot.update(payload["peak_forecast"])
+    rewards = issue_peak_rewards(session)
     recent = list_recent_rewards(session)
     return {
         **payload,
@@ -309,6 +509,8 @@ def estimate_run_load(
         for order in (payload.orders or [])
     ) or "No orders yet."
 
+    import httpx  # deferred: only the AI paths need an HTTP client
+
     try:
         response = httpx.post(
             api_url,
@@ -360,27 +562,63 @@ def estimate_run_load(
         return {"assessment": default_assessment}
 
 
+async def _offload_hash(coro):
+    try:
+        return await coro
+    except HashPoolBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server busy, please retry",
+            headers={"Retry-After": "1"},
+        )
+
+
+def _get_user_by_email(session: Session, email: str) -> User | None:
+    return session.exec(select(User).where(User.email == email)).first()
+
+
+def _store_upgraded_hash(session: Session, user: User, new_hash: str) -> None:
+    # Best-effort: a failed upgrade just retries on the next login.
+    user.password_hash = new_hash
+    try:
+        session.commit()
+    except SQLAlchemyError:
+        session.rollback()
+
+
+def _save_new_user(session: Session, user: User) -> None:
+    session.add(user)
+    try:
+        session.commit()
+        session.refresh(user)
+    except IntegrityError:
+        session.rollback()
+        raise
+
+
+# register/login are async so requests waiting on the hash pool hold no
+# threadpool worker; the blocking DB calls are pushed to the threadpool.
 @app.post("/auth/register", response_model=AuthResponse)
-def register(payload: AuthRequest, session: Session = Depends(get_session)):
+async def register(
+    payload: AuthRequest, session: Session = Depends(get_write_session)
+):
     # Enforce NCSU email domain for registration
     if not str(payload.email).lower().endswith("@ncsu.edu"):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Only NCSU accounts are allowed to register/login",
         )
-    existing = session.exec(select(User).where(User.email == payload.email)).first()
+    existing = await run_in_threadpool(_get_user_by_email, session, payload.email)
     if existing:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT, detail="User already exists"
         )
 
-    user = User(email=payload.email, password_hash=get_password_hash(payload.password))
-    session.add(user)
+    password_hash = await _offload_hash(hash_password_async(payload.password))
+    user = User(email=payload.email, password_hash=password_hash)
     try:
-        session.commit()
-        session.refresh(user)
+        await run_in_threadpool(_save_new_user, session, user)
     except IntegrityError:
-        session.rollback()
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT, detail="User already exists"
         )
@@ -393,30 +631,38 @@ def register(payload: AuthRequest, session: Session = Depends(get_session)):
 
 
 @app.post("/auth/login", response_model=AuthResponse)
-def login(payload: AuthRequest, session: Session = Depends(get_session)):
+async def login(
+    payload: AuthRequest, session: Session = Depends(get_write_session)
+):
     # Enforce NCSU email domain for login
     if not str(payload.email).lower().endswith("@ncsu.edu"):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Only NCSU accounts are allowed to register/login",
         )
-    user = session.exec(select(User).where(User.email == payload.email)).first()
-    if not user or not verify_password(payload.password, user.password_hash):
+    user = await run_in_threadpool(_get_user_by_email, session, payload.email)
+    if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials"
         )
-    token = create_access_token(sub=user.id, email=user.email)
-    return {
-        "user": {"id": user.id, "username": user.email, "points": int(user.points)},
-        "token": token,
-    }
+    valid, upgraded_hash = await _offload_hash(
+        verify_and_update_async(payload.password, user.password_hash)
+    )
+    if not valid:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials"
+        )
+    # Read before the rehash commit expires ``user``: reloading it here would
+    # run a blocking SELECT on the event loop.
+    profile = {"id": user.id, "username": user.email, "points": int(user.points)}
+    if upgraded_hash:
+        await run_in_threadpool(_store_upgraded_hash, session, user, upgraded_hash)
+    token = create_access_token(sub=profile["id"], email=profile["username"])
+    return {"user": profile, "token": token}
 
 
 @app.get("/auth/me", response_model=UserOut)
-def me(
-    claims=Depends(get_current_user_claims), session: Session = Depends(get_session)
-):
-    user = session.exec(select(User).where(User.id == int(claims["sub"]))).first()
+def me(user: User | None = Depends(get_current_user)):
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not found")
     return {"id": user.id, "username": user.email, "points": user.points}
@@ -426,11 +672,12 @@ def me(
 def create_run(
     run: FoodRunCreate,
     claims=Depends(get_current_user_claims),
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_write_session),
 ):
     user_id = int(claims["sub"])
     food_run = FoodRun(**run.model_dump(), runner_id=user_id)
     food_run.status = normalize_status(food_run.status)
+    food_run.expires_at = run_expires_at(food_run.eta)
     session.add(food_run)
     session.commit()
     session.refresh(food_run)
@@ -451,49 +698,22 @@ def create_run(
         }
     )
     base["status"] = normalize_status(base.get("status"))
-    return {
+    response = {
         **base,
         "runner_username": claims.get("email", str(user_id)),
         "seats_remaining": seats_remaining,
         "orders": [],
     }
+    broker.publish("run_created", run=response)
+    return response
 
 
 @app.get("/runs", response_model=List[FoodRunResponse])
 def list_runs(
-    claims=Depends(get_current_user_claims), session: Session = Depends(get_session)
+    claims=Depends(get_current_user_claims),
+    session: Session = Depends(get_read_session),
 ):
-    runs = session.exec(select(FoodRun)).all()
-    # attach seats_remaining for each run
-    responses = []
-    for r in runs:
-        count = session.exec(
-            select(Order).where(Order.run_id == r.id, Order.status != "cancelled")
-        ).all()
-        seats_remaining = max(r.capacity - len(count), 0)
-        # fetch runner email
-        runner = session.get(User, r.runner_id)
-        base = r.model_dump(
-            include={
-                "id",
-                "runner_id",
-                "restaurant",
-                "drop_point",
-                "eta",
-                "capacity",
-                "status",
-            }
-        )
-        base["status"] = normalize_status(base.get("status"))
-        responses.append(
-            {
-                **base,
-                "runner_username": runner.email if runner else str(r.runner_id),
-                "seats_remaining": seats_remaining,
-                "orders": [],
-            }
-        )
-    return responses
+    return prebuilt_json(all_runs(session))
 
 
 @app.post("/runs/{run_id}/orders", response_model=OrderJoinResponse)
@@ -501,7 +721,8 @@ def create_order(
     run_id: int,
     order: OrderCreate,
     claims=Depends(get_current_user_claims),
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_write_session),
+    current_user: User | None = Depends(get_current_user_for_write),
 ):
     user_id = int(claims["sub"])
     food_run = session.get(FoodRun, run_id)
@@ -534,10 +755,31 @@ def create_order(
     order_row = Order(
         **{**order.model_dump(), "pin": pin}, run_id=run_id, user_id=user_id
     )
+    # Read before the commit expires the caller's row on this session.
+    user_email = current_user.email if current_user else str(user_id)
     session.add(order_row)
     session.commit()
     session.refresh(order_row)
-    u = session.get(User, user_id)
+    broker.publish(
+        "seats_changed",
+        run_id=run_id,
+        seats_remaining=max(food_run.capacity - len(current_count) - 1, 0),
+    )
+    broker.publish(
+        "order_joined",
+        visible_to={food_run.runner_id},
+        run_id=run_id,
+        runner_id=food_run.runner_id,
+        order={
+            "id": order_row.id,
+            "user_id": user_id,
+            "user_email": user_email,
+            "items": order_row.items,
+            "amount": order_row.amount,
+            "tip": float(order_row.tip or 0),
+            "status": order_row.status,
+        },
+    )
     return {
         "id": order_row.id,
         "run_id": order_row.run_id,
@@ -545,7 +787,7 @@ def create_order(
         "status": order_row.status,
         "items": order_row.items,
         "amount": order_row.amount,
-        "user_email": u.email if u else str(user_id),
+        "user_email": user_email,
         "tip": float(order_row.tip or 0),
         "pin": pin,
     }
@@ -557,7 +799,7 @@ def verify_order_pin(
     order_id: int,
     payload: PinVerifyRequest,
     claims=Depends(get_current_user_claims),
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_write_session),
 ):
     user_id = int(claims["sub"])
     run = session.get(FoodRun, run_id)
@@ -574,8 +816,16 @@ def verify_order_pin(
         raise HTTPException(status_code=400, detail="No PIN set for this order")
     if str(order.pin) != str(payload.pin):
         raise HTTPException(status_code=400, detail="Incorrect PIN")
+    joiner_id = order.user_id
     order.status = "delivered"
     session.commit()
+    broker.publish(
+        "order_delivered",
+        visible_to={joiner_id, user_id},
+        run_id=run_id,
+        runner_id=user_id,
+        order_id=order_id,
+    )
     return {"message": "PIN verified. Order marked delivered."}
 
 
@@ -583,7 +833,7 @@ def verify_order_pin(
 def cancel_my_order(
     run_id: int,
     claims=Depends(get_current_user_claims),
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_write_session),
 ):
     user_id = int(claims["sub"])
     ord = session.exec(
@@ -595,333 +845,165 @@ def cancel_my_order(
     ).first()
     if not ord:
         raise HTTPException(status_code=404, detail="No active order to cancel")
+    order_id = ord.id
     ord.status = "cancelled"
     session.commit()
+    run = session.get(FoodRun, run_id)
+    if run:
+        broker.publish(
+            "seats_changed",
+            run_id=run_id,
+            seats_remaining=live_seats_remaining(session, run),
+        )
+        broker.publish(
+            "order_cancelled",
+            visible_to={run.runner_id, user_id},
+            run_id=run_id,
+            runner_id=run.runner_id,
+            order_id=order_id,
+            by="joiner",
+        )
     return {"message": "Order cancelled"}
 
 
-@app.get("/runs/available", response_model=List[FoodRunResponse])
+@app.get(
+    "/runs/available",
+    response_model=List[FoodRunResponse],
+    dependencies=[Depends(conditional_get("foodrun", "order", per_user=True))],
+)
 def list_available_runs(
-    claims=Depends(get_current_user_claims), session: Session = Depends(get_session)
+    response: Response,
+    claims=Depends(get_current_user_claims),
+    session: Session = Depends(get_read_session),
 ):
-    user_id = int(claims["sub"])
-    runs = session.exec(select(FoodRun).where(FoodRun.runner_id != user_id)).all()
-    responses = []
-    for r in runs:
-        if not is_active_status(r.status):
-            continue
-        count = session.exec(
-            select(Order).where(Order.run_id == r.id, Order.status != "cancelled")
-        ).all()
-        seats_remaining = max(r.capacity - len(count), 0)
-        if seats_remaining > 0:
-            runner = session.get(User, r.runner_id)
-            base = r.model_dump(
-                include={
-                    "id",
-                    "runner_id",
-                    "restaurant",
-                    "drop_point",
-                    "eta",
-                    "capacity",
-                    "status",
-                }
-            )
-            base["status"] = normalize_status(base.get("status"))
-            responses.append(
-                {
-                    **base,
-                    "runner_username": runner.email if runner else str(r.runner_id),
-                    "seats_remaining": seats_remaining,
-                    "orders": [],
-                }
-            )
-    return responses
+    return prebuilt_json(available_runs(session, int(claims["sub"])), response)
 
 
-@app.get("/runs/mine", response_model=List[FoodRunResponse])
+@app.get(
+    "/runs/mine",
+    response_model=List[FoodRunResponse],
+    dependencies=[Depends(conditional_get("foodrun", "order", per_user=True))],
+)
 def list_my_runs(
-    claims=Depends(get_current_user_claims), session: Session = Depends(get_session)
+    response: Response,
+    claims=Depends(get_current_user_claims),
+    session: Session = Depends(get_read_session),
+    runner: User | None = Depends(get_current_user),
 ):
     user_id = int(claims["sub"])
-    runs = session.exec(select(FoodRun).where(FoodRun.runner_id == user_id)).all()
-    responses = []
-    for r in runs:
-        if not is_active_status(r.status):
-            continue
-        orders = session.exec(
-            select(Order).where(Order.run_id == r.id, Order.status != "cancelled")
-        ).all()
-        seats_remaining = max(r.capacity - len(orders), 0)
-        runner = session.get(User, r.runner_id)
-        # build orders payload with user emails
-        order_payload = []
-        for o in orders:
-            u = session.get(User, o.user_id)
-            order_payload.append(
-                {
-                    "id": o.id,
-                    "run_id": o.run_id,
-                    "user_id": o.user_id,
-                    "status": o.status,
-                    "items": o.items,
-                    "amount": o.amount,
-                    "tip": float(o.tip or 0),
-                    "user_email": u.email if u else str(o.user_id),
-                }
+    runner_email = runner.email if runner else str(user_id)
+    runs = load_runs_with_orders(
+        session, FoodRun.runner_id == user_id, active_status_clause()
+    )
+    return prebuilt_json(
+        [
+            runner_run_payload(
+                r, runner_email, max((r.capacity or 0) - len(r.orders), 0)
             )
-        base = r.model_dump(
-            include={
-                "id",
-                "runner_id",
-                "restaurant",
-                "drop_point",
-                "eta",
-                "capacity",
-                "status",
-            }
-        )
-        base["status"] = normalize_status(base.get("status"))
-        responses.append(
-            {
-                **base,
-                "runner_username": runner.email if runner else str(r.runner_id),
-                "seats_remaining": seats_remaining,
-                "orders": order_payload,
-            }
-        )
-    return responses
+            for r in runs
+        ],
+        response,
+    )
 
 
 @app.get("/runs/id/{run_id}", response_model=FoodRunResponse)
 def get_run_details(
     run_id: int,
     claims=Depends(get_current_user_claims),
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_read_session),
+    runner: User | None = Depends(get_current_user),
 ):
     user_id = int(claims["sub"])
-    run = session.get(FoodRun, run_id)
-    if not run:
+    runs = load_runs_with_orders(session, FoodRun.id == run_id)
+    if not runs:
         raise HTTPException(status_code=404, detail="Run not found")
+    run = runs[0]
     if run.runner_id != user_id:
         raise HTTPException(status_code=403, detail="Not authorized")
-
-    orders = session.exec(
-        select(Order).where(Order.run_id == run.id, Order.status != "cancelled")
-    ).all()
-    seats_remaining = max(run.capacity - len(orders), 0)
-    runner = session.get(User, run.runner_id)
-
-    order_payload = []
-    for o in orders:
-        u = session.get(User, o.user_id)
-        order_payload.append(
-            {
-                "id": o.id,
-                "run_id": o.run_id,
-                "user_id": o.user_id,
-                "status": o.status,
-                "items": o.items,
-                "amount": o.amount,
-                "tip": float(o.tip or 0),
-                "user_email": u.email if u else str(o.user_id),
-            }
-        )
-
-    base = run.model_dump(
-        include={
-            "id",
-            "runner_id",
-            "restaurant",
-            "drop_point",
-            "eta",
-            "capacity",
-            "status",
-        }
+    return runner_run_payload(
+        run,
+        runner.email if runner else str(run.runner_id),
+        max((run.capacity or 0) - len(run.orders), 0),
     )
-    base["status"] = normalize_status(base.get("status"))
-    return {
-        **base,
-        "runner_username": runner.email if runner else str(run.runner_id),
-        "seats_remaining": seats_remaining,
-        "orders": order_payload,
-    }
 
 
-@app.get("/runs/joined", response_model=List[JoinedRunResponse])
+@app.get(
+    "/runs/joined",
+    response_model=List[JoinedRunResponse],
+    dependencies=[Depends(conditional_get("foodrun", "order", per_user=True))],
+)
 def list_joined_runs(
-    claims=Depends(get_current_user_claims), session: Session = Depends(get_session)
+    claims=Depends(get_current_user_claims),
+    session: Session = Depends(get_read_session),
 ):
-    user_id = int(claims["sub"])
-    # Find runs that have a non-cancelled order by this user
-    stmt = (
-        select(Order.run_id)
-        .where(
-            Order.user_id == user_id,
-            Order.status != "cancelled",
-        )
-        .distinct()
-    )
-    # Some SQLModel/SQLAlchemy versions return scalars directly; others return 1-tuples.
-    rows = session.exec(stmt).all()
-    run_ids = [row[0] if isinstance(row, (list, tuple)) else row for row in rows]
-    if not run_ids:
-        return []
-    runs = session.exec(
-        select(FoodRun).where(FoodRun.id.in_(run_ids))
-    ).all()
-    responses = []
-    for r in runs:
-        if not is_active_status(r.status):
-            continue
-        count = session.exec(
-            select(Order).where(Order.run_id == r.id, Order.status != "cancelled")
-        ).all()
-        cap = r.capacity or 0
-        seats_remaining = max(cap - len(count), 0)
-        runner = session.get(User, r.runner_id)
-        # find my order for this run (expose pin to the owner of the order only)
-        mine = session.exec(
-            select(Order).where(
-                Order.run_id == r.id,
-                Order.user_id == user_id,
-                Order.status != "cancelled",
+    return joined_runs(session, int(claims["sub"]))
+
+
+def _stream_my_runs_history(user_id: int, runner_email: str):
+    with Session(read_engine, autoflush=False) as session:
+        live = (
+            runner_run_payload(run, runner_email, 0)
+            for run in iter_runs_with_orders(
+                session,
+                FoodRun.runner_id == user_id,
+                ~active_status_clause(),
+                live_orders_only=False,
+                newest_first=True,
             )
-        ).first()
-        # Build explicit payload to avoid any None values breaking response validation
-        payload = {
-            "id": r.id,
-            "runner_id": r.runner_id,
-            "restaurant": r.restaurant or "",
-            "drop_point": r.drop_point or "",
-            "eta": r.eta or "",
-            "capacity": cap,
-            "status": normalize_status(r.status),
-            "runner_username": runner.email if runner else str(r.runner_id),
-            "seats_remaining": seats_remaining,
-            "orders": [],
-        }
-        if mine:
-            payload["my_order"] = {
-                "id": mine.id,
-                "run_id": mine.run_id,
-                "items": mine.items,
-                "amount": mine.amount,
-                "status": mine.status,
-                "pin": mine.pin or "",
-                "tip": float(mine.tip or 0),
-            }
-        responses.append(payload)
-    return responses
+        )
+        yield from newest_first(
+            live, iter_archived_runner_runs(session, user_id, runner_email)
+        )
+
+
+def _stream_joined_runs_history(user_id: int):
+    with Session(read_engine, autoflush=False) as session:
+        yield from iter_joined_runs_history(session, user_id)
 
 
 @app.get("/runs/mine/history", response_model=List[FoodRunResponse])
 def list_my_runs_history(
-    claims=Depends(get_current_user_claims), session: Session = Depends(get_session)
+    request: Request,
+    claims=Depends(get_current_user_claims),
+    session: Session = Depends(get_read_session),
+    runner: User | None = Depends(get_current_user),
 ):
+    """Finished runs, live and archived, newest first.
+
+    With ``Accept: application/x-ndjson`` the runs are streamed one per line
+    from a batched cursor instead of being built into one JSON array.
+    """
     user_id = int(claims["sub"])
-    runs = session.exec(select(FoodRun).where(FoodRun.runner_id == user_id)).all()
-    responses = []
-    for r in runs:
-        if is_active_status(r.status):
-            continue
-        orders = session.exec(select(Order).where(Order.run_id == r.id)).all()
-        runner = session.get(User, r.runner_id)
-        order_payload = []
-        for o in orders:
-            u = session.get(User, o.user_id)
-            order_payload.append(
-                {
-                    "id": o.id,
-                    "run_id": o.run_id,
-                    "user_id": o.user_id,
-                    "status": o.status,
-                    "items": o.items,
-                    "amount": o.amount,
-                    "tip": float(o.tip or 0),
-                    "user_email": u.email if u else str(o.user_id),
-                }
+    runner_email = runner.email if runner else str(user_id)
+    if wants_ndjson(request):
+        return ndjson_response(_stream_my_runs_history(user_id, runner_email))
+    runs = load_runs_with_orders(
+        session,
+        FoodRun.runner_id == user_id,
+        ~active_status_clause(),
+        live_orders_only=False,
+        newest_first=True,
+    )
+    return prebuilt_json(
+        list(
+            newest_first(
+                [runner_run_payload(r, runner_email, 0) for r in runs],
+                archived_runner_runs(session, user_id, runner_email),
             )
-        base = r.model_dump(
-            include={
-                "id",
-                "runner_id",
-                "restaurant",
-                "drop_point",
-                "eta",
-                "capacity",
-                "status",
-            }
-        )
-        base["status"] = normalize_status(base.get("status"))
-        responses.append(
-            {
-                **base,
-                "runner_username": runner.email if runner else str(r.runner_id),
-                "seats_remaining": 0,
-                "orders": order_payload,
-            }
         )
-    responses.sort(key=lambda r: r["id"], reverse=True)
-    return responses
+    )
 
 
 @app.get("/runs/joined/history", response_model=List[JoinedRunResponse])
 def list_joined_runs_history(
-    claims=Depends(get_current_user_claims), session: Session = Depends(get_session)
+    request: Request,
+    claims=Depends(get_current_user_claims),
+    session: Session = Depends(get_read_session),
 ):
-    user_id = int(claims["sub"])
-    stmt = select(Order.run_id).where(Order.user_id == user_id).distinct()
-    rows = session.exec(stmt).all()
-    run_ids = [row[0] if isinstance(row, (list, tuple)) else row for row in rows]
-    if not run_ids:
-        return []
-    runs = session.exec(
-        select(FoodRun).where(FoodRun.id.in_(run_ids))
-    ).all()
-    responses = []
-    for r in runs:
-        if is_active_status(r.status):
-            continue
-        runner = session.get(User, r.runner_id)
-        # include my_order for historical reference
-        mine = session.exec(
-            select(Order).where(
-                Order.run_id == r.id,
-                Order.user_id == user_id,
-            )
-        ).first()
-        base = r.model_dump(
-            include={
-                "id",
-                "runner_id",
-                "restaurant",
-                "drop_point",
-                "eta",
-                "capacity",
-                "status",
-            }
-        )
-        payload = {
-            **base,
-            "runner_username": runner.email if runner else str(r.runner_id),
-            "seats_remaining": 0,
-            "orders": [],
-        }
-        payload["status"] = normalize_status(payload.get("status"))
-        if mine:
-            payload["my_order"] = {
-                "id": mine.id,
-                "run_id": mine.run_id,
-                "items": mine.items,
-                "amount": mine.amount,
-                "status": mine.status,
-                "pin": (mine.pin or ""),
-                "tip": float(mine.tip or 0),
-            }
-        responses.append(payload)
-    responses.sort(key=lambda r: r["id"], reverse=True)
-    return responses
+    """Finished runs the caller ordered in, newest first; NDJSON as above."""
+    if wants_ndjson(request):
+        return ndjson_response(_stream_joined_runs_history(int(claims["sub"])))
+    return joined_runs_history(session, int(claims["sub"]))
 
 
 @app.delete("/runs/{run_id}/orders/{order_id}")
@@ -929,7 +1011,7 @@ def runner_remove_order(
     run_id: int,
     order_id: int,
     claims=Depends(get_current_user_claims),
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_write_session),
 ):
     user_id = int(claims["sub"])
     run = session.get(FoodRun, run_id)
@@ -942,8 +1024,22 @@ def runner_remove_order(
     ord = session.get(Order, order_id)
     if not ord or ord.run_id != run_id or ord.status == "cancelled":
         raise HTTPException(status_code=404, detail="Order not found")
+    joiner_id = ord.user_id
     ord.status = "cancelled"
     session.commit()
+    broker.publish(
+        "seats_changed",
+        run_id=run_id,
+        seats_remaining=live_seats_remaining(session, run),
+    )
+    broker.publish(
+        "order_cancelled",
+        visible_to={user_id, joiner_id},
+        run_id=run_id,
+        runner_id=user_id,
+        order_id=order_id,
+        by="runner",
+    )
     return {"message": "Order removed"}
 
 
@@ -951,7 +1047,7 @@ def runner_remove_order(
 def complete_run(
     run_id: int,
     claims=Depends(get_current_user_claims),
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_write_session),
 ):
     user_id = int(claims["sub"])
     food_run = session.get(FoodRun, run_id)
@@ -966,51 +1062,26 @@ def complete_run(
     earned_points = round(
         total_amount / 10
     )  # 1 point per $10, rounded to nearest integer
-    peak_bonus = 0
-    peak_window = None
-    run_created = food_run.created_at
-    if run_created:
-        if isinstance(run_created, datetime):
-            created_dt = run_created
-        else:
-            created_dt = None
-            for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S.%f"):
-                try:
-                    created_dt = datetime.strptime(run_created, fmt)
-                    break
-                except ValueError:
-                    continue
-        if created_dt:
-            payload = generate_peak_payload(session)
-            peak_hours = {int(entry["hour"]) for entry in payload.get("peak_forecast", []) if "hour" in entry}
-            if created_dt.hour in peak_hours:
-                peak_bonus = PEAK_BONUS_POINTS
-                peak_window = created_dt.strftime("%Y-%m-%d %H:00")
 
     # Update run status
     food_run.status = normalize_status("completed")
 
     # Update runner's points
     runner = session.get(User, user_id)
-    runner.points += earned_points + peak_bonus
-
-    if peak_bonus and peak_window:
-        reward = RunnerReward(
-            runner_id=user_id,
-            run_id=run_id,
-            points=peak_bonus,
-            reason=f"Peak hour bonus ({peak_window})",
-        )
-        session.add(reward)
+    runner.points += earned_points
 
+    # The peak-hour bonus and forecast refresh run off the request path; the
+    # jobs commit with the run, so a crash cannot lose them.
+    enqueue(session, "peak_bonus", {"run_id": run_id})
+    enqueue(session, "forecast_refresh", unique=True)
     session.commit()
-    if peak_bonus:
-        session.refresh(reward)
+    broker.publish("run_completed", run_id=run_id)
     return {
         "message": "Run completed",
-        "points_earned": earned_points + peak_bonus,
+        "points_earned": earned_points,
         "base_points": earned_points,
-        "peak_bonus_points": peak_bonus,
+        "peak_bonus_points": 0,
+        "peak_bonus_pending": True,
     }
 
 
@@ -1018,7 +1089,7 @@ def complete_run(
 def cancel_run(
     run_id: int,
     claims=Depends(get_current_user_claims),
-    session: Session = Depends(get_session),
+    session: Session = Depends(get_write_session),
 ):
     user_id = int(claims["sub"])
     food_run = session.get(FoodRun, run_id)
@@ -1030,25 +1101,69 @@ def cancel_run(
         raise HTTPException(status_code=400, detail="Run is not active")
     food_run.status = normalize_status("cancelled")
     session.commit()
+    broker.publish("run_cancelled", run_id=run_id)
     return {"message": "Run cancelled"}
 
 
 @app.get("/points", response_model=PointsResponse)
-def get_points(
-    claims=Depends(get_current_user_claims), session: Session = Depends(get_session)
-):
-    user_id = int(claims["sub"])
-    user = session.get(User, user_id)
+def get_points(user: User | None = Depends(get_current_user)):
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    points_value = int((user.points // 10) * 5)  # $5 per 10 points, ensuring integer
-    return {"points": int(user.points), "points_value": points_value}
+    return points_summary(user.points)
+
+
+FEED_SECTIONS = ("available", "joined", "points", "peak_hours")
+
+
+@app.get("/feed", response_model=FeedResponse, response_model_exclude_unset=True)
+def get_feed(
+    claims=Depends(get_current_user_claims),
+    session: Session = Depends(get_read_session),
+    sections: Optional[str] = None,
+):
+    """Landing-page data in one round trip: one token decode, one session.
+
+    ``sections`` (comma-separated, default all) picks from available, joined,
+    points and peak_hours. The full feed costs five SQL statements
+    however many runs there are; peak_hours comes from the forecast snapshot.
+    """
+    user_id = int(claims["sub"])
+    if sections is None:
+        wanted = set(FEED_SECTIONS)
+    else:
+        wanted = {part.strip() for part in sections.split(",") if part.strip()}
+        unknown = wanted - set(FEED_SECTIONS)
+        if unknown:
+            raise HTTPException(
+                status_code=422,
+                detail=f"Unknown feed section(s): {', '.join(sorted(unknown))}",
+            )
+    feed: dict = {}
+    if "available" in wanted:
+        feed["available"] = available_runs(session, user_id)
+    if "joined" in wanted:
+        feed["joined"] = joined_runs(session, user_id)
+    if "points" in wanted:
+        user = session.get(User, user_id)
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        feed["points"] = points_summary(user.points)
+    if "peak_hours" in wanted:
+        from .analytics import generate_peak_payload, peak_hours_snapshot
+
+        body = peak_hours_snapshot.get()
+        if body is None:
+            payload = generate_peak_payload(session, sections=("peak_forecast",))
+            body = peak_hours_snapshot.update(payload["peak_forecast"])
+        feed["peak_hours"] = body.windows
+    return prebuilt_json(feed)
 
 
 @app.post("/points/redeem")
 def redeem_points(
-    claims=Depends(get_current_user_claims), session: Session = Depends(get_session)
+    claims=Depends(get_current_user_claims),
+    session: Session = Depends(get_write_session),
 ):
     user_id = int(claims["sub"])
     user = session.get(User, user_id)
@@ -1,6 +1,7 @@
-from typing import Optional
-from sqlmodel import SQLModel, Field
-from sqlalchemy import Column, String, DateTime, text
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import BigInteger, Column, String, DateTime, Index, Table, event, text
 
 
 class User(SQLModel, table=True):
@@ -18,22 +19,41 @@ class User(SQLModel, table=True):
 
 
 class FoodRun(SQLModel, table=True):
+    # The expiry sweeper seeks status='active' AND expires_at <= now.
+    __table_args__ = (Index("ix_foodrun_status_expires_at", "status", "expires_at"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     runner_id: int = Field(foreign_key="user.id")
     restaurant: str
     drop_point: str
     eta: str
     capacity: int = Field(default=5)  # maximum number of joiners/orders
-    status: str = Field(default="active")  # active, completed, cancelled
+    status: str = Field(default="active")  # active, completed, cancelled, expired
     description: Optional[str] = Field(
         default=None, sa_column=Column(String, nullable=True)
     )
-    created_at: Optional[str] = Field(
+    created_at: Optional[datetime] = Field(
         default=None,
         sa_column=Column(
             DateTime(timezone=True), server_default=text("CURRENT_TIMESTAMP")
         ),
     )
+    # Derived from created_at on insert (see stamp_created) so analytics and
+    # reward scans filter on indexed integers instead of parsing timestamps.
+    created_epoch: Optional[int] = Field(
+        default=None, sa_column=Column(BigInteger, index=True)
+    )
+    created_hour: Optional[int] = Field(default=None, index=True)  # 0-23 UTC
+    created_weekday: Optional[int] = Field(default=None, index=True)  # 0 = Sunday
+    # UTC deadline parsed from ``eta`` (see app/expiry.py).
+    expires_at: Optional[datetime] = Field(
+        default=None, sa_column=Column(DateTime(timezone=True), nullable=True)
+    )
+
+    # Lazy by default; list views opt into batched selectin loading
+    # (see queries.load_runs_with_orders).
+    runner: Optional["User"] = Relationship()
+    orders: List["Order"] = Relationship(back_populates="run")
 
 
 class Order(SQLModel, table=True):
@@ -45,15 +65,27 @@ class Order(SQLModel, table=True):
     tip: float = Field(default=0.0)
     status: str = Field(default="pending")  # pending, paid, delivered
     pin: Optional[str] = None  # 4-digit PIN for order pickup verification
-    created_at: Optional[str] = Field(
+    created_at: Optional[datetime] = Field(
         default=None,
         sa_column=Column(
             DateTime(timezone=True), server_default=text("CURRENT_TIMESTAMP")
         ),
     )
+    created_epoch: Optional[int] = Field(
+        default=None, sa_column=Column(BigInteger, index=True)
+    )
+    created_hour: Optional[int] = Field(default=None, index=True)
+    created_weekday: Optional[int] = Field(default=None, index=True)
+
+    run: Optional[FoodRun] = Relationship(back_populates="orders")
+    user: Optional["User"] = Relationship()
 
 
 class RunnerReward(SQLModel, table=True):
+    # At most one bonus per run; grants insert with ON CONFLICT DO NOTHING
+    # (see analytics.grant_reward), so a repeated job cannot pay twice.
+    __table_args__ = (Index("ux_runnerreward_run_id", "run_id", unique=True),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     runner_id: int = Field(foreign_key="user.id")
     run_id: int = Field(foreign_key="foodrun.id")
@@ -65,3 +97,120 @@ class RunnerReward(SQLModel, table=True):
             DateTime(timezone=True), server_default=text("CURRENT_TIMESTAMP")
         ),
     )
+
+
+class ChangeCounter(SQLModel, table=True):
+    # Bumped in the same transaction as any ORM write to ``table_name``; see
+    # app/changes.py. Drives ETags without hashing response bodies.
+    table_name: str = Field(primary_key=True)
+    version: int = Field(default=0)
+
+
+# Doubles as the optimistic-lock column: a refresh that lost a race to another
+# worker fails its UPDATE ... WHERE through_hour = <old> instead of folding an
+# hour twice. See app/forecasting.py.
+_forecast_through_hour = Column("through_hour", BigInteger, nullable=False)
+
+
+class ForecastCell(SQLModel, table=True):
+    """Smoothed demand for one UTC (weekday, hour) slot of the week."""
+
+    __mapper_args__ = {
+        "version_id_col": _forecast_through_hour,
+        "version_id_generator": False,
+    }
+
+    weekday: int = Field(primary_key=True)  # 0 = Sunday, as created_weekday
+    hour: int = Field(primary_key=True)
+    orders: float = Field(default=0.0)
+    runs: float = Field(default=0.0)
+    capacity: float = Field(default=0.0)
+    observations: int = Field(default=0)
+    # Hour index (epoch // 3600) of the last hour folded into this cell.
+    through_hour: int = Field(sa_column=_forecast_through_hour)
+
+
+class QueuedJob(SQLModel, table=True):
+    """Deferred side effect; see app/jobqueue.py. Times are epoch seconds."""
+
+    __tablename__ = "jobqueue"
+    # Workers seek claimable rows: status = 'queued' AND run_after <= now.
+    __table_args__ = (Index("ix_jobqueue_status_run_after", "status", "run_after"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    kind: str
+    payload: str = Field(default="{}")  # JSON
+    status: str = Field(default="queued")  # queued | leased | dead
+    attempts: int = Field(default=0)
+    max_attempts: int = Field(default=5)
+    run_after: float
+    lease_until: Optional[float] = None
+    lease_token: Optional[str] = None
+    last_error: Optional[str] = None
+    created_at: float
+
+
+def created_parts(value: datetime) -> Tuple[int, int, int]:
+    """(epoch seconds, hour 0-23, weekday 0 = Sunday) in UTC.
+
+    Naive values are UTC, as SQLite stores them. The weekday numbering
+    matches SQLite's strftime('%w') and PostgreSQL's EXTRACT(DOW).
+    """
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    value = value.astimezone(timezone.utc)
+    return int(value.timestamp()), value.hour, (value.weekday() + 1) % 7
+
+
+@event.listens_for(FoodRun, "before_insert")
+@event.listens_for(Order, "before_insert")
+def stamp_created(mapper, connection, target) -> None:
+    # Set created_at here rather than leaving it to the server default, so the
+    # derived columns are written in the same INSERT.
+    if target.created_at is None:
+        target.created_at = datetime.now(timezone.utc)
+    (
+        target.created_epoch,
+        target.created_hour,
+        target.created_weekday,
+    ) = created_parts(target.created_at)
+
+
+def _archive_table(model, *indexes: Index) -> Table:
+    """Same columns as ``model`` (no foreign keys, ids copied verbatim)."""
+    columns = [
+        Column(
+            col.name,
+            col.type,
+            primary_key=col.primary_key,
+            nullable=col.nullable,
+            autoincrement=False,
+        )
+        for col in model.__table__.columns
+    ]
+    return Table(
+        f"{model.__tablename__}_archive",
+        SQLModel.metadata,
+        *columns,
+        Column(
+            "archived_at",
+            DateTime(timezone=True),
+            server_default=text("CURRENT_TIMESTAMP"),
+        ),
+        *indexes,
+    )
+
+
+# Cold storage for finished runs, filled by app/archive.py. Hot endpoints only
+# touch the live tables; history and analytics read both.
+foodrun_archive = _archive_table(
+    FoodRun, Index("ix_foodrun_archive_runner_id", "runner_id")
+)
+order_archive = _archive_table(
+    Order,
+    Index("ix_order_archive_user_id", "user_id"),
+    Index("ix_order_archive_run_id", "run_id"),
+)
+runnerreward_archive = _archive_table(
+    RunnerReward, Index("ix_runnerreward_archive_awarded_at", "awarded_at")
+)
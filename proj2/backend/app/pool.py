@@ -0,0 +1,149 @@
+"""
+Connection pool configuration and instrumentation.
+
+Pool sizing comes from env so it can be tuned against the Starlette threadpool
+(40 threads by default) without code changes. ``InstrumentedQueuePool`` records
+how long callers wait for a connection and how often the pool overflows.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Any, Dict
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+
+def _env_int(name: str, fallback: str | None, default: int) -> int:
+    value = os.getenv(name)
+    if value is None and fallback:
+        value = os.getenv(fallback)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_bool(name: str, fallback: str | None, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None and fallback:
+        value = os.getenv(fallback)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def pool_settings(prefix: str = "DB_") -> Dict[str, Any]:
+    """Pool kwargs for ``create_engine``; ``DB_READ_*`` falls back to ``DB_*``."""
+    fallback = "DB_" if prefix != "DB_" else None
+
+    def key(name: str) -> str | None:
+        return f"{fallback}{name}" if fallback else None
+
+    return {
+        "pool_size": _env_int(f"{prefix}POOL_SIZE", key("POOL_SIZE"), 5),
+        "max_overflow": _env_int(f"{prefix}MAX_OVERFLOW", key("MAX_OVERFLOW"), 10),
+        "pool_timeout": _env_int(f"{prefix}POOL_TIMEOUT", key("POOL_TIMEOUT"), 30),
+        "pool_recycle": _env_int(f"{prefix}POOL_RECYCLE", key("POOL_RECYCLE"), -1),
+        "pool_pre_ping": _env_bool(
+            f"{prefix}POOL_PRE_PING", key("POOL_PRE_PING"), False
+        ),
+    }
+
+
+def supports_pool_sizing(url: str) -> bool:
+    # In-memory SQLite uses a SingletonThreadPool that rejects size/overflow args.
+    if not url.startswith("sqlite"):
+        return True
+    return ":memory:" not in url and "mode=memory" not in url and url not in (
+        "sqlite://",
+        "sqlite:///",
+    )
+
+
+class PoolStats:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.overflow_checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record_checkout(self, wait: float, overflowed: bool) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            if overflowed:
+                self.overflow_checkouts += 1
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            avg = self.total_wait / self.checkouts if self.checkouts else 0.0
+            return {
+                "checkouts": self.checkouts,
+                "overflow_checkouts": self.overflow_checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(avg * 1000, 3),
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        before = self.overflow()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.record_timeout()
+            raise
+        # Only a checkout that opened a connection beyond pool_size raises
+        # the overflow count; reusing a pooled one while others overflow
+        # does not.
+        after = self.overflow()
+        self.stats.record_checkout(
+            time.perf_counter() - started, after > before and after > 0
+        )
+        return conn
+
+    def recreate(self) -> "InstrumentedQueuePool":
+        # engine.dispose() swaps in a fresh pool; keep the counters continuous.
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+def engine_kwargs(url: str, prefix: str = "DB_") -> Dict[str, Any]:
+    if not supports_pool_sizing(url):
+        return {}
+    return {"poolclass": InstrumentedQueuePool, **pool_settings(prefix)}
+
+
+def describe_pool(engine) -> Dict[str, Any]:
+    pool = engine.pool
+    info: Dict[str, Any] = {"class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        info.update(
+            {
+                "size": pool.size(),
+                "in_use": pool.checkedout(),
+                "idle": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "max_overflow": pool._max_overflow,
+                "timeout": pool.timeout(),
+            }
+        )
+    stats = getattr(pool, "stats", None)
+    if stats is not None:
+        info.update(stats.snapshot())
+    return info
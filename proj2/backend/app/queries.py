@@ -0,0 +1,480 @@
+"""
+Batched read queries shared by the run list endpoints and ``/feed``.
+
+Each loader issues a fixed number of statements however many runs it returns:
+the runs themselves, then one grouped seat count and one runner-email lookup
+keyed by ``IN (...)``, instead of two or three queries per run. The joined
+views go further and fold everything into a single JOIN.
+
+Loaders select only the columns a response needs into small named tuples
+(``RunRow``, ``MyOrderRow``) rather than full ORM entities, so large lists
+skip the identity map and never read ``password_hash``, ``description`` or
+other users' PINs.
+
+History views also read the archive tables (see archive.py): each source is
+queried newest-first and the streams are merged by id, so archived runs
+appear exactly where they would have had they stayed live.
+"""
+
+from __future__ import annotations
+
+import heapq
+import os
+from operator import itemgetter
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+from sqlalchemy import func, literal
+from sqlalchemy.orm import aliased, load_only, selectinload
+from sqlmodel import Session, select
+
+from .models import FoodRun, Order, User, foodrun_archive, order_archive
+
+ACTIVE_STATUS = "active"
+# Rows fetched per round trip when a history endpoint streams NDJSON.
+HISTORY_STREAM_BATCH = int(os.getenv("HISTORY_STREAM_BATCH", "200"))
+
+
+def normalize_status(value: str | None) -> str:
+    cleaned = (value or "").strip().lower()
+    return cleaned or ACTIVE_STATUS
+
+
+def is_active_status(value: str | None) -> bool:
+    return normalize_status(value) == ACTIVE_STATUS
+
+
+def active_status_expr():
+    return func.lower(func.trim(FoodRun.status))
+
+
+def active_status_clause():
+    """SQL twin of ``is_active_status``: NULL or blank status counts as active."""
+    return (
+        func.coalesce(func.nullif(active_status_expr(), ""), ACTIVE_STATUS)
+        == ACTIVE_STATUS
+    )
+
+
+class RunRow(NamedTuple):
+    id: int
+    runner_id: int
+    restaurant: Optional[str]
+    drop_point: Optional[str]
+    eta: Optional[str]
+    capacity: Optional[int]
+    status: Optional[str]
+
+
+RUN_ROW_COLUMNS = (
+    FoodRun.id,
+    FoodRun.runner_id,
+    FoodRun.restaurant,
+    FoodRun.drop_point,
+    FoodRun.eta,
+    FoodRun.capacity,
+    FoodRun.status,
+)
+
+
+class MyOrderRow(NamedTuple):
+    id: int
+    run_id: int
+    items: str
+    amount: float
+    status: str
+    pin: Optional[str]
+    tip: Optional[float]
+
+
+MY_ORDER_COLUMNS = (
+    Order.id,
+    Order.run_id,
+    Order.items,
+    Order.amount,
+    Order.status,
+    Order.pin,
+    Order.tip,
+)
+
+
+def select_run_rows(session: Session, *criteria) -> List[RunRow]:
+    stmt = select(*RUN_ROW_COLUMNS).where(*criteria).order_by(FoodRun.id)
+    return [RunRow(*row) for row in session.exec(stmt).all()]
+
+
+def live_seats_remaining(session: Session, run: FoodRun) -> int:
+    taken = session.exec(
+        select(func.count())
+        .select_from(Order)
+        .where(Order.run_id == run.id, Order.status != "cancelled")
+    ).one()
+    return max((run.capacity or 0) - int(taken), 0)
+
+
+def taken_seats(session: Session, run_ids: Iterable[int]) -> Dict[int, int]:
+    """Non-cancelled order count per run, in one grouped query."""
+    ids = list(run_ids)
+    if not ids:
+        return {}
+    rows = session.exec(
+        select(Order.run_id, func.count())
+        .where(Order.run_id.in_(ids), Order.status != "cancelled")
+        .group_by(Order.run_id)
+    ).all()
+    return {run_id: int(count) for run_id, count in rows}
+
+
+def user_emails(session: Session, user_ids: Iterable[int]) -> Dict[int, str]:
+    ids = list(set(user_ids))
+    if not ids:
+        return {}
+    rows = session.exec(select(User.id, User.email).where(User.id.in_(ids))).all()
+    return {user_id: email for user_id, email in rows}
+
+
+def _run_payload(
+    run: RunRow, seats_remaining: int, emails: Dict[int, str]
+) -> Dict[str, Any]:
+    return {
+        "id": run.id,
+        "runner_id": run.runner_id,
+        "restaurant": run.restaurant or "",
+        "drop_point": run.drop_point or "",
+        "eta": run.eta or "",
+        "capacity": run.capacity or 0,
+        "status": normalize_status(run.status),
+        "runner_username": emails.get(run.runner_id, str(run.runner_id)),
+        "seats_remaining": seats_remaining,
+        "orders": [],
+    }
+
+
+def all_runs(session: Session) -> List[Dict[str, Any]]:
+    """Every run with its live seat count (3 statements)."""
+    runs = select_run_rows(session)
+    taken = taken_seats(session, (run.id for run in runs))
+    emails = user_emails(session, (run.runner_id for run in runs))
+    return [
+        _run_payload(run, max((run.capacity or 0) - taken.get(run.id, 0), 0), emails)
+        for run in runs
+    ]
+
+
+def available_runs(session: Session, user_id: int) -> List[Dict[str, Any]]:
+    """Other users' active runs with seats left (3 statements)."""
+    runs = select_run_rows(
+        session, FoodRun.runner_id != user_id, active_status_clause()
+    )
+    taken = taken_seats(session, (run.id for run in runs))
+    open_runs = [
+        (run, max((run.capacity or 0) - taken.get(run.id, 0), 0)) for run in runs
+    ]
+    open_runs = [(run, seats) for run, seats in open_runs if seats > 0]
+    emails = user_emails(session, (run.runner_id for run, _ in open_runs))
+    return [_run_payload(run, seats, emails) for run, seats in open_runs]
+
+
+def _joined_statement(user_id: int, history: bool):
+    """One JOIN: each joined run, its runner email, live seat count and the
+    caller's own order (the lowest order id when they joined more than once).
+    """
+    mine = aliased(Order, name="my_order")
+    counted = aliased(Order, name="counted")
+    criteria = [Order.user_id == user_id]
+    if not history:
+        criteria.append(Order.status != "cancelled")
+    first_order = (
+        select(Order.run_id, func.min(Order.id).label("order_id"))
+        .where(*criteria)
+        .group_by(Order.run_id)
+        .subquery("first_order")
+    )
+    taken = (
+        select(func.count())
+        .select_from(counted)
+        .where(counted.run_id == FoodRun.id, counted.status != "cancelled")
+        .correlate(FoodRun)
+        .scalar_subquery()
+    )
+    stmt = (
+        select(
+            *RUN_ROW_COLUMNS,
+            User.email,
+            taken,
+            mine.id,
+            mine.run_id,
+            mine.items,
+            mine.amount,
+            mine.status,
+            mine.pin,
+            mine.tip,
+        )
+        .select_from(first_order)
+        .join(FoodRun, FoodRun.id == first_order.c.run_id)
+        .join(mine, mine.id == first_order.c.order_id)
+        .outerjoin(User, User.id == FoodRun.runner_id)
+        .where(~active_status_clause() if history else active_status_clause())
+        .order_by(FoodRun.id.desc() if history else FoodRun.id)
+    )
+    return stmt
+
+
+def _joined_payload(row: Any, history: bool) -> Dict[str, Any]:
+    width = len(RUN_ROW_COLUMNS)
+    run = RunRow(*row[:width])
+    email, taken = row[width], row[width + 1]
+    mine = MyOrderRow(*row[width + 2 :])
+    seats = 0 if history else max((run.capacity or 0) - int(taken or 0), 0)
+    payload = _run_payload(run, seats, {run.runner_id: email} if email else {})
+    # The PIN is exposed only to the order's owner, i.e. this caller.
+    payload["my_order"] = {
+        "id": mine.id,
+        "run_id": mine.run_id,
+        "items": mine.items,
+        "amount": mine.amount,
+        "status": mine.status,
+        "pin": mine.pin or "",
+        "tip": float(mine.tip or 0),
+    }
+    return payload
+
+
+def joined_runs(session: Session, user_id: int) -> List[Dict[str, Any]]:
+    """Active runs the user has a live order in, with that order (1 statement)."""
+    rows = session.exec(_joined_statement(user_id, history=False)).all()
+    return [_joined_payload(row, False) for row in rows]
+
+
+def newest_first(*streams: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Merge payload streams that are each already sorted by id, descending."""
+    return heapq.merge(*streams, key=itemgetter("id"), reverse=True)
+
+
+def _archived_joined_statement(user_id: int):
+    """``_joined_statement`` for history, over the archive tables."""
+    first_order = (
+        select(order_archive.c.run_id, func.min(order_archive.c.id).label("order_id"))
+        .where(order_archive.c.user_id == user_id)
+        .group_by(order_archive.c.run_id)
+        .subquery("first_order")
+    )
+    mine = order_archive.alias("my_order")
+    runs = foodrun_archive
+    return (
+        select(
+            *(runs.c[col.key] for col in RUN_ROW_COLUMNS),
+            User.email,
+            literal(0),
+            *(mine.c[col.key] for col in MY_ORDER_COLUMNS),
+        )
+        .select_from(first_order)
+        .join(runs, runs.c.id == first_order.c.run_id)
+        .join(mine, mine.c.id == first_order.c.order_id)
+        .outerjoin(User, User.id == runs.c.runner_id)
+        .order_by(runs.c.id.desc())
+    )
+
+
+def joined_runs_history(session: Session, user_id: int) -> List[Dict[str, Any]]:
+    """Finished runs the user ordered in, live and archived, newest first
+    (2 statements)."""
+    live = session.exec(_joined_statement(user_id, history=True)).all()
+    archived = session.exec(_archived_joined_statement(user_id)).all()
+    return list(
+        newest_first(
+            (_joined_payload(row, True) for row in live),
+            (_joined_payload(row, True) for row in archived),
+        )
+    )
+
+
+def _iter_joined_rows(session: Session, stmt, batch_size: int):
+    for row in session.exec(stmt.execution_options(yield_per=batch_size)):
+        yield _joined_payload(row, True)
+
+
+def iter_joined_runs_history(
+    session: Session, user_id: int, batch_size: Optional[int] = None
+) -> Iterator[Dict[str, Any]]:
+    """``joined_runs_history`` one run at a time, fetched ``batch_size`` rows
+    per round trip from one cursor per source."""
+    batch_size = batch_size or HISTORY_STREAM_BATCH
+    return newest_first(
+        _iter_joined_rows(
+            session, _joined_statement(user_id, history=True), batch_size
+        ),
+        _iter_joined_rows(session, _archived_joined_statement(user_id), batch_size),
+    )
+
+
+def _runs_with_orders_statement(
+    criteria: tuple, live_orders_only: bool, newest_first: bool
+):
+    orders = FoodRun.orders
+    if live_orders_only:
+        orders = orders.and_(Order.status != "cancelled")
+    stmt = (
+        select(FoodRun)
+        .where(*criteria)
+        .order_by(FoodRun.id.desc() if newest_first else FoodRun.id)
+        .options(
+            selectinload(orders).options(
+                load_only(
+                    Order.id,
+                    Order.run_id,
+                    Order.user_id,
+                    Order.status,
+                    Order.items,
+                    Order.amount,
+                    Order.tip,
+                ),
+                selectinload(Order.user).load_only(User.id, User.email),
+            )
+        )
+        # Re-apply the order filter even if this session already holds the run.
+        .execution_options(populate_existing=True)
+    )
+    return stmt
+
+
+def load_runs_with_orders(
+    session: Session,
+    *criteria,
+    live_orders_only: bool = True,
+    newest_first: bool = False,
+) -> List[FoodRun]:
+    """Runs plus their orders and joiners' emails in exactly three queries.
+
+    Orders and users come from selectin loads keyed by ``IN (...)``, trimmed
+    to the columns the runner views show (no PINs, no password hashes).
+    """
+    stmt = _runs_with_orders_statement(criteria, live_orders_only, newest_first)
+    return list(session.exec(stmt).all())
+
+
+def iter_runs_with_orders(
+    session: Session,
+    *criteria,
+    live_orders_only: bool = True,
+    newest_first: bool = False,
+    batch_size: Optional[int] = None,
+) -> Iterator[FoodRun]:
+    """``load_runs_with_orders`` in batches of ``batch_size`` runs.
+
+    Each batch costs the same three queries (the selectin loads run per
+    batch) and is expunged once consumed, so memory stays flat however many
+    runs match.
+    """
+    stmt = _runs_with_orders_statement(
+        criteria, live_orders_only, newest_first
+    ).execution_options(yield_per=batch_size or HISTORY_STREAM_BATCH)
+    for batch in session.exec(stmt).partitions():
+        yield from batch
+        # expunge_all() would invalidate the cursor's loading context, so
+        # detach just this batch's objects (orders and users don't cascade).
+        loaded = {}
+        for run in batch:
+            loaded[id(run)] = run
+            for order in run.orders:
+                loaded[id(order)] = order
+                if order.user is not None:
+                    loaded[id(order.user)] = order.user
+        for obj in loaded.values():
+            if obj in session:
+                session.expunge(obj)
+
+
+def runner_run_payload(
+    run: FoodRun, runner_email: str, seats_remaining: int
+) -> Dict[str, Any]:
+    """A runner's view of their run, with every order's joiner email."""
+    payload = _run_payload(run, seats_remaining, {run.runner_id: runner_email})
+    payload["orders"] = [
+        {
+            "id": order.id,
+            "run_id": order.run_id,
+            "user_id": order.user_id,
+            "status": order.status,
+            "items": order.items,
+            "amount": order.amount,
+            "tip": float(order.tip or 0),
+            "user_email": order.user.email if order.user else str(order.user_id),
+        }
+        for order in sorted(run.orders, key=lambda order: order.id)
+    ]
+    return payload
+
+
+ARCHIVED_ORDER_COLUMNS = tuple(
+    order_archive.c[name]
+    for name in ("id", "run_id", "user_id", "status", "items", "amount", "tip")
+)
+
+
+def _archived_runner_payloads(
+    session: Session, rows: list, runner_email: str
+) -> List[Dict[str, Any]]:
+    """``runner_run_payload`` for archived run rows (2 more statements)."""
+    if not rows:
+        return []
+    orders = session.exec(
+        select(*ARCHIVED_ORDER_COLUMNS)
+        .where(order_archive.c.run_id.in_([row.id for row in rows]))
+        .order_by(order_archive.c.id)
+    ).all()
+    emails = user_emails(session, (order.user_id for order in orders))
+    by_run: Dict[int, List[Dict[str, Any]]] = {}
+    for order in orders:
+        by_run.setdefault(order.run_id, []).append(
+            {
+                "id": order.id,
+                "run_id": order.run_id,
+                "user_id": order.user_id,
+                "status": order.status,
+                "items": order.items,
+                "amount": order.amount,
+                "tip": float(order.tip or 0),
+                "user_email": emails.get(order.user_id, str(order.user_id)),
+            }
+        )
+    payloads = []
+    for row in rows:
+        run = RunRow(*row)
+        payload = _run_payload(run, 0, {run.runner_id: runner_email})
+        payload["orders"] = by_run.get(run.id, [])
+        payloads.append(payload)
+    return payloads
+
+
+def _archived_runs_statement(runner_id: int):
+    return (
+        select(*(foodrun_archive.c[col.key] for col in RUN_ROW_COLUMNS))
+        .where(foodrun_archive.c.runner_id == runner_id)
+        .order_by(foodrun_archive.c.id.desc())
+    )
+
+
+def archived_runner_runs(
+    session: Session, runner_id: int, runner_email: str
+) -> List[Dict[str, Any]]:
+    """A runner's archived runs with all their orders, newest first."""
+    rows = session.exec(_archived_runs_statement(runner_id)).all()
+    return _archived_runner_payloads(session, rows, runner_email)
+
+
+def iter_archived_runner_runs(
+    session: Session,
+    runner_id: int,
+    runner_email: str,
+    batch_size: Optional[int] = None,
+) -> Iterator[Dict[str, Any]]:
+    stmt = _archived_runs_statement(runner_id).execution_options(
+        yield_per=batch_size or HISTORY_STREAM_BATCH
+    )
+    for batch in session.exec(stmt).partitions():
+        yield from _archived_runner_payloads(session, batch, runner_email)
+
+
+def points_summary(points: int) -> Dict[str, int]:
+    # $5 per 10 points, as an integer dollar amount.
+    return {"points": int(points), "points_value": int((points // 10) * 5)}
@@ -0,0 +1,96 @@
+"""
+Single-pass JSON responses for large, already-shaped payloads.
+
+List endpoints build their payload dicts field by field from ORM rows, so
+running them back through ``response_model`` validation and
+``jsonable_encoder`` only repeats work. Returning ``prebuilt_json(...)`` hands
+FastAPI a Response, which it sends as-is: the list is serialized exactly once.
+Routes keep ``response_model`` for OpenAPI; their payload builders must emit
+exactly the model's fields (tests/test_fast_json.py checks the parity).
+
+Uses orjson when installed and falls back to compact stdlib json.
+
+Very large lists can instead be streamed as NDJSON (one object per line) when
+the client sends ``Accept: application/x-ndjson``; see ``ndjson_response``.
+"""
+
+from __future__ import annotations
+
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Iterable, Iterator, Optional
+
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def stdlib_dumps(content: Any) -> bytes:
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+        default=_default,
+    ).encode("utf-8")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return stdlib_dumps(content)
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def prebuilt_json(
+    content: Any, headers_from: Optional[Response] = None
+) -> FastJSONResponse:
+    """Send trusted, model-shaped ``content`` without re-validation.
+
+    ``headers_from`` is the endpoint's injected ``Response``; headers that
+    dependencies set on it (ETag, Cache-Control) are carried over, since
+    FastAPI only merges them into responses it builds itself.
+    """
+    response = FastJSONResponse(content)
+    if headers_from is not None:
+        response.headers.update(headers_from.headers)
+    return response
+
+
+def wants_ndjson(request: Request) -> bool:
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "").lower()
+
+
+def _ndjson_lines(items: Iterable[Any]) -> Iterator[bytes]:
+    for item in items:
+        yield dumps(item) + b"\n"
+
+
+def ndjson_response(items: Iterable[Any]) -> StreamingResponse:
+    """Stream ``items`` as newline-delimited JSON while they are produced.
+
+    ``items`` is usually a generator over a database cursor; Starlette drains
+    it on a worker thread, so the first line goes out as soon as the first
+    batch is fetched. The generator must own its session: the request's
+    dependency session is already closed when the body starts streaming.
+    """
+    return StreamingResponse(_ndjson_lines(items), media_type=NDJSON_MEDIA_TYPE)
@@ -0,0 +1,192 @@
+"""
+Periodic background jobs on a dedicated thread pool.
+
+Each registered job runs on its own schedule. Ticks are aligned to multiples
+of the interval on the wall clock (an hourly job runs at :00 plus jitter), so
+the cycle never drifts by the job's own run time. ``initial_delay`` keeps the
+first run off the startup path. A tick that finds ``max_concurrency`` runs
+still going is skipped and counted instead of piling up. Exceptions are
+recorded on the job and logged; they never stop the schedule. Jobs run on the
+scheduler's own ``ThreadPoolExecutor``, never on the AnyIO threadpool that
+serves sync request handlers. ``stats()`` reports per-job run time and the
+last success for ``/metrics``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+SCHEDULER_WORKERS = int(os.getenv("SCHEDULER_WORKERS", "2"))
+
+
+def next_tick(
+    now: float, interval: float, earliest: float, jitter: float = 0.0
+) -> float:
+    """First interval-aligned wall-clock time at or after ``earliest``, plus jitter."""
+    tick = math.ceil(max(now, earliest) / interval) * interval
+    return tick + (random.uniform(0, jitter) if jitter > 0 else 0.0)
+
+
+@dataclass
+class Job:
+    name: str
+    func: Callable[[], Any]
+    interval: float
+    initial_delay: float = 0.0
+    jitter: float = 0.0
+    max_concurrency: int = 1
+    running: int = 0
+    runs: int = 0
+    failures: int = 0
+    skipped: int = 0
+    last_started: Optional[float] = None
+    last_success: Optional[float] = None
+    last_duration_ms: Optional[float] = None
+    max_duration_ms: float = 0.0
+    last_error: Optional[str] = None
+    next_run: Optional[float] = None
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "interval_seconds": self.interval,
+                "running": self.running,
+                "runs": self.runs,
+                "failures": self.failures,
+                "skipped": self.skipped,
+                "last_started": _iso(self.last_started),
+                "last_success": _iso(self.last_success),
+                "last_duration_ms": self.last_duration_ms,
+                "max_duration_ms": round(self.max_duration_ms, 1),
+                "last_error": self.last_error,
+                "next_run": _iso(self.next_run),
+            }
+
+
+def _iso(ts: Optional[float]) -> Optional[str]:
+    if ts is None:
+        return None
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(ts))
+
+
+class JobScheduler:
+    def __init__(self, workers: int = SCHEDULER_WORKERS) -> None:
+        self.workers = max(workers, 1)
+        self.jobs: Dict[str, Job] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._tasks: List[asyncio.Task] = []
+        self._runs: set[asyncio.Task] = set()
+
+    def register(
+        self,
+        name: str,
+        func: Callable[[], Any],
+        interval_seconds: float,
+        *,
+        initial_delay: Optional[float] = None,
+        jitter: Optional[float] = None,
+        max_concurrency: int = 1,
+    ) -> Job:
+        """Add (or replace) a job; it starts with the next ``start()``.
+
+        ``initial_delay`` defaults to one interval and ``jitter`` to a tenth of
+        it (at most 30 s), so several workers do not hit the DB in lockstep.
+        """
+        if interval_seconds <= 0:
+            raise ValueError("interval_seconds must be positive")
+        job = Job(
+            name=name,
+            func=func,
+            interval=interval_seconds,
+            initial_delay=interval_seconds if initial_delay is None else initial_delay,
+            jitter=min(interval_seconds * 0.1, 30.0) if jitter is None else jitter,
+            max_concurrency=max(max_concurrency, 1),
+        )
+        self.jobs[name] = job
+        return job
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="job"
+        )
+        started = time.time()
+        self._tasks = [
+            asyncio.create_task(self._schedule(job, started), name=f"job:{job.name}")
+            for job in self.jobs.values()
+        ]
+
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks + list(self._runs), []
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            # Running jobs finish in the background; none start after this.
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _schedule(self, job: Job, started: float) -> None:
+        earliest = started + job.initial_delay
+        while True:
+            job.next_run = next_tick(time.time(), job.interval, earliest, job.jitter)
+            await asyncio.sleep(max(job.next_run - time.time(), 0))
+            # The following tick, not "now + interval": no drift.
+            earliest = job.next_run + job.interval * 0.5
+            with job._lock:
+                if job.running >= job.max_concurrency:
+                    job.skipped += 1
+                    continue
+                job.running += 1
+            run = asyncio.create_task(self._run(job))
+            self._runs.add(run)
+            run.add_done_callback(self._runs.discard)
+
+    async def _run(self, job: Job) -> None:
+        loop = asyncio.get_running_loop()
+        with job._lock:
+            job.last_started = time.time()
+        clock = time.perf_counter()
+        error: Optional[str] = None
+        try:
+            await loop.run_in_executor(self._executor, job.func)
+        except Exception as exc:  # a failing job must not stop its schedule
+            error = f"{type(exc).__name__}: {exc}"
+        finally:
+            with job._lock:
+                job.running -= 1
+        elapsed_ms = (time.perf_counter() - clock) * 1000
+        with job._lock:
+            job.runs += 1
+            job.last_duration_ms = round(elapsed_ms, 1)
+            job.max_duration_ms = max(job.max_duration_ms, elapsed_ms)
+            if error is None:
+                job.last_success = time.time()
+            else:
+                job.failures += 1
+                job.last_error = error
+        if error is not None:
+            print(f"[jobs] {job.name} failed: {error}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "jobs": {name: job.stats() for name, job in self.jobs.items()},
+        }
+
+
+scheduler = JobScheduler()
@@ -137,13 +137,29 @@ class PeakHourEntry(BaseModel):
 
 
 class PeakForecastResponse(BaseModel):
-    hourly_timeseries: List[HourlyTimeseriesBucket]
-    hourly_profile: List[HourlyProfileEntry]
-    peak_forecast: List[PeakHourEntry]
+    # Defaults let ``include=`` omit sections (served with exclude_unset).
+    hourly_timeseries: List[HourlyTimeseriesBucket] = []
+    hourly_profile: List[HourlyProfileEntry] = []
+    # Today's (UTC) weekday-specific profile that peak_forecast is drawn from.
+    seasonal_profile: List[HourlyProfileEntry] = []
+    peak_forecast: List[PeakHourEntry] = []
     rewards_issued: List[RunnerRewardResponse] = []
     recent_rewards: List[RunnerRewardResponse] = []
 
 
+class PeakHoursResponse(BaseModel):
+    generated_at: str
+    peak_forecast: List[PeakHourEntry]
+
+
+class FeedResponse(BaseModel):
+    # Only requested sections are returned (served with exclude_unset).
+    available: List[FoodRunResponse] = []
+    joined: List[JoinedRunResponse] = []
+    points: Optional[PointsResponse] = None
+    peak_hours: List[PeakHourEntry] = []
+
+
 class RunLoadOrder(BaseModel):
     items: str
     amount: Optional[float] = None
@@ -0,0 +1,75 @@
+"""
+Dialect-aware timestamp parts, for backfilling the ``created_*`` columns.
+
+Each construct renders natively per backend: ``strftime`` on SQLite,
+``extract`` on PostgreSQL. All of them work in UTC, which is what SQLite's
+CURRENT_TIMESTAMP stores, so both backends derive the same values as
+``models.created_parts`` does in Python.
+"""
+
+from __future__ import annotations
+
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.types import BigInteger, Integer
+
+
+class epoch_seconds(FunctionElement):
+    """Seconds since 1970-01-01 UTC."""
+
+    type = BigInteger()
+    inherit_cache = True
+
+
+class hour_of_day(FunctionElement):
+    """Hour of the day, 0-23."""
+
+    type = Integer()
+    inherit_cache = True
+
+
+class day_of_week(FunctionElement):
+    """Day of the week, 0 = Sunday."""
+
+    type = Integer()
+    inherit_cache = True
+
+
+def _arg(compiler, element, **kw) -> str:
+    return compiler.process(element.clauses, **kw)
+
+
+@compiles(epoch_seconds, "sqlite")
+def _epoch_seconds_sqlite(element, compiler, **kw):
+    return f"CAST(strftime('%s', {_arg(compiler, element, **kw)}) AS INTEGER)"
+
+
+@compiles(epoch_seconds)
+def _epoch_seconds_default(element, compiler, **kw):
+    return f"CAST(EXTRACT(EPOCH FROM {_arg(compiler, element, **kw)}) AS BIGINT)"
+
+
+@compiles(hour_of_day, "sqlite")
+def _hour_of_day_sqlite(element, compiler, **kw):
+    return f"CAST(strftime('%H', {_arg(compiler, element, **kw)}) AS INTEGER)"
+
+
+@compiles(hour_of_day)
+def _hour_of_day_default(element, compiler, **kw):
+    return (
+        f"CAST(EXTRACT(HOUR FROM timezone('UTC', {_arg(compiler, element, **kw)}))"
+        " AS INTEGER)"
+    )
+
+
+@compiles(day_of_week, "sqlite")
+def _day_of_week_sqlite(element, compiler, **kw):
+    return f"CAST(strftime('%w', {_arg(compiler, element, **kw)}) AS INTEGER)"
+
+
+@compiles(day_of_week)
+def _day_of_week_default(element, compiler, **kw):
+    return (
+        f"CAST(EXTRACT(DOW FROM timezone('UTC', {_arg(compiler, element, **kw)}))"
+        " AS INTEGER)"
+    )
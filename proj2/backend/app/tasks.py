@@ -0,0 +1,57 @@
+"""
+Handlers for queued jobs (see app/jobqueue.py).
+
+Each one may run more than once for the same payload (a retry after a crash
+or a lapsed lease), so each checks whether its effect is already in place.
+"""
+
+import os
+from typing import Any, Dict
+
+from sqlmodel import Session, select
+
+from .jobqueue import task
+from .models import FoodRun, RunnerReward
+
+PEAK_BONUS_POINTS = int(os.getenv("PEAK_BONUS_POINTS", "5"))
+
+
+@task("peak_bonus")
+def award_peak_bonus(session: Session, payload: Dict[str, Any]) -> None:
+    """Bonus for a completed run posted in one of its weekday's peak hours."""
+    from .analytics import grant_reward, peak_hours_on, peak_window_label
+
+    run_id = int(payload["run_id"])
+    run = session.get(FoodRun, run_id)
+    if run is None or run.status != "completed" or run.created_hour is None:
+        return
+    rewarded = session.exec(
+        select(RunnerReward.id).where(RunnerReward.run_id == run_id)
+    ).first()
+    if rewarded is not None:
+        return
+    # Peaks of the weekday the run was posted on, not of today.
+    if run.created_hour not in peak_hours_on(session, run.created_weekday):
+        return
+    # The check above only saves work; the unique run_id settles races with a
+    # second delivery of this job or the hourly peak_rewards cycle.
+    grant_reward(
+        session,
+        run.runner_id,
+        run_id,
+        PEAK_BONUS_POINTS,
+        f"Peak hour bonus ({peak_window_label(run.created_epoch)})",
+    )
+    session.commit()
+
+
+@task("forecast_refresh")
+def refresh_forecast_rollup(session: Session, payload: Dict[str, Any]) -> None:
+    """Fold closed hours into the seasonal forecast and republish peak windows."""
+    from .analytics import generate_peak_payload, peak_hours_snapshot
+    from .forecasting import refresh_forecast
+
+    refresh_forecast(session)
+    body = generate_peak_payload(session, sections=("peak_forecast",))
+    peak_hours_snapshot.update(body["peak_forecast"])
+
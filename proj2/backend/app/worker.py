@@ -0,0 +1,54 @@
+"""
+Standalone job-queue worker: ``python -m app.worker [--once]``.
+
+Polls ``jobqueue`` every JOB_QUEUE_POLL_SECONDS and drains whatever is due
+(see app/jobqueue.py). Run it next to the API with JOB_QUEUE_IN_PROCESS=0;
+any number of workers can share one database. SIGINT/SIGTERM finish the
+current batch, then exit; a job cut off mid-run is retried once its lease
+lapses.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import signal
+import threading
+
+from dotenv import load_dotenv
+from sqlmodel import Session
+
+load_dotenv()
+
+JOB_QUEUE_POLL_SECONDS = float(os.getenv("JOB_QUEUE_POLL_SECONDS", "2"))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run queued jobs.")
+    parser.add_argument(
+        "--once", action="store_true", help="Drain due jobs once, then exit."
+    )
+    args = parser.parse_args()
+
+    from .db import engine, run_migrations
+    from .jobqueue import drain, queue_stats
+
+    run_migrations(engine)
+    with Session(engine) as session:
+        print(f"[queue] Worker starting; {queue_stats(session)}")
+    stopping = threading.Event()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: stopping.set())
+    while not stopping.is_set():
+        # One batch at a time so a stop request is honoured between batches.
+        counts = drain(engine, max_batches=1)
+        if counts["done"] or counts["dead"] or counts["retried"]:
+            print(f"[queue] {counts}")
+        if args.once and not any(counts.values()):
+            break
+        if not any(counts.values()):
+            stopping.wait(JOB_QUEUE_POLL_SECONDS)
+
+
+if __name__ == "__main__":
+    main()
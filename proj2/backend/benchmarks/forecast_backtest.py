@@ -0,0 +1,299 @@
+"""
+Backtest the peak-hour forecasters: accuracy, wall time and memory together.
+
+Seeds a throwaway database with ``generate_synthetic_data.py``'s weekday and
+weekend rhythms, scaled to roughly N orders, then replays the last
+``--test-days`` days one at a time. Each window asks every strategy for the
+day's peak hours using only the history before it, and only then inserts the
+day's runs and orders. Actual peaks are ``forecast_peak_hours`` applied to
+that day's own profile. Per strategy the report gives micro-averaged
+precision/recall/F1 over all windows, per-window wall time and the
+tracemalloc peak. Timings are taken with tracemalloc on unless
+``--no-memory`` is given, so compare strategies rather than absolute numbers.
+
+Strategies:
+
+* ``hourly_profile``: the all-days average, recomputed from every row;
+* ``seasonal``: forecasting.py's weekday x hour model, refreshed
+  incrementally (its first window includes the bootstrap, see ``time_ms.first``).
+
+    python benchmarks/forecast_backtest.py --scales 1000,10000,100000 \\
+        --output forecast_backtest.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import create_engine, insert  # noqa: E402
+from sqlmodel import Session, SQLModel  # noqa: E402
+
+import generate_synthetic_data as synth  # noqa: E402
+from app import analytics, forecasting  # noqa: E402
+from app.models import FoodRun, Order, User, created_parts  # noqa: E402
+
+# A Monday, so --days multiples of 7 cover whole weeks.
+START = datetime(2025, 1, 6)
+# Mean runs_for_day() and orders per run in generate_synthetic_data.py.
+SYNTH_RUNS_PER_DAY = 9.0
+SYNTH_ORDERS_PER_RUN = 2.3
+INSERT_BATCH = 10_000
+
+Predictor = Callable[[Session, datetime], Set[int]]
+DayCounts = Dict[int, List[int]]  # hour -> [orders, runs, capacity]
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Peak forecast backtest.")
+    parser.add_argument(
+        "--scales",
+        default="1000,10000,100000",
+        help="Comma-separated target order counts (up to 10000000).",
+    )
+    parser.add_argument("--days", type=int, default=84, help="History length.")
+    parser.add_argument("--test-days", type=int, default=28)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument(
+        "--database-url",
+        help="Throwaway database to use instead of a temporary SQLite file "
+        "(its tables are dropped).",
+    )
+    parser.add_argument("--no-memory", action="store_true")
+    parser.add_argument("--output", type=Path, help="Optional JSON report path.")
+    return parser.parse_args()
+
+
+def _stamped(created_at: datetime) -> dict:
+    epoch, hour, weekday = created_parts(created_at)
+    return {
+        "created_at": created_at.replace(tzinfo=timezone.utc),
+        "created_epoch": epoch,
+        "created_hour": hour,
+        "created_weekday": weekday,
+    }
+
+
+def synthetic_days(
+    days: int, target_orders: int
+) -> Iterator[Tuple[datetime, List[dict], List[dict], DayCounts]]:
+    """Yield (day, run rows, order rows, per-hour counts), one day at a time."""
+    scale = target_orders / (days * SYNTH_RUNS_PER_DAY * SYNTH_ORDERS_PER_RUN)
+    run_id = order_id = 0
+    for offset in range(days):
+        day = START + timedelta(days=offset)
+        runs: List[dict] = []
+        orders: List[dict] = []
+        counts: DayCounts = {}
+        for _ in range(int(synth.runs_for_day(day) * scale + random.random())):
+            hour = synth.weighted_hour_choice(day)
+            created = day.replace(hour=hour, minute=random.randint(0, 59))
+            capacity = random.randint(1, 5)
+            run_id += 1
+            runs.append(
+                {
+                    "id": run_id,
+                    "runner_id": 1,
+                    "restaurant": random.choice(synth.RESTAURANTS),
+                    "drop_point": random.choice(synth.DROP_POINTS),
+                    "eta": "15 mins",
+                    "capacity": capacity,
+                    "status": "completed",
+                    **_stamped(created),
+                }
+            )
+            slot = counts.setdefault(hour, [0, 0, 0])
+            slot[1] += 1
+            slot[2] += capacity
+            demand = synth.demand_factor_for_hour(hour)
+            for _ in range(min(capacity, max(1, round(capacity * demand)))):
+                ordered = created + timedelta(minutes=random.randint(1, 12))
+                order_id += 1
+                orders.append(
+                    {
+                        "id": order_id,
+                        "run_id": run_id,
+                        "user_id": 1,
+                        "items": "Latte",
+                        "amount": 6.5,
+                        "status": "completed",
+                        **_stamped(ordered),
+                    }
+                )
+                counts.setdefault(ordered.hour, [0, 0, 0])[0] += 1
+        yield day, runs, orders, counts
+
+
+def insert_day(engine, runs: List[dict], orders: List[dict]) -> None:
+    with engine.begin() as conn:
+        for table, rows in ((FoodRun.__table__, runs), (Order.__table__, orders)):
+            for start in range(0, len(rows), INSERT_BATCH):
+                conn.execute(insert(table), rows[start : start + INSERT_BATCH])
+
+
+def actual_peaks(counts: DayCounts) -> Set[int]:
+    profile = []
+    for hour in range(24):
+        orders, runs, capacity = counts.get(hour, (0, 0, 0))
+        utilization = orders / capacity if capacity else 0.0
+        profile.append(
+            analytics.profile_entry(hour, orders, runs, capacity, utilization)
+        )
+    return _hours(analytics.forecast_peak_hours(profile))
+
+
+def _hours(peaks: List[dict]) -> Set[int]:
+    return {int(entry["hour"]) for entry in peaks}
+
+
+def predict_hourly_profile(session: Session, day: datetime) -> Set[int]:
+    profile = analytics.build_hourly_profile(session)
+    return _hours(analytics.forecast_peak_hours(profile))
+
+
+def predict_seasonal(session: Session, day: datetime) -> Set[int]:
+    now = day.replace(tzinfo=timezone.utc)
+    forecasting.refresh_forecast(session, now=now)
+    weekday = (day.weekday() + 1) % 7
+    profile = forecasting.seasonal_profile(session, weekday=weekday, now=now)
+    return _hours(analytics.forecast_peak_hours(profile))
+
+
+STRATEGIES: Dict[str, Predictor] = {
+    "hourly_profile": predict_hourly_profile,
+    "seasonal": predict_seasonal,
+}
+
+
+def _timed(
+    predict: Predictor, session: Session, day: datetime, memory: bool
+) -> Tuple[Set[int], float, Optional[int]]:
+    if memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        predicted = predict(session, day)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        peak = tracemalloc.get_traced_memory()[1] if memory else None
+    finally:
+        if memory:
+            tracemalloc.stop()
+    return predicted, elapsed_ms, peak
+
+
+def _score(hits: int, predicted: int, actual: int) -> dict:
+    precision = hits / predicted if predicted else 0.0
+    recall = hits / actual if actual else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if hits else 0.0
+    return {
+        "precision": round(precision, 3),
+        "recall": round(recall, 3),
+        "f1": round(f1, 3),
+        "hits": hits,
+        "predicted": predicted,
+        "actual": actual,
+    }
+
+
+def backtest(args: argparse.Namespace, target_orders: int, url: str) -> dict:
+    random.seed(args.seed)
+    engine = create_engine(url)
+    SQLModel.metadata.drop_all(engine)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(User(id=1, email="runner@ncsu.edu", password_hash="x"))
+        session.commit()
+
+    train_days = args.days - args.test_days
+    totals = {"runs": 0, "orders": 0}
+    tallies = {name: [0, 0, 0] for name in STRATEGIES}  # hits, predicted, actual
+    timings: Dict[str, List[float]] = {name: [] for name in STRATEGIES}
+    peaks: Dict[str, List[int]] = {name: [] for name in STRATEGIES}
+    seeded_at = time.perf_counter()
+    for index, (day, runs, orders, counts) in enumerate(
+        synthetic_days(args.days, target_orders)
+    ):
+        if index >= train_days:
+            actual = actual_peaks(counts)
+            for name, predict in STRATEGIES.items():
+                with Session(engine) as session:
+                    predicted, elapsed_ms, peak = _timed(
+                        predict, session, day, not args.no_memory
+                    )
+                tally = tallies[name]
+                tally[0] += len(predicted & actual)
+                tally[1] += len(predicted)
+                tally[2] += len(actual)
+                timings[name].append(elapsed_ms)
+                if peak is not None:
+                    peaks[name].append(peak)
+        insert_day(engine, runs, orders)
+        totals["runs"] += len(runs)
+        totals["orders"] += len(orders)
+    wall_s = time.perf_counter() - seeded_at
+    engine.dispose()
+
+    strategies = {}
+    for name in STRATEGIES:
+        times = sorted(timings[name])
+        strategies[name] = {
+            **_score(*tallies[name]),
+            "windows": len(times),
+            "time_ms": {
+                "first": round(timings[name][0], 2) if times else None,
+                "median": round(statistics.median(times), 2) if times else None,
+                "p95": round(times[int(0.95 * (len(times) - 1))], 2) if times else None,
+                "total": round(sum(times), 1),
+            },
+            "peak_memory_kib": round(max(peaks[name]) / 1024, 1)
+            if peaks[name]
+            else None,
+        }
+    return {
+        "target_orders": target_orders,
+        **totals,
+        "wall_s": round(wall_s, 1),
+        "strategies": strategies,
+    }
+
+
+def main() -> None:
+    args = parse_args()
+    if not 0 < args.test_days < args.days:
+        raise SystemExit("--test-days must be between 1 and --days - 1")
+    scales = [int(part) for part in args.scales.split(",") if part.strip()]
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in scales:
+            url = args.database_url or (
+                f"sqlite:///{Path(tmp, f'backtest-{scale}.db').as_posix()}"
+            )
+            results.append(backtest(args, scale, url))
+            print(f"[backtest] {scale} orders done", file=sys.stderr)
+
+    report = {
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "seed": args.seed,
+        "days": args.days,
+        "test_days": args.test_days,
+        "forecast_alpha": forecasting.FORECAST_ALPHA,
+        "results": results,
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Login (password verification) throughput versus hash-pool size.
+
+Verifies a burst of passwords through ``HashPool`` for each worker count up to
+the number of cores, plus the inline (threadpool) baseline, and reports
+verifications per second. Use it to pick AUTH_HASH_WORKERS for a host.
+
+    python benchmarks/login_throughput.py --logins 200 --output logins.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.hashing import HashPool, hash_password, verify_password  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Login throughput benchmark.")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Largest pool size to try (default: core count).",
+    )
+    parser.add_argument("--output", type=Path, help="Optional JSON report path.")
+    return parser.parse_args()
+
+
+async def _burst(pool: HashPool, logins: int, hashed: str) -> float:
+    started = time.perf_counter()
+    results = await asyncio.gather(
+        *(pool.run(verify_password, "Password123!", hashed) for _ in range(logins))
+    )
+    elapsed = time.perf_counter() - started
+    assert all(results)
+    return elapsed
+
+
+def measure(workers: int, logins: int, hashed: str) -> dict:
+    pool = HashPool(workers=workers, max_pending=logins)
+    try:
+        # Warm up so process spawn time is not billed to the burst.
+        asyncio.run(_burst(pool, max(workers, 1), hashed))
+        elapsed = asyncio.run(_burst(pool, logins, hashed))
+    finally:
+        pool.shutdown()
+    return {
+        "workers": workers,
+        "mode": "process" if workers > 0 else "inline",
+        "logins": logins,
+        "seconds": round(elapsed, 3),
+        "logins_per_second": round(logins / elapsed, 1),
+    }
+
+
+def main() -> None:
+    args = parse_args()
+    hashed = hash_password("Password123!")
+    sizes = sorted({1, 2, 4, 8, 16, args.max_workers})
+    rows = [measure(0, args.logins, hashed)]
+    rows += [measure(n, args.logins, hashed) for n in sizes if n <= args.max_workers]
+    report = {"cpu_count": os.cpu_count(), "results": rows}
+    for row in rows:
+        print(
+            f"{row['mode']:>7} workers={row['workers']:>2} "
+            f"→ {row['logins_per_second']:>8.1f} logins/s"
+        )
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
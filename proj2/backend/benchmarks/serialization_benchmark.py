@@ -0,0 +1,130 @@
+"""
+Per-item cost of serializing run lists: FastAPI's response_model path vs the
+prebuilt single-pass path in app/responses.py.
+
+Builds N synthetic ``FoodRunResponse``-shaped dicts (with a few orders each)
+and times, per list:
+
+* ``response_model``: ``serialize_response`` (validate + dump + encoder) and
+  ``JSONResponse.render`` -- what a plain ``return payload`` costs;
+* ``prebuilt (orjson)`` / ``prebuilt (stdlib)``: one ``dumps`` call.
+
+    python benchmarks/serialization_benchmark.py --items 1000 --orders 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_model_field  # noqa: E402
+
+from app.responses import dumps, orjson, stdlib_dumps  # noqa: E402
+from app.schemas import FoodRunResponse  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Response serialization benchmark.")
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--orders", type=int, default=3, help="Orders per run.")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", type=Path, help="Optional JSON report path.")
+    return parser.parse_args()
+
+
+def build_payload(items: int, orders: int) -> list:
+    return [
+        {
+            "id": i,
+            "runner_id": i % 50,
+            "restaurant": f"Restaurant {i % 17}",
+            "drop_point": "Hunt Library",
+            "eta": "12:30",
+            "capacity": 5,
+            "status": "active",
+            "runner_username": f"runner{i % 50}@ncsu.edu",
+            "seats_remaining": 5 - orders,
+            "orders": [
+                {
+                    "id": i * 10 + j,
+                    "run_id": i,
+                    "user_id": j,
+                    "status": "pending",
+                    "items": "2x Iced Coffee, 1x Bagel",
+                    "amount": 11.5,
+                    "tip": 1.0,
+                    "user_email": f"joiner{j}@ncsu.edu",
+                }
+                for j in range(orders)
+            ],
+        }
+        for i in range(items)
+    ]
+
+
+def time_it(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main() -> None:
+    args = parse_args()
+    payload = build_payload(args.items, args.orders)
+    field = create_model_field(name="response", type_=List[FoodRunResponse])
+    loop = asyncio.new_event_loop()
+
+    def response_model_path() -> bytes:
+        content = loop.run_until_complete(
+            serialize_response(field=field, response_content=payload)
+        )
+        return JSONResponse(content).body
+
+    cases = {"response_model": response_model_path}
+    if orjson is not None:
+        cases["prebuilt (orjson)"] = lambda: dumps(payload)
+    cases["prebuilt (stdlib)"] = lambda: stdlib_dumps(payload)
+
+    # Same document either way, so the comparison is like for like.
+    reference = json.loads(response_model_path())
+    for name, fn in cases.items():
+        assert json.loads(fn()) == reference, name
+
+    baseline = None
+    results = {}
+    for name, fn in cases.items():
+        seconds = time_it(fn, args.repeat)
+        baseline = baseline or seconds
+        results[name] = {
+            "list_ms": round(seconds * 1000, 3),
+            "per_item_us": round(seconds / args.items * 1e6, 3),
+            "speedup": round(baseline / seconds, 1),
+        }
+    loop.close()
+
+    report = {
+        "items": args.items,
+        "orders_per_item": args.orders,
+        "bytes": len(dumps(payload)),
+        "results": results,
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Measure API cold start: `import app.main` time and time-to-first-200.
+
+Import time comes from ``python -X importtime`` (cumulative microseconds for
+``app.main``). Time-to-first-200 spawns uvicorn against an already-migrated
+SQLite DB (the rolling-restart case) and polls ``/`` until it answers.
+Exits non-zero when the median of either measurement exceeds its budget.
+
+    python benchmarks/startup_benchmark.py --runs 5 --output startup.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="API cold-start benchmark.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--import-budget-ms",
+        type=float,
+        default=float(os.getenv("STARTUP_IMPORT_BUDGET_MS", "600")),
+        help="Regression budget for median `import app.main` time.",
+    )
+    parser.add_argument(
+        "--ready-budget-ms",
+        type=float,
+        default=float(os.getenv("STARTUP_READY_BUDGET_MS", "1000")),
+        help="Regression budget for median process-spawn → first 200 time.",
+    )
+    parser.add_argument("--timeout", type=float, default=20.0)
+    parser.add_argument("--output", type=Path, help="Optional JSON report path.")
+    return parser.parse_args()
+
+
+def _env(db_url: str) -> dict:
+    env = dict(os.environ)
+    env["DATABASE_URL"] = db_url
+    env.pop("READ_DATABASE_URL", None)
+    return env
+
+
+def measure_import_ms(db_url: str) -> float:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR,
+        env=_env(db_url),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    for line in reversed(proc.stderr.splitlines()):
+        parts = [p.strip() for p in line.split("|")]
+        if len(parts) == 3 and parts[2] == "app.main":
+            return int(parts[1]) / 1000
+    raise RuntimeError("app.main not found in -X importtime output")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_ready_ms(db_url: str, timeout: float) -> float:
+    port = _free_port()
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app.main:app",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        cwd=BACKEND_DIR,
+        env=_env(db_url),
+    )
+    try:
+        deadline = started + timeout
+        while time.perf_counter() < deadline:
+            try:
+                with urllib.request.urlopen(
+                    f"http://127.0.0.1:{port}/", timeout=0.5
+                ) as resp:
+                    if resp.status == 200:
+                        return (time.perf_counter() - started) * 1000
+            except OSError:
+                time.sleep(0.005)
+        raise RuntimeError(f"server did not answer within {timeout}s")
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def main() -> None:
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        db_url = f"sqlite:///{Path(tmp, 'startup.db').as_posix()}"
+        # Warm-up run creates and migrates the DB so measured boots are restarts.
+        measure_ready_ms(db_url, args.timeout)
+        import_ms = [measure_import_ms(db_url) for _ in range(args.runs)]
+        ready_ms = [measure_ready_ms(db_url, args.timeout) for _ in range(args.runs)]
+
+    report = {
+        "runs": args.runs,
+        "import_ms": {
+            "median": round(statistics.median(import_ms), 1),
+            "max": round(max(import_ms), 1),
+            "budget": args.import_budget_ms,
+        },
+        "time_to_first_200_ms": {
+            "median": round(statistics.median(ready_ms), 1),
+            "max": round(max(ready_ms), 1),
+            "budget": args.ready_budget_ms,
+        },
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+
+    failures = [
+        name
+        for name, entry in (
+            ("import", report["import_ms"]),
+            ("time-to-first-200", report["time_to_first_200_ms"]),
+        )
+        if entry["median"] > entry["budget"]
+    ]
+    if failures:
+        raise SystemExit(f"Startup budget exceeded: {', '.join(failures)}")
+
+
+if __name__ == "__main__":
+    main()
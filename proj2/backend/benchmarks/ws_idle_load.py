@@ -0,0 +1,167 @@
+"""
+Idle WebSocket load test for ``/ws/runner``.
+
+Spawns uvicorn against a scratch SQLite DB, registers a runner, opens N idle
+runner sockets and reports the server's RSS growth per connection (from
+``/proc/<pid>/status``, so Linux only). Optionally publishes one join while
+all sockets are open and measures how long fan-out takes to reach them all.
+Raise ``ulimit -n`` above N first.
+
+    python benchmarks/ws_idle_load.py --connections 2000 --output ws_idle.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+import websockets
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Idle /ws/runner load test.")
+    parser.add_argument("--connections", type=int, default=1000)
+    parser.add_argument("--batch", type=int, default=100, help="Concurrent opens.")
+    parser.add_argument(
+        "--hold", type=float, default=5.0, help="Seconds to hold sockets idle."
+    )
+    parser.add_argument("--output", type=Path, help="Optional JSON report path.")
+    return parser.parse_args()
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _rss_kb(pid: int) -> int:
+    for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+        if line.startswith("VmRSS:"):
+            return int(line.split()[1])
+    raise RuntimeError("VmRSS not found")
+
+
+def _post(base: str, path: str, body: dict, token: str | None = None) -> dict:
+    headers = {"Content-Type": "application/json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    req = urllib.request.Request(
+        base + path, data=json.dumps(body).encode(), headers=headers, method="POST"
+    )
+    with urllib.request.urlopen(req, timeout=30) as resp:
+        return json.loads(resp.read())
+
+
+def _wait_ready(base: str, timeout: float = 20.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(base + "/", timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError("server did not start")
+
+
+async def _open_all(url: str, count: int, batch: int) -> list:
+    sockets: list = []
+    for start in range(0, count, batch):
+        size = min(batch, count - start)
+        sockets += await asyncio.gather(
+            *(websockets.connect(url, ping_interval=None) for _ in range(size))
+        )
+    return sockets
+
+
+async def _drive(args: argparse.Namespace, base: str, pid: int) -> dict:
+    runner, joiner = (
+        _post(base, "/auth/register", {"email": email, "password": "Password123!"})
+        for email in ("ws-load-runner@ncsu.edu", "ws-load-joiner@ncsu.edu")
+    )
+    run = _post(
+        base,
+        "/runs",
+        {"restaurant": "Load", "drop_point": "Lab", "eta": "10", "capacity": 5},
+        runner["token"],
+    )
+    url = base.replace("http", "ws", 1) + f"/ws/runner?token={runner['token']}"
+
+    baseline_kb = _rss_kb(pid)
+    started = time.perf_counter()
+    sockets = await _open_all(url, args.connections, args.batch)
+    open_seconds = time.perf_counter() - started
+    await asyncio.sleep(args.hold)
+    loaded_kb = _rss_kb(pid)
+
+    started = time.perf_counter()
+    await asyncio.to_thread(
+        _post,
+        base,
+        f"/runs/{run['id']}/orders",
+        {"items": "Coffee", "amount": 3},
+        joiner["token"],
+    )
+    await asyncio.gather(*(ws.recv() for ws in sockets))
+    fanout_ms = (time.perf_counter() - started) * 1000
+
+    await asyncio.gather(*(ws.close() for ws in sockets))
+    return {
+        "connections": args.connections,
+        "open_seconds": round(open_seconds, 2),
+        "rss_baseline_mb": round(baseline_kb / 1024, 1),
+        "rss_loaded_mb": round(loaded_kb / 1024, 1),
+        "rss_per_connection_kb": round((loaded_kb - baseline_kb) / args.connections, 2),
+        "fanout_ms": round(fanout_ms, 1),
+    }
+
+
+def main() -> None:
+    args = parse_args()
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ)
+        env["DATABASE_URL"] = f"sqlite:///{Path(tmp, 'ws.db').as_posix()}"
+        env.pop("READ_DATABASE_URL", None)
+        # Pings would dominate a short hold; the benchmark measures idle cost.
+        env.setdefault("WS_HEARTBEAT_SECONDS", "600")
+        env.setdefault("WS_IDLE_TIMEOUT_SECONDS", "1200")
+        proc = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "uvicorn",
+                "app.main:app",
+                "--port",
+                str(port),
+                "--log-level",
+                "warning",
+            ],
+            cwd=BACKEND_DIR,
+            env=env,
+        )
+        try:
+            _wait_ready(base)
+            report = asyncio.run(_drive(args, base, proc.pid))
+        finally:
+            proc.terminate()
+            proc.wait(timeout=10)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
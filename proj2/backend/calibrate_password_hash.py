@@ -0,0 +1,122 @@
+"""
+Calibrate the PBKDF2 work factor for this hardware against a login latency SLO.
+
+PBKDF2 cost grows linearly with rounds, so the CLI times a probe hash, scales
+the rounds to the share of the SLO reserved for hashing, then re-times the
+recommendation to confirm it. Optionally checks that the hash pool can sustain
+an expected peak login rate. Put the printed value in PASSWORD_HASH_ROUNDS;
+users with weaker hashes are re-hashed on their next successful login.
+
+    python calibrate_password_hash.py --slo-ms 250 --peak-logins-per-second 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import time
+
+from passlib.hash import pbkdf2_sha256
+
+# OWASP's 2023 guidance for PBKDF2-HMAC-SHA256; flagged, not enforced.
+OWASP_MIN_ROUNDS = 600_000
+PROBE_ROUNDS = 20_000
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Recommend PASSWORD_HASH_ROUNDS for a login latency SLO."
+    )
+    parser.add_argument(
+        "--slo-ms", type=float, default=250.0, help="Login latency SLO (p50)."
+    )
+    parser.add_argument(
+        "--hash-share",
+        type=float,
+        default=0.5,
+        help="Fraction of the SLO the hash may use; the rest covers DB/network.",
+    )
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("AUTH_HASH_WORKERS", str(min(4, os.cpu_count() or 1)))),
+        help="Hash pool size used for the capacity check.",
+    )
+    parser.add_argument(
+        "--peak-logins-per-second",
+        type=float,
+        help="Expected peak login rate; warns if the pool cannot keep up.",
+    )
+    parser.add_argument("--json", action="store_true", help="Emit JSON only.")
+    return parser.parse_args()
+
+
+def time_hash_ms(rounds: int, samples: int) -> float:
+    hasher = pbkdf2_sha256.using(rounds=rounds)
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        hasher.hash("calibration-password")
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def recommend(args: argparse.Namespace) -> dict:
+    budget_ms = args.slo_ms * args.hash_share
+    probe_ms = time_hash_ms(PROBE_ROUNDS, args.samples)
+    rounds = int(PROBE_ROUNDS * budget_ms / probe_ms) // 1000 * 1000
+    rounds = max(rounds, 1000)
+    measured_ms = time_hash_ms(rounds, args.samples)
+    capacity = args.workers * 1000 / measured_ms if measured_ms else 0.0
+    result = {
+        "slo_ms": args.slo_ms,
+        "hash_budget_ms": round(budget_ms, 1),
+        "probe": {"rounds": PROBE_ROUNDS, "ms": round(probe_ms, 2)},
+        "recommended_rounds": rounds,
+        "measured_ms": round(measured_ms, 2),
+        "workers": args.workers,
+        "max_logins_per_second": round(capacity, 1),
+        "warnings": [],
+    }
+    if rounds < OWASP_MIN_ROUNDS:
+        result["warnings"].append(
+            f"{rounds} rounds is below the OWASP guidance of {OWASP_MIN_ROUNDS}; "
+            "consider a looser SLO or faster hardware."
+        )
+    if args.peak_logins_per_second and capacity < args.peak_logins_per_second:
+        result["warnings"].append(
+            f"{args.workers} worker(s) sustain ~{capacity:.1f} logins/s, below the "
+            f"expected peak of {args.peak_logins_per_second:g}/s; add workers or "
+            "lower the rounds."
+        )
+    return result
+
+
+def main() -> None:
+    args = parse_args()
+    result = recommend(args)
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    print(
+        f"Probe: {PROBE_ROUNDS} rounds → {result['probe']['ms']:.2f} ms per hash"
+    )
+    print(
+        f"Recommended: {result['recommended_rounds']} rounds → "
+        f"{result['measured_ms']:.2f} ms (budget {result['hash_budget_ms']:.1f} ms "
+        f"of a {args.slo_ms:g} ms SLO)"
+    )
+    print(
+        f"Pool capacity with {args.workers} worker(s): "
+        f"~{result['max_logins_per_second']:.1f} logins/s"
+    )
+    for warning in result["warnings"]:
+        print(f"WARNING: {warning}")
+    print(f"\nPASSWORD_HASH_ROUNDS={result['recommended_rounds']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,12 @@
 import sqlite3
 import random
 import json
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
+from app.expiry import run_expires_at
+from app.models import created_parts
+
 DB_PATH = Path(__file__).resolve().parent / "dev.db"   # resolved absolute path
 
 # -----------------------------
@@ -110,7 +113,8 @@ def recalc_runner_points(cursor):
 
 def generate_active_runs(cursor, count):
     """Seed a set of active runs so the UI always has fresh data to show."""
-    now = datetime.now()
+    # UTC, as the API stores created_at and compares expires_at.
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
     for _ in range(count):
         runner = random.choice(USERS)
         restaurant = random.choice(RESTAURANTS)
@@ -118,6 +122,8 @@ def generate_active_runs(cursor, count):
         capacity = random.randint(2, 6)
         eta = f"{random.randint(10, 25)} mins"
         created_at = now - timedelta(minutes=random.randint(5, 90))
+        # Same deadline create_run stores, so the expiry sweep sees these runs.
+        expires_at = run_expires_at(eta, created_at).replace(tzinfo=None)
         run_id = insert_foodrun(
             cursor,
             runner,
@@ -127,6 +133,7 @@ def generate_active_runs(cursor, count):
             capacity,
             "active",
             created_at.strftime("%Y-%m-%d %H:%M:%S"),
+            expires_at.strftime("%Y-%m-%d %H:%M:%S.%f"),
         )
         pending_orders = random.randint(0, max(1, capacity - 1))
         for _ in range(pending_orders):
@@ -154,19 +161,24 @@ def generate_active_runs(cursor, count):
 # INSERT HELPERS
 # -----------------------------
 
-def insert_foodrun(cursor, runner_id, restaurant, drop_point, eta, capacity, status, created_at):
+def insert_foodrun(cursor, runner_id, restaurant, drop_point, eta, capacity, status, created_at,
+                   expires_at=None):
     cursor.execute("""
-        INSERT INTO foodrun (runner_id, restaurant, drop_point, eta, capacity, status, created_at)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    """, (runner_id, restaurant, drop_point, eta, capacity, status, created_at))
+        INSERT INTO foodrun (runner_id, restaurant, drop_point, eta, capacity, status, created_at,
+                             created_epoch, created_hour, created_weekday, expires_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (runner_id, restaurant, drop_point, eta, capacity, status, created_at,
+          *created_parts(datetime.strptime(created_at, "%Y-%m-%d %H:%M:%S")), expires_at))
     return cursor.lastrowid
 
 
 def insert_order(cursor, run_id, user_id, items, amount, status, pin, created_at):
     cursor.execute("""
-        INSERT INTO "order" (run_id, user_id, items, amount, status, pin, created_at)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    """, (run_id, user_id, items, amount, status, pin, created_at))
+        INSERT INTO "order" (run_id, user_id, items, amount, status, pin, created_at,
+                             created_epoch, created_hour, created_weekday)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (run_id, user_id, items, amount, status, pin, created_at,
+          *created_parts(datetime.strptime(created_at, "%Y-%m-%d %H:%M:%S"))))
 
 
 # -----------------------------
@@ -3,6 +3,9 @@ import sys
 from pathlib import Path
 import pytest
 
+# Tests drain the job queue explicitly; keep the API's background drain off.
+os.environ.setdefault("JOB_QUEUE_IN_PROCESS", "0")
+
 
 @pytest.fixture(scope="session")
 def test_db_url(tmp_path_factory):
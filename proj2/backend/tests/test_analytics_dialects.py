@@ -0,0 +1,226 @@
+"""Analytics parity across backends.
+
+SQLite always runs. PostgreSQL runs when TEST_POSTGRES_URL points at a
+throwaway database (its tables are dropped and recreated), e.g.
+``TEST_POSTGRES_URL=postgresql://postgres@localhost/analytics_test``.
+"""
+
+import os
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import column, create_engine, insert, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import Session, SQLModel, select
+
+from app import analytics, db, forecasting
+from app.models import (
+    FoodRun,
+    Order,
+    User,
+    created_parts,
+    foodrun_archive,
+    order_archive,
+)
+from app.sqltime import day_of_week, epoch_seconds, hour_of_day
+
+POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+
+def _at(day, hour, minute):
+    return datetime(2025, 6, day, hour, minute, tzinfo=timezone.utc)
+
+
+def _stamped(created_at):
+    # Core inserts bypass the ORM before_insert hook that fills these.
+    epoch, hour, weekday = created_parts(created_at)
+    return dict(
+        created_at=created_at,
+        created_epoch=epoch,
+        created_hour=hour,
+        created_weekday=weekday,
+    )
+
+
+@pytest.fixture(params=["sqlite", "postgresql"])
+def engine(request, tmp_path):
+    if request.param == "sqlite":
+        eng = create_engine(f"sqlite:///{(tmp_path / 'a.db').as_posix()}")
+    else:
+        if not POSTGRES_URL:
+            pytest.skip("TEST_POSTGRES_URL not set")
+        pytest.importorskip("psycopg2")
+        eng = create_engine(POSTGRES_URL)
+        SQLModel.metadata.drop_all(eng)
+        with eng.begin() as conn:
+            conn.execute(text("DROP TABLE IF EXISTS schema_version"))
+    # The migration runner is part of what must work on both backends.
+    db.run_migrations(eng)
+    yield eng
+    eng.dispose()
+
+
+@pytest.fixture()
+def session(engine):
+    with Session(engine) as s:
+        s.add(User(id=1, email="runner@ncsu.edu", password_hash="x"))
+        s.flush()
+        runs = [
+            (1, _at(2, 9, 15), "completed", 4),
+            (2, _at(2, 9, 45), "active", 2),
+            (3, _at(3, 17, 5), "cancelled", 3),
+        ]
+        for run_id, created, status, capacity in runs:
+            s.add(
+                FoodRun(
+                    id=run_id,
+                    runner_id=1,
+                    restaurant="Cafe",
+                    drop_point="Hunt",
+                    eta="5",
+                    capacity=capacity,
+                    status=status,
+                    created_at=created,
+                )
+            )
+        s.flush()
+        for order_id, (run_id, created) in enumerate(
+            [(1, _at(2, 9, 20)), (2, _at(2, 9, 50)), (3, _at(3, 17, 10))], 1
+        ):
+            s.add(
+                Order(
+                    id=order_id,
+                    run_id=run_id,
+                    user_id=1,
+                    items="Tea",
+                    amount=2,
+                    created_at=created,
+                )
+            )
+        s.execute(
+            insert(foodrun_archive).values(
+                id=10,
+                runner_id=1,
+                restaurant="Cafe",
+                drop_point="Hunt",
+                eta="5",
+                capacity=5,
+                status="completed",
+                **_stamped(_at(1, 9, 30)),
+            )
+        )
+        s.execute(
+            insert(order_archive).values(
+                id=10,
+                run_id=10,
+                user_id=1,
+                items="Tea",
+                amount=2,
+                tip=0,
+                status="delivered",
+                **_stamped(_at(1, 9, 35)),
+            )
+        )
+        s.commit()
+        yield s
+
+
+def test_hourly_timeseries(session):
+    assert analytics.fetch_hourly_timeseries(session) == [
+        {
+            "hour_block": "2025-06-01 09:00:00",
+            "run_count": 1,
+            "completed_runs": 1,
+            "total_capacity": 5,
+            "order_count": 1,
+            "utilization": 0.2,
+        },
+        {
+            "hour_block": "2025-06-02 09:00:00",
+            "run_count": 2,
+            "completed_runs": 1,
+            "total_capacity": 6,
+            "order_count": 2,
+            "utilization": 0.333,
+        },
+        {
+            "hour_block": "2025-06-03 17:00:00",
+            "run_count": 1,
+            "completed_runs": 0,
+            "total_capacity": 3,
+            "order_count": 1,
+            "utilization": 0.333,
+        },
+    ]
+
+
+def test_hourly_profile_and_day_counts(session):
+    assert analytics._get_distinct_day_count(session, analytics._all_runs()) == 3
+    assert analytics._get_distinct_day_count(session, analytics._all_orders()) == 3
+    profile = {
+        entry["hour"]: entry for entry in analytics.build_hourly_profile(session)
+    }
+    assert len(profile) == 24
+    assert profile[9] == {
+        "hour": 9,
+        "avg_orders_per_day": 1.0,
+        "avg_runs_per_day": 1.0,
+        "avg_capacity_per_day": 3.667,
+        "utilization_ratio": 0.273,
+        "demand_score": 0.927,
+    }
+    assert profile[17]["avg_orders_per_day"] == 0.333
+    assert profile[12]["demand_score"] == 0.0
+
+
+def test_seasonal_profile(session):
+    monday = forecasting.seasonal_profile(session, weekday=1, now=_at(8, 0, 0))
+    assert monday[9]["avg_runs_per_day"] == 2.0
+    assert monday[9]["avg_orders_per_day"] == 2.0
+    assert monday[17]["avg_runs_per_day"] == 0.0
+    # The archived run was on Sunday 2025-06-01.
+    sunday = forecasting.seasonal_profile(session, weekday=0, now=_at(8, 0, 0))
+    assert sunday[9]["avg_capacity_per_day"] == 5.0
+
+
+def test_orm_inserts_are_stamped(session):
+    run = session.get(FoodRun, 3)
+    # 2025-06-03 was a Tuesday.
+    assert (run.created_hour, run.created_weekday) == (17, 2)
+    assert run.created_epoch == int(_at(3, 17, 5).timestamp())
+    fresh = FoodRun(id=4, runner_id=1, restaurant="Cafe", drop_point="Hunt", eta="5")
+    session.add(fresh)
+    session.commit()
+    assert fresh.created_at is not None
+    assert fresh.created_epoch == created_parts(fresh.created_at)[0]
+
+
+def test_backfill_matches_orm_stamp(engine, session):
+    # Migration 10's SQL backfill must agree with models.created_parts.
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE foodrun SET created_epoch = NULL"))
+    with engine.begin() as conn:
+        db._migrate_created_parts(conn)
+    session.expire_all()
+    for run in session.exec(select(FoodRun)).all():
+        assert (
+            run.created_epoch,
+            run.created_hour,
+            run.created_weekday,
+        ) == created_parts(run.created_at)
+
+
+@pytest.mark.parametrize(
+    "construct, sqlite_sql, postgres_sql",
+    [
+        (epoch_seconds, "CAST(strftime('%s', created_at) AS INTEGER)", "EPOCH FROM"),
+        (hour_of_day, "CAST(strftime('%H', created_at) AS INTEGER)", "EXTRACT(HOUR"),
+        (day_of_week, "CAST(strftime('%w', created_at) AS INTEGER)", "EXTRACT(DOW"),
+    ],
+)
+def test_constructs_render_per_dialect(construct, sqlite_sql, postgres_sql):
+    expr = construct(column("created_at"))
+    assert str(expr.compile(dialect=sqlite.dialect())) == sqlite_sql
+    rendered = str(expr.compile(dialect=postgresql.dialect()))
+    assert postgres_sql in rendered
+    assert "strftime" not in rendered
@@ -0,0 +1,137 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, func
+from sqlmodel import Session, SQLModel, select
+
+from app import changes  # noqa: F401  (registers change-counter hooks)
+from app import analytics, archive, queries
+from app.models import (
+    ChangeCounter,
+    FoodRun,
+    Order,
+    RunnerReward,
+    User,
+    foodrun_archive,
+    order_archive,
+    runnerreward_archive,
+)
+
+NOW = datetime(2025, 6, 2, 12, 0, tzinfo=timezone.utc)
+OLD = (NOW - timedelta(days=40)).replace(tzinfo=None)
+RECENT = (NOW - timedelta(days=1)).replace(tzinfo=None)
+
+
+@pytest.fixture()
+def session():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as s:
+        s.add_all(
+            [
+                User(id=1, email="runner@ncsu.edu", password_hash="x"),
+                User(id=2, email="joiner@ncsu.edu", password_hash="y"),
+                ChangeCounter(table_name="foodrun", version=0),
+            ]
+        )
+        # 1-3 old and finished, 4 old but active, 5 recent and finished,
+        # 6 old and finished but holding the highest id.
+        runs = [
+            (1, "completed", OLD),
+            (2, "cancelled", OLD),
+            (3, "expired", OLD),
+            (4, "active", OLD),
+            (5, "completed", RECENT),
+            (6, "completed", OLD),
+        ]
+        for run_id, status, created in runs:
+            s.add(
+                FoodRun(
+                    id=run_id,
+                    runner_id=1,
+                    restaurant=f"R{run_id}",
+                    drop_point="Hunt",
+                    eta="5",
+                    status=status,
+                    created_at=created,
+                )
+            )
+            s.add(
+                Order(
+                    run_id=run_id,
+                    user_id=2,
+                    items="Tea",
+                    amount=2,
+                    pin=f"{run_id}" * 4,
+                    created_at=created,
+                )
+            )
+        s.add(RunnerReward(runner_id=1, run_id=1, points=5, awarded_at=OLD))
+        s.add(RunnerReward(runner_id=1, run_id=5, points=3, awarded_at=RECENT))
+        s.commit()
+        yield s
+
+
+def _ids(session, table):
+    return sorted(session.exec(select(table.c.id)).all())
+
+
+def test_archives_old_finished_runs_with_orders_and_rewards(session):
+    moved = archive.archive_finished_runs(session, now=NOW, batch_size=2)
+
+    assert moved == 3
+    assert _ids(session, FoodRun.__table__) == [4, 5, 6]
+    assert _ids(session, foodrun_archive) == [1, 2, 3]
+    assert sorted(session.exec(select(order_archive.c.run_id)).all()) == [1, 2, 3]
+    assert session.exec(select(func.count()).select_from(Order)).one() == 3
+    assert _ids(session, runnerreward_archive) == [1]
+    assert session.exec(select(func.count()).select_from(RunnerReward)).one() == 1
+    # Deleting from the live tables invalidates run-list ETags.
+    assert session.get(ChangeCounter, "foodrun").version >= 2
+    assert archive.archive_finished_runs(session, now=NOW) == 0
+
+
+def test_newest_run_stays_live_so_ids_are_not_reused(session):
+    archive.archive_finished_runs(session, now=NOW)
+    session.add(
+        FoodRun(runner_id=1, restaurant="New", drop_point="Hunt", eta="5")
+    )
+    session.commit()
+    new_id = session.exec(select(func.max(FoodRun.id))).one()
+    assert new_id == 7
+    assert new_id not in _ids(session, foodrun_archive)
+
+
+def test_history_and_analytics_read_archived_rows(session):
+    before_mine = queries.archived_runner_runs(session, 1, "runner@ncsu.edu")
+    before_joined = queries.joined_runs_history(session, 2)
+    before_hours = analytics.fetch_hourly_timeseries(session)
+    archive.archive_finished_runs(session, now=NOW)
+
+    live = queries.load_runs_with_orders(
+        session,
+        FoodRun.runner_id == 1,
+        ~queries.active_status_clause(),
+        live_orders_only=False,
+        newest_first=True,
+    )
+    mine = list(
+        queries.newest_first(
+            [queries.runner_run_payload(r, "runner@ncsu.edu", 0) for r in live],
+            queries.archived_runner_runs(session, 1, "runner@ncsu.edu"),
+        )
+    )
+    assert before_mine == []
+    assert [run["id"] for run in mine] == [6, 5, 3, 2, 1]
+    assert mine[-1]["orders"][0]["user_email"] == "joiner@ncsu.edu"
+
+    joined = queries.joined_runs_history(session, 2)
+    assert joined == before_joined
+    assert [run["id"] for run in joined] == [6, 5, 3, 2, 1]
+    assert joined[-1]["my_order"]["pin"] == "1111"
+    streamed = list(queries.iter_joined_runs_history(session, 2, batch_size=2))
+    assert streamed == joined
+
+    assert analytics.fetch_hourly_timeseries(session) == before_hours
+    rewards = analytics.list_recent_rewards(session)
+    assert [(r.run_id, r.points) for r in rewards] == [(5, 3), (1, 5)]
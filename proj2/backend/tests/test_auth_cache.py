@@ -0,0 +1,70 @@
+import time
+from types import SimpleNamespace
+
+from conftest import register_and_login, auth_headers
+from app.auth import TokenCache, get_current_user, token_cache
+
+
+def test_token_cache_evicts_least_recently_used():
+    cache = TokenCache(maxsize=2)
+    exp = time.time() + 60
+    cache.put("a", {"sub": "1", "exp": exp})
+    cache.put("b", {"sub": "2", "exp": exp})
+    assert cache.get("a")["sub"] == "1"
+    cache.put("c", {"sub": "3", "exp": exp})
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+
+def test_token_cache_drops_expired_claims():
+    cache = TokenCache(maxsize=4)
+    cache.put("old", {"sub": "1", "exp": time.time() - 1})
+    assert cache.get("old") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_repeat_requests_hit_the_claims_cache(app_client):
+    token, _ = register_and_login(app_client, "claims_cache@ncsu.edu")
+    app_client.get("/auth/me", headers=auth_headers(token))
+    before = token_cache.stats()["hits"]
+    for _ in range(3):
+        r = app_client.get("/auth/me", headers=auth_headers(token))
+        assert r.status_code == 200
+    assert token_cache.stats()["hits"] >= before + 3
+    metrics = app_client.get("/metrics").json()
+    assert metrics["auth"]["token_cache"]["hit_rate"] > 0
+
+
+def test_current_user_is_loaded_once_per_request():
+    calls = []
+
+    class FakeSession:
+        def get(self, model, ident):
+            calls.append(ident)
+            return SimpleNamespace(id=ident, email="x@ncsu.edu")
+
+    request = SimpleNamespace(state=SimpleNamespace())
+    first = get_current_user(request, {"sub": "7"}, FakeSession())
+    second = get_current_user(request, {"sub": "7"}, FakeSession())
+    assert first is second
+    assert calls == [7]
+
+
+def _dependency_calls(dependant):
+    for dep in dependant.dependencies:
+        yield dep.call
+        yield from _dependency_calls(dep)
+
+
+def test_join_run_loads_the_caller_on_its_write_session():
+    from app.db import get_read_session, get_write_session
+    from app.main import app
+
+    (route,) = [
+        r
+        for r in app.routes
+        if getattr(r, "path", None) == "/runs/{run_id}/orders"
+        and "POST" in r.methods
+    ]
+    calls = set(_dependency_calls(route.dependant))
+    assert get_write_session in calls and get_read_session not in calls
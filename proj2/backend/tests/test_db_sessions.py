@@ -0,0 +1,67 @@
+import pytest
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from conftest import register_and_login, auth_headers
+
+
+def test_read_and_write_sessions_use_separate_engines(app_client):
+    from app import db
+
+    write_gen = db.get_write_session()
+    read_gen = db.get_read_session()
+    write = next(write_gen)
+    read = next(read_gen)
+    try:
+        assert write.get_bind() is db.engine
+        assert read.get_bind() is db.read_engine
+        assert db.read_engine is not db.engine
+        assert db.read_engine.pool is not db.engine.pool
+    finally:
+        write_gen.close()
+        read_gen.close()
+
+
+def test_read_endpoints_see_committed_writes(app_client):
+    token, _ = register_and_login(app_client, "rw_split@ncsu.edu")
+    r = app_client.post(
+        "/runs",
+        json={"restaurant": "Split", "drop_point": "Hunt", "eta": "5 PM"},
+        headers=auth_headers(token),
+    )
+    assert r.status_code == 200
+    mine = app_client.get("/runs/mine", headers=auth_headers(token)).json()
+    assert any(run["id"] == r.json()["id"] for run in mine)
+
+
+def test_read_only_sqlite_uri_rejects_writes(tmp_path):
+    # Engines built the way app.db builds them, without touching its globals.
+    from app.db import _connect_args
+    from app.models import User
+    from app.pool import engine_kwargs
+
+    db_file = (tmp_path / "ro.db").as_posix()
+    write_url = f"sqlite:///{db_file}"
+    read_url = f"sqlite:///file:{db_file}?mode=ro&uri=true"
+    write_engine = create_engine(
+        write_url, connect_args=_connect_args(write_url), **engine_kwargs(write_url)
+    )
+    read_engine = create_engine(
+        read_url,
+        connect_args=_connect_args(read_url),
+        **engine_kwargs(read_url, prefix="DB_READ_"),
+    )
+    try:
+        SQLModel.metadata.create_all(write_engine)
+        with Session(write_engine) as session:
+            session.add(User(email="ro@ncsu.edu", password_hash="x"))
+            session.commit()
+
+        with Session(read_engine) as read:
+            assert read.exec(select(User)).first().email == "ro@ncsu.edu"
+            read.add(User(email="nope@ncsu.edu", password_hash="x"))
+            with pytest.raises(OperationalError):
+                read.commit()
+    finally:
+        read_engine.dispose()
+        write_engine.dispose()
@@ -72,6 +72,8 @@ def test_joined_runs_returns_empty():
 
 
 def test_joined_history_returns_empty():
+    from starlette.requests import Request
+
     from app import main
 
     class DummyResult:
@@ -82,7 +84,8 @@ def test_joined_history_returns_empty():
         def exec(self, _query):
             return DummyResult()
 
-    result = main.list_joined_runs_history({"sub": "1"}, DummySession())
+    request = Request({"type": "http", "headers": []})
+    result = main.list_joined_runs_history(request, {"sub": "1"}, DummySession())
     assert result == []
 
 
@@ -0,0 +1,91 @@
+from sqlalchemy import update
+from sqlmodel import Session
+
+from conftest import register_and_login, auth_headers
+
+
+def _versions(*tables):
+    from app import db
+    from app.changes import table_versions
+
+    with Session(db.engine) as session:
+        return table_versions(session, tables)
+
+
+def test_unchanged_list_poll_gets_304(app_client):
+    token, _ = register_and_login(app_client, "etag_poller@ncsu.edu")
+    first = app_client.get("/runs/available", headers=auth_headers(token))
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert etag.startswith('W/"')
+    assert first.headers["cache-control"] == "private, no-cache"
+
+    again = app_client.get(
+        "/runs/available", headers={**auth_headers(token), "If-None-Match": etag}
+    )
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == etag
+
+
+def test_writes_change_the_etag(app_client):
+    runner, _ = register_and_login(app_client, "etag_runner@ncsu.edu")
+    joiner, _ = register_and_login(app_client, "etag_joiner@ncsu.edu")
+    before = app_client.get("/runs/joined", headers=auth_headers(joiner))
+    run = app_client.post(
+        "/runs",
+        json={"restaurant": "Deli", "drop_point": "Quad", "eta": "5", "capacity": 2},
+        headers=auth_headers(runner),
+    ).json()
+    app_client.post(
+        f"/runs/{run['id']}/orders",
+        json={"items": "Wrap", "amount": 7},
+        headers=auth_headers(joiner),
+    )
+    after = app_client.get(
+        "/runs/joined",
+        headers={**auth_headers(joiner), "If-None-Match": before.headers["etag"]},
+    )
+    assert after.status_code == 200
+    assert after.headers["etag"] != before.headers["etag"]
+    assert run["id"] in [r["id"] for r in after.json()]
+
+
+def test_etag_is_scoped_per_user(app_client):
+    a, _ = register_and_login(app_client, "etag_a@ncsu.edu")
+    b, _ = register_and_login(app_client, "etag_b@ncsu.edu")
+    tag_a = app_client.get("/runs/mine", headers=auth_headers(a)).headers["etag"]
+    resp_b = app_client.get(
+        "/runs/mine", headers={**auth_headers(b), "If-None-Match": tag_a}
+    )
+    assert resp_b.status_code == 200
+
+
+def test_peak_forecast_supports_conditional_get(app_client):
+    first = app_client.get("/analytics/peak-forecast")
+    again = app_client.get(
+        "/analytics/peak-forecast", headers={"If-None-Match": first.headers["etag"]}
+    )
+    assert again.status_code == 304
+
+
+def test_bulk_update_bumps_counter(app_client):
+    from app import db
+    from app.models import FoodRun
+
+    before = _versions("foodrun")["foodrun"]
+    with Session(db.engine) as session:
+        session.exec(update(FoodRun).where(FoodRun.id == -1).values(status="active"))
+        session.commit()
+    assert _versions("foodrun")["foodrun"] == before + 1
+
+
+def test_etag_matching_rules():
+    from app.changes import etag_matches
+
+    assert etag_matches('W/"s7-all-1"', 'W/"s7-all-1"')
+    assert etag_matches('"s7-all-1"', 'W/"s7-all-1"')
+    assert etag_matches('W/"x", W/"s7-all-1"', 'W/"s7-all-1"')
+    assert etag_matches("*", 'W/"s7-all-1"')
+    assert not etag_matches(None, 'W/"s7-all-1"')
+    assert not etag_matches('W/"s7-all-2"', 'W/"s7-all-1"')
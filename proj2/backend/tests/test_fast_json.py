@@ -0,0 +1,77 @@
+import json
+from datetime import datetime
+from typing import List
+
+import pytest
+from pydantic import TypeAdapter
+
+from conftest import register_and_login, auth_headers
+from app.responses import dumps, stdlib_dumps
+from app.schemas import FeedResponse, FoodRunResponse
+
+
+def _validated(model, body):
+    adapter = TypeAdapter(model)
+    return adapter.dump_python(adapter.validate_python(body), mode="json")
+
+
+@pytest.fixture(scope="module")
+def seeded(app_client):
+    runner, _ = register_and_login(app_client, "fastjson_runner@ncsu.edu")
+    joiner, _ = register_and_login(app_client, "fastjson_joiner@ncsu.edu")
+    runs = []
+    for capacity in (2, 3):
+        run = app_client.post(
+            "/runs",
+            json={
+                "restaurant": "Taco",
+                "drop_point": "Library",
+                "eta": "15",
+                "capacity": capacity,
+            },
+            headers=auth_headers(runner),
+        ).json()
+        app_client.post(
+            f"/runs/{run['id']}/orders",
+            json={"items": "Burrito", "amount": 9, "tip": 1},
+            headers=auth_headers(joiner),
+        )
+        runs.append(run)
+    app_client.put(f"/runs/{runs[0]['id']}/complete", headers=auth_headers(runner))
+    return runner, joiner
+
+
+@pytest.mark.parametrize(
+    "path, who",
+    [
+        ("/runs", 0),
+        ("/runs/available", 1),
+        ("/runs/mine", 0),
+        ("/runs/mine/history", 0),
+    ],
+)
+def test_prebuilt_lists_match_response_model(app_client, seeded, path, who):
+    resp = app_client.get(path, headers=auth_headers(seeded[who]))
+    assert resp.status_code == 200
+    assert resp.headers["content-type"] == "application/json"
+    body = resp.json()
+    assert body, f"{path} returned no rows to compare"
+    assert body == _validated(List[FoodRunResponse], body)
+
+
+def test_prebuilt_feed_matches_response_model(app_client, seeded):
+    body = app_client.get("/feed", headers=auth_headers(seeded[1])).json()
+    expected = TypeAdapter(FeedResponse).validate_python(body)
+    assert body == expected.model_dump(mode="json", exclude_unset=True)
+
+
+def test_stdlib_fallback_matches_fast_path():
+    payload = {
+        "name": "Café",
+        "when": datetime(2024, 5, 1, 12, 30),
+        "values": [1, 2.5, None, True],
+    }
+    assert json.loads(stdlib_dumps(payload)) == json.loads(dumps(payload))
+    assert json.loads(stdlib_dumps(payload))["when"] == "2024-05-01T12:30:00"
+    with pytest.raises(TypeError):
+        stdlib_dumps({"bad": object()})
@@ -0,0 +1,88 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from conftest import register_and_login, auth_headers
+
+
+@contextmanager
+def count_statements():
+    from app import main
+
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(main.read_engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(main.read_engine, "before_cursor_execute", record)
+
+
+def _make_runs(client, runner, joiner, count):
+    for i in range(count):
+        run = client.post(
+            "/runs",
+            json={
+                "restaurant": f"R{i}",
+                "drop_point": "Hub",
+                "eta": "5",
+                "capacity": 3,
+            },
+            headers=auth_headers(runner),
+        ).json()
+        client.post(
+            f"/runs/{run['id']}/orders",
+            json={"items": "Snack", "amount": 2},
+            headers=auth_headers(joiner),
+        )
+
+
+def test_feed_matches_individual_endpoints(app_client):
+    runner, _ = register_and_login(app_client, "feed_runner@ncsu.edu")
+    joiner, _ = register_and_login(app_client, "feed_joiner@ncsu.edu")
+    _make_runs(app_client, runner, joiner, 2)
+    headers = auth_headers(joiner)
+
+    feed = app_client.get("/feed", headers=headers)
+    assert feed.status_code == 200
+    body = feed.json()
+    for section, path in (
+        ("available", "/runs/available"),
+        ("joined", "/runs/joined"),
+        ("points", "/points"),
+    ):
+        assert body[section] == app_client.get(path, headers=headers).json()
+    assert isinstance(body["peak_hours"], list)
+
+
+def test_feed_sections_are_selectable(app_client):
+    token, _ = register_and_login(app_client, "feed_partial@ncsu.edu")
+    body = app_client.get(
+        "/feed?sections=joined,points", headers=auth_headers(token)
+    ).json()
+    assert set(body) == {"joined", "points"}
+
+    bad = app_client.get("/feed?sections=runs", headers=auth_headers(token))
+    assert bad.status_code == 422
+
+
+def test_feed_statement_count_does_not_grow_with_runs(app_client):
+    from app.analytics import peak_hours_snapshot
+
+    runner, _ = register_and_login(app_client, "feed_scale_runner@ncsu.edu")
+    joiner, _ = register_and_login(app_client, "feed_scale_joiner@ncsu.edu")
+    peak_hours_snapshot.update([])
+    headers = auth_headers(joiner)
+
+    _make_runs(app_client, runner, joiner, 1)
+    with count_statements() as few:
+        app_client.get("/feed", headers=headers)
+    _make_runs(app_client, runner, joiner, 5)
+    with count_statements() as many:
+        app_client.get("/feed", headers=headers)
+
+    assert len(many) == len(few)
+    assert len(many) <= 5
@@ -0,0 +1,125 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, delete
+from sqlmodel import Session, SQLModel, select
+
+from app import analytics, forecasting
+from app.models import FoodRun, ForecastCell, Order, User, created_parts
+
+MONDAY = datetime(2025, 6, 2, tzinfo=timezone.utc)
+NOW = MONDAY + timedelta(weeks=4)
+NOON = 12
+
+
+def _cells(session):
+    return {
+        (c.weekday, c.hour): (c.orders, c.runs, c.capacity, c.observations)
+        for c in session.exec(select(ForecastCell)).all()
+    }
+
+
+@pytest.fixture()
+def engine(tmp_path):
+    eng = create_engine(f"sqlite:///{(tmp_path / 'f.db').as_posix()}")
+    SQLModel.metadata.create_all(eng)
+    with Session(eng) as s:
+        s.add(User(id=1, email="runner@ncsu.edu", password_hash="x"))
+        # Four weeks of busy Monday lunches and quiet Saturday lunches.
+        for week in range(4):
+            monday = MONDAY + timedelta(weeks=week, hours=NOON)
+            saturday = monday + timedelta(days=5)
+            slots = [(monday, 3, 2), (saturday, 1, 1)]
+            for start, runs, orders_per_run in slots:
+                for n in range(runs):
+                    run = FoodRun(
+                        runner_id=1,
+                        restaurant="Cafe",
+                        drop_point="Hunt",
+                        eta="5",
+                        capacity=4,
+                        status="completed",
+                        created_at=start + timedelta(minutes=n),
+                    )
+                    s.add(run)
+                    s.flush()
+                    for k in range(orders_per_run):
+                        s.add(
+                            Order(
+                                run_id=run.id,
+                                user_id=1,
+                                items="Tea",
+                                amount=2,
+                                created_at=start + timedelta(minutes=10 + k),
+                            )
+                        )
+        s.commit()
+    yield eng
+    eng.dispose()
+
+
+@pytest.fixture()
+def session(engine):
+    with Session(engine) as s:
+        yield s
+
+
+def test_hour_slot_matches_created_parts():
+    for offset in range(0, 24 * 8, 5):
+        moment = MONDAY + timedelta(hours=offset)
+        epoch, hour, weekday = created_parts(moment)
+        assert forecasting.hour_slot(epoch // 3600) == (weekday, hour)
+
+
+def test_weekdays_and_weekends_are_forecast_separately(session):
+    assert forecasting.refresh_forecast(session, now=NOW) > 0
+    monday = forecasting.seasonal_profile(session, weekday=1, now=NOW)[NOON]
+    saturday = forecasting.seasonal_profile(session, weekday=6, now=NOW)[NOON]
+    assert monday["avg_orders_per_day"] == 6.0
+    assert monday["avg_runs_per_day"] == 3.0
+    assert saturday["avg_orders_per_day"] == 1.0
+    # The all-days profile blends both into one number.
+    blended = analytics.build_hourly_profile(session)[NOON]["avg_orders_per_day"]
+    assert saturday["avg_orders_per_day"] < blended < monday["avg_orders_per_day"]
+
+
+def test_refresh_only_folds_new_hours(session):
+    halfway = NOW - timedelta(weeks=2)
+    first = forecasting.refresh_forecast(session, now=halfway)
+    assert forecasting.refresh_forecast(session, now=halfway) == 0
+    assert forecasting.refresh_forecast(session, now=NOW) == 2 * 168
+    incremental = _cells(session)
+
+    session.exec(delete(ForecastCell))
+    session.commit()
+    assert forecasting.refresh_forecast(session, now=NOW) == first + 2 * 168
+    assert _cells(session) == pytest.approx(incremental)
+
+
+def test_quiet_weeks_decay(session):
+    forecasting.refresh_forecast(session, now=NOW)
+    forecasting.refresh_forecast(session, now=NOW + timedelta(weeks=1))
+    monday = session.get(ForecastCell, (1, NOON))
+    assert monday.orders == pytest.approx(6 * (1 - forecasting.FORECAST_ALPHA))
+
+
+def test_seasonal_profile_is_read_only(session):
+    before = forecasting.seasonal_profile(session, weekday=1, now=NOW)
+    assert session.exec(select(ForecastCell)).first() is None
+    forecasting.refresh_forecast(session, now=NOW - timedelta(weeks=1))
+    # Pending hours are folded in memory, matching a full refresh.
+    assert forecasting.seasonal_profile(session, weekday=1, now=NOW) == before
+    assert max(c.through_hour for c in session.exec(select(ForecastCell))) < (
+        forecasting.current_hour(NOW) - 1
+    )
+
+
+def test_concurrent_refresh_folds_each_hour_once(engine):
+    with Session(engine) as s:
+        forecasting.refresh_forecast(s, now=NOW - timedelta(weeks=1))
+    with Session(engine) as slow, Session(engine) as fast:
+        slow.exec(select(ForecastCell)).all()  # loaded before the race
+        assert forecasting.refresh_forecast(fast, now=NOW) == 168
+        assert forecasting.refresh_forecast(slow, now=NOW) == 0
+    with Session(engine) as s:
+        assert s.get(ForecastCell, (1, NOON)).observations == 4
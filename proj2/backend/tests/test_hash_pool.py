@@ -0,0 +1,51 @@
+import asyncio
+
+from app.hashing import HashPool, HashPoolBusy, hash_password, verify_password
+
+
+def test_process_pool_hashes_and_verifies():
+    pool = HashPool(workers=1, max_pending=4)
+    try:
+        hashed = asyncio.run(pool.run(hash_password, "s3cret"))
+        assert asyncio.run(pool.run(verify_password, "s3cret", hashed))
+        assert not asyncio.run(pool.run(verify_password, "wrong", hashed))
+        assert pool.stats()["completed"] == 3
+    finally:
+        pool.shutdown()
+
+
+def test_inline_mode_runs_without_processes():
+    pool = HashPool(workers=0, max_pending=4)
+    hashed = asyncio.run(pool.run(hash_password, "pw"))
+    assert verify_password("pw", hashed)
+    assert pool._executor is None
+
+
+def test_full_queue_sheds_load():
+    pool = HashPool(workers=0, max_pending=1)
+
+    async def burst():
+        return await asyncio.gather(
+            pool.run(hash_password, "a"),
+            pool.run(hash_password, "b"),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(burst())
+    assert any(isinstance(r, HashPoolBusy) for r in results)
+    assert pool.stats()["rejected"] == 1
+
+
+def test_login_maps_busy_pool_to_503(app_client, monkeypatch):
+    from app import hashing
+
+    app_client.post(
+        "/auth/register", json={"email": "busy@ncsu.edu", "password": "pw"}
+    )
+    monkeypatch.setattr(hashing.hash_pool, "max_pending", 0)
+    r = app_client.post(
+        "/auth/login", json={"email": "busy@ncsu.edu", "password": "pw"}
+    )
+    assert r.status_code == 503
+    assert r.headers["retry-after"] == "1"
+    assert app_client.get("/metrics").json()["auth"]["hash_pool"]["rejected"] >= 1
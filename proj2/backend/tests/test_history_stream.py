@@ -0,0 +1,57 @@
+import json
+
+from conftest import register_and_login, auth_headers
+
+NDJSON = {"Accept": "application/x-ndjson"}
+
+
+def _finished_runs(client, runner, joiner, count):
+    for i in range(count):
+        run = client.post(
+            "/runs",
+            json={
+                "restaurant": f"H{i}",
+                "drop_point": "Hub",
+                "eta": "5",
+                "capacity": 3,
+            },
+            headers=auth_headers(runner),
+        ).json()
+        client.post(
+            f"/runs/{run['id']}/orders",
+            json={"items": "Snack", "amount": 2},
+            headers=auth_headers(joiner),
+        )
+        assert (
+            client.put(
+                f"/runs/{run['id']}/cancel", headers=auth_headers(runner)
+            ).status_code
+            == 200
+        )
+
+
+def _lines(response):
+    return [json.loads(line) for line in response.text.splitlines() if line]
+
+
+def test_history_streams_same_runs_as_ndjson(app_client, monkeypatch):
+    from app import queries
+
+    # Small batches so the stream spans several cursor fetches.
+    monkeypatch.setattr(queries, "HISTORY_STREAM_BATCH", 2)
+    runner, _ = register_and_login(app_client, "stream_runner@ncsu.edu")
+    joiner, _ = register_and_login(app_client, "stream_joiner@ncsu.edu")
+    _finished_runs(app_client, runner, joiner, 5)
+
+    for token, path in (
+        (runner, "/runs/mine/history"),
+        (joiner, "/runs/joined/history"),
+    ):
+        plain = app_client.get(path, headers=auth_headers(token))
+        streamed = app_client.get(path, headers={**auth_headers(token), **NDJSON})
+        assert streamed.status_code == 200
+        assert streamed.headers["content-type"].startswith("application/x-ndjson")
+        rows = _lines(streamed)
+        assert rows == plain.json()
+        ids = [row["id"] for row in rows]
+        assert len(ids) >= 5 and ids == sorted(ids, reverse=True)
@@ -0,0 +1,276 @@
+import json
+
+import pytest
+from sqlalchemy import create_engine
+from sqlmodel import Session, SQLModel, select
+
+from conftest import auth_headers, register_and_login
+
+from app import analytics, jobqueue, tasks
+from app.models import FoodRun, QueuedJob, RunnerReward, User
+
+NOW = 1_750_000_000.0
+
+
+@pytest.fixture()
+def engine(tmp_path):
+    eng = create_engine(f"sqlite:///{(tmp_path / 'q.db').as_posix()}")
+    SQLModel.metadata.create_all(eng)
+    yield eng
+    eng.dispose()
+
+
+@pytest.fixture()
+def calls(monkeypatch):
+    seen = []
+
+    def ok(session, payload):
+        seen.append(payload)
+
+    def boom(session, payload):
+        raise ValueError("upstream down")
+
+    monkeypatch.setitem(jobqueue.HANDLERS, "ok", ok)
+    monkeypatch.setitem(jobqueue.HANDLERS, "boom", boom)
+    monkeypatch.setattr(jobqueue, "JOB_QUEUE_BACKOFF_SECONDS", 10.0)
+    return seen
+
+
+def _enqueue(engine, kind, payload=None, **kwargs):
+    with Session(engine) as s:
+        job = jobqueue.enqueue(s, kind, payload, now=NOW, **kwargs)
+        s.commit()
+        return job.id if job else None
+
+
+def _jobs(engine):
+    with Session(engine) as s:
+        return s.exec(select(QueuedJob).order_by(QueuedJob.id)).all()
+
+
+def test_success_runs_once_and_deletes(engine, calls):
+    _enqueue(engine, "ok", {"n": 1})
+    _enqueue(engine, "ok", {"n": 2}, delay=30)
+
+    assert jobqueue.drain(engine, now=NOW)["done"] == 1
+    assert calls == [{"n": 1}]
+    # The delayed job waits for its time.
+    assert [json.loads(job.payload) for job in _jobs(engine)] == [{"n": 2}]
+    jobqueue.drain(engine, now=NOW + 30)
+    assert calls == [{"n": 1}, {"n": 2}] and _jobs(engine) == []
+
+
+def test_unique_skips_a_waiting_duplicate(engine, calls):
+    assert _enqueue(engine, "ok", unique=True) is not None
+    assert _enqueue(engine, "ok", unique=True) is None
+    assert len(_jobs(engine)) == 1
+
+
+def test_failures_back_off_then_dead_letter(engine, calls):
+    _enqueue(engine, "boom", max_attempts=3)
+
+    assert jobqueue.drain(engine, now=NOW) == {
+        "done": 0,
+        "retried": 1,
+        "dead": 0,
+        "lost": 0,
+    }
+    (job,) = _jobs(engine)
+    assert job.status == "queued" and job.attempts == 1
+    assert job.last_error == "ValueError: upstream down"
+    assert NOW + 10 <= job.run_after <= NOW + 11
+    # Not due yet; the second retry waits twice as long.
+    assert jobqueue.drain(engine, now=NOW + 5)["retried"] == 0
+    jobqueue.drain(engine, now=NOW + 11)
+    (job,) = _jobs(engine)
+    assert NOW + 31 <= job.run_after <= NOW + 33
+
+    assert jobqueue.drain(engine, now=NOW + 100)["dead"] == 1
+    (job,) = _jobs(engine)
+    assert (job.status, job.attempts, job.lease_token) == ("dead", 3, None)
+    assert jobqueue.drain(engine, now=NOW + 10_000)["retried"] == 0
+
+
+def test_unknown_kind_is_dead_lettered_at_once(engine):
+    _enqueue(engine, "no-such-job")
+    assert jobqueue.drain(engine, now=NOW)["dead"] == 1
+    (job,) = _jobs(engine)
+    assert job.status == "dead" and "no handler" in job.last_error
+
+
+def test_lapsed_lease_is_reclaimed_and_stale_holder_cannot_finish(engine, calls):
+    _enqueue(engine, "ok", max_attempts=2)
+    with Session(engine) as s:
+        (crashed,) = jobqueue.lease(s, lease_seconds=60, now=NOW)
+        s.expunge(crashed)
+    with Session(engine) as s:
+        # Still leased: nobody else may take it.
+        assert jobqueue.lease(s, now=NOW + 30) == []
+        (retaken,) = jobqueue.lease(s, lease_seconds=60, now=NOW + 61)
+        assert retaken.attempts == 2 and retaken.lease_token != crashed.lease_token
+        assert jobqueue.complete(s, crashed) is False
+        assert jobqueue.complete(s, retaken) is True
+    assert _jobs(engine) == []
+
+
+def test_jobs_whose_lease_lapsed_mid_batch_are_not_run(engine, calls, monkeypatch):
+    def slow(session, payload):
+        # Another drainer finds this batch's leases lapsed and takes it over.
+        with Session(engine) as other:
+            assert len(jobqueue.lease(other, now=NOW + 61)) == 2
+
+    monkeypatch.setitem(jobqueue.HANDLERS, "slow", slow)
+    _enqueue(engine, "slow")
+    _enqueue(engine, "ok")
+
+    assert jobqueue.drain(engine, max_batches=1, now=NOW)["lost"] == 2
+    assert calls == []
+    assert [job.attempts for job in _jobs(engine)] == [2, 2]
+
+
+def test_renew_extends_only_a_live_lease(engine, calls):
+    _enqueue(engine, "ok")
+    with Session(engine) as s:
+        (job,) = jobqueue.lease(s, lease_seconds=60, now=NOW)
+        assert jobqueue.renew(s, job, lease_seconds=60, now=NOW + 50) is True
+        assert s.get(QueuedJob, job.id, populate_existing=True).lease_until == (
+            NOW + 110
+        )
+        assert jobqueue.renew(s, job, now=NOW + 111) is False
+
+
+def test_lease_expiring_on_last_attempt_is_dead_lettered(engine, calls):
+    _enqueue(engine, "ok", max_attempts=1)
+    with Session(engine) as s:
+        assert len(jobqueue.lease(s, lease_seconds=60, now=NOW)) == 1
+    assert jobqueue.drain(engine, now=NOW + 61)["done"] == 0
+    (job,) = _jobs(engine)
+    assert (job.status, job.last_error) == ("dead", "lease expired")
+    assert calls == []
+
+
+def _completed_run(engine, created_hour):
+    with Session(engine) as s:
+        s.add(User(id=1, email="runner@ncsu.edu", password_hash="x", points=3))
+        run = FoodRun(
+            runner_id=1,
+            restaurant="Cafe",
+            drop_point="Hunt",
+            eta="5",
+            status="completed",
+        )
+        s.add(run)
+        s.commit()
+        run.created_hour = created_hour
+        s.add(run)
+        s.commit()
+        return run.id
+
+
+def _peaks_at(monkeypatch, hour):
+    def fake_payload(session, sections, weekday=None):
+        return {"peak_forecast": [{"hour": hour}]}
+
+    monkeypatch.setattr(analytics, "generate_peak_payload", fake_payload)
+
+
+def test_peak_bonus_is_awarded_once(engine, monkeypatch):
+    run_id = _completed_run(engine, created_hour=12)
+    _peaks_at(monkeypatch, 12)
+    for _ in range(2):  # at-least-once delivery: a repeat is a no-op
+        _enqueue(engine, "peak_bonus", {"run_id": run_id})
+        assert jobqueue.drain(engine, now=NOW)["done"] == 1
+
+    with Session(engine) as s:
+        rewards = s.exec(select(RunnerReward)).all()
+        assert [(r.run_id, r.points) for r in rewards] == [
+            (run_id, tasks.PEAK_BONUS_POINTS)
+        ]
+        assert s.get(User, 1).points == 3 + tasks.PEAK_BONUS_POINTS
+
+
+def test_peak_bonus_racing_the_rewards_cycle_pays_once(engine, monkeypatch):
+    run_id = _completed_run(engine, created_hour=12)
+
+    raced = []
+
+    def racing_payload(session, sections, weekday=None):
+        # The hourly cycle pays the run after the job's "already rewarded?"
+        # check, as a concurrent worker would.
+        if not raced:
+            raced.append(True)
+            with Session(engine) as other:
+                issued = analytics.issue_peak_rewards(other)
+                assert [reward.run_id for reward in issued] == [run_id]
+        return {"peak_forecast": [{"hour": 12}]}
+
+    monkeypatch.setattr(analytics, "generate_peak_payload", racing_payload)
+    _enqueue(engine, "peak_bonus", {"run_id": run_id})
+    assert jobqueue.drain(engine, now=NOW)["done"] == 1
+
+    with Session(engine) as s:
+        assert len(s.exec(select(RunnerReward)).all()) == 1
+        assert s.get(User, 1).points == 3 + 5
+        assert analytics.grant_reward(s, 1, run_id, 5, "again") is False
+        assert analytics.issue_peak_rewards(s) == []
+
+
+def test_peak_bonus_skips_off_peak_runs(engine, monkeypatch):
+    run_id = _completed_run(engine, created_hour=3)
+    _peaks_at(monkeypatch, 12)
+    _enqueue(engine, "peak_bonus", {"run_id": run_id})
+    assert jobqueue.drain(engine, now=NOW)["done"] == 1
+    with Session(engine) as s:
+        assert s.exec(select(RunnerReward)).all() == []
+
+
+def test_rewards_cycle_uses_the_peaks_of_each_runs_weekday(engine, monkeypatch):
+    run_id = _completed_run(engine, created_hour=12)
+    with Session(engine) as s:
+        posted_on = s.get(FoodRun, run_id).created_weekday
+
+    def payload(session, sections, weekday=None):
+        # Noon is a peak only on the weekday the run was posted.
+        return {"peak_forecast": [{"hour": 12 if weekday == posted_on else 18}]}
+
+    monkeypatch.setattr(analytics, "generate_peak_payload", payload)
+    with Session(engine) as s:
+        evening = FoodRun(
+            runner_id=1,
+            restaurant="Cafe",
+            drop_point="Hunt",
+            eta="5",
+            status="completed",
+        )
+        s.add(evening)
+        s.commit()
+        evening.created_hour = 18
+        s.add(evening)
+        s.commit()
+        assert [r.run_id for r in analytics.issue_peak_rewards(s)] == [run_id]
+
+
+def test_complete_run_defers_bonus_to_the_queue(app_client):
+    from app.db import engine
+
+    token, _ = register_and_login(app_client, "queue-runner@ncsu.edu")
+    run = app_client.post(
+        "/runs",
+        json={"restaurant": "Cafe", "drop_point": "Hunt", "eta": "10 mins"},
+        headers=auth_headers(token),
+    ).json()
+    resp = app_client.put(f"/runs/{run['id']}/complete", headers=auth_headers(token))
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["peak_bonus_points"] == 0 and body["peak_bonus_pending"] is True
+
+    with Session(engine) as s:
+        kinds = [
+            (job.kind, json.loads(job.payload))
+            for job in s.exec(select(QueuedJob).where(QueuedJob.status == "queued"))
+        ]
+    assert ("peak_bonus", {"run_id": run["id"]}) in kinds
+    assert ("forecast_refresh", {}) in kinds
+    jobqueue.drain(engine)
+    with Session(engine) as s:
+        assert s.exec(select(QueuedJob).where(QueuedJob.status != "dead")).all() == []
@@ -0,0 +1,88 @@
+from sqlalchemy import create_engine, event, inspect, text
+
+from app import db
+
+
+def _engine(tmp_path):
+    return create_engine(
+        f"sqlite:///{(tmp_path / 'migrate.db').as_posix()}",
+        connect_args={"check_same_thread": False},
+    )
+
+
+def test_fresh_db_is_created_at_latest_version(tmp_path):
+    eng = _engine(tmp_path)
+    assert db.run_migrations(eng) == db.LATEST_SCHEMA_VERSION
+    with eng.connect() as conn:
+        assert db.get_schema_version(conn) == db.LATEST_SCHEMA_VERSION
+        assert "tip" in db._columns(conn, "order")
+
+
+def test_current_schema_costs_a_single_statement(tmp_path):
+    eng = _engine(tmp_path)
+    db.run_migrations(eng)
+    statements = []
+
+    @event.listens_for(eng, "before_cursor_execute")
+    def _count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    db.run_migrations(eng)
+    assert statements == ["SELECT MAX(version) FROM schema_version"]
+
+
+def test_legacy_db_is_upgraded_once(tmp_path):
+    eng = _engine(tmp_path)
+    with eng.begin() as conn:
+        conn.execute(
+            text(
+                'CREATE TABLE "user" (id INTEGER PRIMARY KEY, email VARCHAR, '
+                "password_hash VARCHAR, created_at DATETIME)"
+            )
+        )
+        conn.execute(
+            text(
+                "CREATE TABLE foodrun (id INTEGER PRIMARY KEY, runner_id INTEGER, "
+                "restaurant VARCHAR, drop_point VARCHAR, eta VARCHAR, "
+                "status VARCHAR, created_at DATETIME)"
+            )
+        )
+        conn.execute(
+            text(
+                'CREATE TABLE "order" (id INTEGER PRIMARY KEY, run_id INTEGER, '
+                "user_id INTEGER, items VARCHAR, amount FLOAT, status VARCHAR, "
+                "created_at DATETIME)"
+            )
+        )
+        conn.execute(
+            text(
+                "INSERT INTO foodrun "
+                "(runner_id, restaurant, drop_point, eta, status, created_at) "
+                "VALUES (1, 'Talley', 'Hunt', '5 PM', ' Active ', "
+                "'2025-06-02 09:15:00')"
+            )
+        )
+
+    db.run_migrations(eng)
+
+    with eng.connect() as conn:
+        cols = {c["name"] for c in inspect(conn).get_columns("foodrun")}
+        assert {"capacity", "description"} <= cols
+        assert {"pin", "tip"} <= db._columns(conn, "order")
+        assert "points" in db._columns(conn, "user")
+        row = conn.execute(
+            text(
+                "SELECT status, capacity, expires_at, created_epoch, created_hour, "
+                "created_weekday FROM foodrun"
+            )
+        ).one()
+        assert row.status == "active"
+        assert row.capacity == 5
+        assert row.expires_at is not None
+        # 2025-06-02 09:15 UTC was a Monday.
+        assert (row.created_epoch, row.created_hour, row.created_weekday) == (
+            1748855700,
+            9,
+            1,
+        )
+        assert db.get_schema_version(conn) == db.LATEST_SCHEMA_VERSION
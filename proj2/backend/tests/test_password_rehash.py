@@ -0,0 +1,98 @@
+import threading
+
+from passlib.hash import pbkdf2_sha256
+from sqlalchemy import event
+from sqlmodel import Session, select
+
+from app.hashing import PASSWORD_HASH_ROUNDS
+from app.models import User
+
+
+def _stored_hash(email):
+    from app import db
+
+    with Session(db.engine) as session:
+        return session.exec(select(User).where(User.email == email)).one().password_hash
+
+
+def test_login_upgrades_outdated_hash(app_client):
+    from app import db
+
+    email = "legacy_hash@ncsu.edu"
+    with Session(db.engine) as session:
+        session.add(
+            User(
+                email=email,
+                password_hash=pbkdf2_sha256.using(rounds=1000).hash("OldPass1!"),
+            )
+        )
+        session.commit()
+
+    r = app_client.post("/auth/login", json={"email": email, "password": "OldPass1!"})
+    assert r.status_code == 200
+    upgraded = _stored_hash(email)
+    assert pbkdf2_sha256.from_string(upgraded).rounds == PASSWORD_HASH_ROUNDS
+    assert pbkdf2_sha256.verify("OldPass1!", upgraded)
+
+    # Current hashes are left untouched on later logins.
+    app_client.post("/auth/login", json={"email": email, "password": "OldPass1!"})
+    assert _stored_hash(email) == upgraded
+
+
+def test_failed_login_does_not_rehash(app_client):
+    from app import db
+
+    email = "legacy_wrong@ncsu.edu"
+    original = pbkdf2_sha256.using(rounds=1000).hash("Right1!")
+    with Session(db.engine) as session:
+        session.add(User(email=email, password_hash=original))
+        session.commit()
+
+    r = app_client.post("/auth/login", json={"email": email, "password": "Wrong1!"})
+    assert r.status_code == 401
+    assert _stored_hash(email) == original
+
+
+def test_rehash_login_runs_no_sql_on_the_event_loop(app_client):
+    from app import db
+
+    email = "legacy_loop@ncsu.edu"
+    with Session(db.engine) as session:
+        session.add(
+            User(
+                email=email,
+                password_hash=pbkdf2_sha256.using(rounds=1000).hash("LoopPass1!"),
+            )
+        )
+        session.commit()
+
+    threads = []
+
+    def record(*args):
+        threads.append(threading.current_thread().name)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        r = app_client.post(
+            "/auth/login", json={"email": email, "password": "LoopPass1!"}
+        )
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+    assert r.status_code == 200 and r.json()["user"]["username"] == email
+    # TestClient runs the event loop on a portal thread; every DB call must
+    # happen on an AnyIO worker thread instead.
+    assert threads and all(name.startswith("AnyIO worker") for name in threads)
+
+
+def test_stronger_hash_is_not_downgraded(app_client):
+    from app import db
+
+    email = "strong_hash@ncsu.edu"
+    original = pbkdf2_sha256.using(rounds=PASSWORD_HASH_ROUNDS + 1000).hash("Strong1!")
+    with Session(db.engine) as session:
+        session.add(User(email=email, password_hash=original))
+        session.commit()
+
+    r = app_client.post("/auth/login", json={"email": email, "password": "Strong1!"})
+    assert r.status_code == 200
+    assert _stored_hash(email) == original
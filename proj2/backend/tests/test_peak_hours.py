@@ -0,0 +1,73 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def fresh_snapshot():
+    from app.analytics import peak_hours_snapshot
+
+    peak_hours_snapshot.clear()
+    yield
+    peak_hours_snapshot.clear()
+
+
+def test_peak_hours_is_slim_and_cacheable(app_client):
+    resp = app_client.get("/analytics/peak-hours")
+    assert resp.status_code == 200
+    body = resp.json()
+    assert set(body) == {"generated_at", "peak_forecast"}
+    assert resp.headers["cache-control"].startswith("public, max-age=")
+
+    again = app_client.get(
+        "/analytics/peak-hours", headers={"If-None-Match": resp.headers["etag"]}
+    )
+    assert again.status_code == 304
+    assert again.content == b""
+
+
+def test_peak_hours_served_from_snapshot(app_client):
+    from app.analytics import peak_hours_snapshot
+
+    peak_hours_snapshot.update(
+        [{"hour": 17, "demand_score": 2.5, "utilization_ratio": 0.8, "extra": 1}]
+    )
+    body = app_client.get("/analytics/peak-hours").json()
+    assert body["peak_forecast"] == [
+        {"hour": 17, "demand_score": 2.5, "utilization_ratio": 0.8}
+    ]
+
+
+def test_forecast_cycle_refreshes_snapshot(app_client, monkeypatch):
+    from app import main
+    from app.analytics import peak_hours_snapshot
+
+    monkeypatch.setattr(
+        "app.analytics.forecast_peak_hours",
+        lambda profile: [{"hour": 9, "demand_score": 1.0, "utilization_ratio": 0.5}],
+    )
+    main._run_peak_forecast_cycle()
+    assert b'"hour":9' in peak_hours_snapshot.get().content
+
+
+def test_peak_forecast_include_selects_sections(app_client):
+    full = app_client.get("/analytics/peak-forecast").json()
+    assert {"hourly_timeseries", "hourly_profile", "peak_forecast"} <= set(full)
+
+    slim = app_client.get("/analytics/peak-forecast?include=peak_forecast")
+    assert slim.status_code == 200
+    assert set(slim.json()) == {"peak_forecast"}
+    # Different representations must not share a validator.
+    assert slim.headers["etag"] != app_client.get(
+        "/analytics/peak-forecast"
+    ).headers["etag"]
+
+    profile = app_client.get(
+        "/analytics/peak-forecast?include=hourly_profile,recent_rewards"
+    ).json()
+    assert set(profile) == {"hourly_profile", "recent_rewards"}
+    assert len(profile["hourly_profile"]) == 24
+
+
+def test_peak_forecast_rejects_unknown_include(app_client):
+    resp = app_client.get("/analytics/peak-forecast?include=everything")
+    assert resp.status_code == 422
+    assert "everything" in resp.json()["detail"]
@@ -0,0 +1,52 @@
+from sqlalchemy import create_engine
+
+from app.pool import InstrumentedQueuePool, describe_pool, pool_settings
+
+
+def test_pool_settings_read_side_falls_back_to_primary(monkeypatch):
+    monkeypatch.setenv("DB_POOL_SIZE", "8")
+    monkeypatch.setenv("DB_POOL_PRE_PING", "true")
+    monkeypatch.setenv("DB_READ_MAX_OVERFLOW", "2")
+    settings = pool_settings("DB_READ_")
+    assert settings["pool_size"] == 8
+    assert settings["max_overflow"] == 2
+    assert settings["pool_pre_ping"] is True
+
+
+def test_instrumented_pool_counts_overflow(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{(tmp_path / 'pool.db').as_posix()}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=1,
+        connect_args={"check_same_thread": False},
+    )
+    first = engine.connect()
+    second = engine.connect()
+    info = describe_pool(engine)
+    assert info["in_use"] == 2
+    assert info["overflow"] == 1
+    assert info["checkouts"] == 2
+    assert info["overflow_checkouts"] == 1
+    # Reusing the pooled connection while the overflow one is still out is
+    # not an overflow checkout.
+    first.close()
+    first = engine.connect()
+    info = describe_pool(engine)
+    assert info["checkouts"] == 3
+    assert info["overflow_checkouts"] == 1
+    first.close()
+    second.close()
+    engine.dispose()
+    # counters survive the pool being recreated by dispose()
+    assert describe_pool(engine)["checkouts"] == 3
+
+
+def test_metrics_endpoint_reports_pools_and_threadpool(app_client):
+    app_client.get("/runs/available")
+    r = app_client.get("/metrics")
+    assert r.status_code == 200
+    body = r.json()
+    assert set(body["db_pools"]) == {"write", "read"}
+    assert body["db_pools"]["write"]["class"] == "InstrumentedQueuePool"
+    assert body["threadpool"]["total"] > 0
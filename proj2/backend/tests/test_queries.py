@@ -0,0 +1,183 @@
+import pytest
+from sqlalchemy import create_engine, event
+from sqlmodel import Session, SQLModel
+
+from app import queries
+from app.models import FoodRun, Order, User
+
+
+@pytest.fixture()
+def session():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as s:
+        s.add_all(
+            [
+                User(id=1, email="runner@ncsu.edu", password_hash="x"),
+                User(id=2, email="joiner@ncsu.edu", password_hash="y"),
+            ]
+        )
+        for run_id, status in enumerate([None, "", " Active ", "completed"], 1):
+            s.add(
+                FoodRun(
+                    id=run_id,
+                    runner_id=1,
+                    restaurant="Cafe",
+                    drop_point="Hunt",
+                    eta="5",
+                    capacity=2,
+                    status=status,
+                )
+            )
+        s.add(Order(run_id=1, user_id=2, items="Tea", amount=2, pin="1111"))
+        s.add(Order(run_id=4, user_id=2, items="Tea", amount=2, pin="2222"))
+        s.commit()
+        s.expunge_all()
+        statements = []
+        event.listen(
+            engine,
+            "before_cursor_execute",
+            lambda conn, cursor, stmt, *a: statements.append(stmt),
+        )
+        s.info["statements"] = statements
+        yield s
+
+
+def test_active_status_clause_matches_python_rule(session):
+    rows = queries.select_run_rows(session, queries.active_status_clause())
+    expected = [
+        run_id
+        for run_id, status in enumerate([None, "", " Active ", "completed"], 1)
+        if queries.is_active_status(status)
+    ]
+    assert [row.id for row in rows] == expected == [1, 2, 3]
+
+
+def test_list_loaders_use_projected_rows(session):
+    available = queries.available_runs(session, user_id=2)
+    joined = queries.joined_runs(session, user_id=2)
+    everything = queries.all_runs(session)
+
+    assert [r["id"] for r in available] == [1, 2, 3]
+    assert available[0]["seats_remaining"] == 1
+    assert available[0]["runner_username"] == "runner@ncsu.edu"
+    assert [r["id"] for r in joined] == [1]
+    assert joined[0]["my_order"]["pin"] == "1111"
+    assert len(everything) == 4
+    # Nothing was loaded as an ORM entity, and secrets were never selected.
+    assert len(session.identity_map) == 0
+    sql = " ".join(session.info["statements"])
+    assert "password_hash" not in sql
+    assert "description" not in sql
+
+
+def test_runner_views_load_in_three_queries(session):
+    for run_id in range(10, 40):
+        session.add(
+            FoodRun(
+                id=run_id,
+                runner_id=1,
+                restaurant="Deli",
+                drop_point="Quad",
+                eta="5",
+                capacity=6,
+                status="completed",
+            )
+        )
+        for n in range(4):
+            session.add(
+                Order(
+                    run_id=run_id,
+                    user_id=2,
+                    items="Sub",
+                    amount=5,
+                    status="cancelled" if n == 0 else "delivered",
+                )
+            )
+    session.commit()
+    session.expunge_all()
+    statements = session.info["statements"]
+    statements.clear()
+
+    runs = queries.load_runs_with_orders(
+        session,
+        FoodRun.runner_id == 1,
+        ~queries.active_status_clause(),
+        live_orders_only=False,
+    )
+    payloads = [queries.runner_run_payload(r, "runner@ncsu.edu", 0) for r in runs]
+
+    assert len(statements) == 3
+    assert len(payloads) == 31  # 30 new runs plus the seeded completed one
+    history = [p for p in payloads if p["id"] >= 10]
+    assert all(len(p["orders"]) == 4 for p in history)
+    assert history[0]["orders"][1]["user_email"] == "joiner@ncsu.edu"
+    assert "pin" not in " ".join(statements)
+
+    statements.clear()
+    live = queries.load_runs_with_orders(session, FoodRun.id == 10)
+    assert len(statements) <= 3
+    assert [o.status for o in live[0].orders] == ["delivered"] * 3
+
+
+def test_joined_views_are_a_single_join(session):
+    session.add(Order(run_id=1, user_id=2, items="Cake", amount=3, pin="3333"))
+    session.add(
+        Order(
+            run_id=2, user_id=2, items="Tea", amount=2, pin="4444", status="cancelled"
+        )
+    )
+    session.commit()
+    session.expunge_all()
+    statements = session.info["statements"]
+    statements.clear()
+
+    joined = queries.joined_runs(session, user_id=2)
+    assert len(statements) == 1
+    assert [r["id"] for r in joined] == [1]
+    assert joined[0]["my_order"]["pin"] == "1111"
+    assert joined[0]["seats_remaining"] == 0
+    assert joined[0]["runner_username"] == "runner@ncsu.edu"
+
+    statements.clear()
+    history = queries.joined_runs_history(session, user_id=2)
+    assert len(statements) == 2  # one JOIN over live rows, one over the archive
+    assert [r["id"] for r in history] == [4]
+    assert history[0]["seats_remaining"] == 0
+    assert len(session.identity_map) == 0
+
+
+def test_iter_runs_with_orders_releases_each_batch(session):
+    for run_id in range(10, 20):
+        session.add(
+            FoodRun(
+                id=run_id,
+                runner_id=1,
+                restaurant="Deli",
+                drop_point="Quad",
+                eta="5",
+                capacity=6,
+                status="completed",
+            )
+        )
+        session.add(Order(run_id=run_id, user_id=2, items="Sub", amount=5))
+    session.commit()
+    session.expunge_all()
+
+    seen, held = [], []
+    for run in queries.iter_runs_with_orders(
+        session,
+        FoodRun.runner_id == 1,
+        ~queries.active_status_clause(),
+        live_orders_only=False,
+        newest_first=True,
+        batch_size=3,
+    ):
+        seen.append(queries.runner_run_payload(run, "runner@ncsu.edu", 0))
+        held.append(len(session.identity_map))
+
+    assert [p["id"] for p in seen] == list(range(19, 9, -1)) + [4]
+    assert all(len(p["orders"]) == 1 for p in seen[:10])
+    # A batch of 3 runs, their orders and one shared joiner at most.
+    assert max(held) <= 7
+    assert len(session.identity_map) == 0
@@ -0,0 +1,126 @@
+import asyncio
+import threading
+
+from conftest import register_and_login, auth_headers
+from app.events import EventBroker, sse_stream
+
+
+def test_publish_from_worker_thread_reaches_subscriber():
+    broker = EventBroker()
+
+    async def scenario():
+        sub = broker.subscribe()
+        worker = threading.Thread(
+            target=broker.publish, args=("seats_changed",), kwargs={"run_id": 3}
+        )
+        worker.start()
+        event = await sub.next(timeout=2)
+        worker.join()
+        sub.close()
+        return event
+
+    event = asyncio.run(scenario())
+    assert event.type == "seats_changed"
+    assert event.data == {"run_id": 3}
+
+
+def test_slow_subscriber_drops_oldest_and_is_flagged_lagged():
+    broker = EventBroker(max_queue=2)
+
+    async def scenario():
+        sub = broker.subscribe()
+        for run_id in range(4):
+            broker.publish("seats_changed", run_id=run_id)
+        await asyncio.sleep(0)
+        received = [await sub.next(timeout=1), await sub.next(timeout=1)]
+        return sub, received
+
+    sub, received = asyncio.run(scenario())
+    assert [e.data["run_id"] for e in received] == [2, 3]
+    assert sub.lagged
+    assert broker.stats()["dropped"] == 2
+
+
+def test_reconnect_replays_missed_events_for_that_user():
+    broker = EventBroker()
+    first = broker.publish("run_created", run={"id": 1})
+    broker.publish("order_delivered", visible_to={99}, run_id=1, order_id=5)
+    broker.publish("run_cancelled", run_id=1)
+
+    async def scenario():
+        sub = broker.subscribe(lambda e: e.visible_for(7), last_event_id=first.id)
+        return [await sub.next(timeout=1), await sub.next(timeout=0.05)]
+
+    replayed, nothing_else = asyncio.run(scenario())
+    assert replayed.type == "run_cancelled"
+    assert nothing_else is None
+
+
+def test_sse_stream_renders_events_and_resync():
+    broker = EventBroker(max_queue=1)
+
+    async def scenario():
+        sub = broker.subscribe()
+
+        async def connected():
+            return False
+
+        stream = sse_stream(sub, connected, heartbeat=0.05)
+        chunks = [await stream.__anext__()]
+        broker.publish("run_completed", run_id=1)
+        broker.publish("run_completed", run_id=2)
+        await asyncio.sleep(0)
+        chunks += [await stream.__anext__(), await stream.__anext__()]
+        chunks.append(await stream.__anext__())  # heartbeat
+        await stream.aclose()
+        return chunks
+
+    chunks = asyncio.run(scenario())
+    assert chunks[0].startswith("retry:")
+    assert chunks[1].startswith("event: resync")
+    assert "event: run_completed" in chunks[2] and '"run_id":2' in chunks[2]
+    assert chunks[3] == ": keep-alive\n\n"
+    assert broker.stats()["subscribers"] == 0
+
+
+def test_run_lifecycle_publishes_incremental_events(app_client, monkeypatch):
+    from app import events
+
+    published = []
+    original = events.broker.publish
+
+    def record(event_type, visible_to=None, **data):
+        published.append((event_type, data))
+        return original(event_type, visible_to=visible_to, **data)
+
+    monkeypatch.setattr(events.broker, "publish", record)
+    runner, _ = register_and_login(app_client, "sse_runner@ncsu.edu")
+    joiner, _ = register_and_login(app_client, "sse_joiner@ncsu.edu")
+    run = app_client.post(
+        "/runs",
+        json={"restaurant": "Bean", "drop_point": "Hunt", "eta": "5", "capacity": 2},
+        headers=auth_headers(runner),
+    ).json()
+    app_client.post(
+        f"/runs/{run['id']}/orders",
+        json={"items": "Latte", "amount": 4.5},
+        headers=auth_headers(joiner),
+    )
+    app_client.delete(f"/runs/{run['id']}/orders/me", headers=auth_headers(joiner))
+    app_client.put(f"/runs/{run['id']}/complete", headers=auth_headers(runner))
+
+    assert [t for t, _ in published] == [
+        "run_created",
+        "seats_changed",
+        "order_joined",
+        "seats_changed",
+        "order_cancelled",
+        "run_completed",
+    ]
+    assert published[1][1]["seats_remaining"] == 1
+    assert published[3][1]["seats_remaining"] == 2
+
+
+def test_event_stream_requires_auth(app_client):
+    assert app_client.get("/events/runs").status_code == 401
+    assert app_client.get("/events/runs?token=bogus").status_code == 401
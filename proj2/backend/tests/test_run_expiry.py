@@ -0,0 +1,161 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlmodel import Session, SQLModel, select
+
+from app import changes  # noqa: F401  (registers change-counter hooks)
+from app import expiry
+from app.models import ChangeCounter, FoodRun, User
+
+# 14:00 UTC is 10:00 in New York during DST.
+NOW = datetime(2025, 6, 2, 14, 0, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize(
+    "eta, expected",
+    [
+        ("15 mins", NOW + timedelta(minutes=15)),
+        ("5", NOW + timedelta(minutes=5)),
+        ("in ~20 min", NOW + timedelta(minutes=20)),
+        ("1 hr", NOW + timedelta(hours=1)),
+        ("1.5 hours", NOW + timedelta(minutes=90)),
+        ("4:30 PM", datetime(2025, 6, 2, 20, 30, tzinfo=timezone.utc)),
+        ("11 am", datetime(2025, 6, 2, 15, 0, tzinfo=timezone.utc)),
+        ("16:45", datetime(2025, 6, 2, 20, 45, tzinfo=timezone.utc)),
+        # Without am/pm, the next matching time on a 12-hour clock.
+        ("5:30", datetime(2025, 6, 2, 21, 30, tzinfo=timezone.utc)),
+        ("9:45", datetime(2025, 6, 3, 1, 45, tzinfo=timezone.utc)),
+        ("by 6", datetime(2025, 6, 2, 22, 0, tzinfo=timezone.utc)),
+        ("at 11", datetime(2025, 6, 2, 15, 0, tzinfo=timezone.utc)),
+        ("by 20 mins", NOW + timedelta(minutes=20)),
+        ("by 6pm", datetime(2025, 6, 2, 22, 0, tzinfo=timezone.utc)),
+        ("soon", None),
+        ("", None),
+        ("25:00", None),
+    ],
+)
+def test_parse_eta(eta, expected):
+    assert expiry.parse_eta(eta, NOW) == expected
+
+
+def test_clock_eta_rolls_over_midnight():
+    late_evening = datetime(2025, 6, 3, 3, 50, tzinfo=timezone.utc)  # 23:50 local
+    assert expiry.parse_eta("12:15 AM", late_evening) == datetime(
+        2025, 6, 3, 4, 15, tzinfo=timezone.utc
+    )
+
+
+def test_run_expires_at_adds_grace_or_default():
+    grace = timedelta(minutes=expiry.RUN_EXPIRY_GRACE_MINUTES)
+    fallback = timedelta(minutes=expiry.RUN_EXPIRY_DEFAULT_MINUTES)
+    naive = NOW.replace(tzinfo=None)  # as SQLite returns created_at
+    assert expiry.run_expires_at("10 mins", naive) == (
+        NOW + timedelta(minutes=10) + grace
+    )
+    assert expiry.run_expires_at("whenever", NOW) == NOW + fallback
+
+
+@pytest.mark.parametrize(
+    "eta, created_at",
+    [
+        ("7:30 AM", NOW),  # 10:00 local
+        ("2:30 PM", datetime(2025, 6, 2, 20, 0, tzinfo=timezone.utc)),  # 4 PM
+    ],
+)
+def test_passed_eta_gets_the_default_lifetime(eta, created_at):
+    assert expiry.parse_eta(eta, created_at) < created_at
+    assert expiry.run_expires_at(eta, created_at) == created_at + timedelta(
+        minutes=expiry.RUN_EXPIRY_DEFAULT_MINUTES
+    )
+
+
+def test_eta_without_am_pm_is_never_in_the_past():
+    four_pm = datetime(2025, 6, 2, 20, 0, tzinfo=timezone.utc)
+    assert expiry.parse_eta("5:30", four_pm) == datetime(
+        2025, 6, 2, 21, 30, tzinfo=timezone.utc
+    )
+    late_evening = datetime(2025, 6, 3, 3, 50, tzinfo=timezone.utc)  # 23:50 local
+    assert expiry.parse_eta("12:15", late_evening) == datetime(
+        2025, 6, 3, 4, 15, tzinfo=timezone.utc
+    )
+
+
+@pytest.fixture()
+def session():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as s:
+        s.add(User(id=1, email="runner@ncsu.edu", password_hash="x"))
+        s.add(ChangeCounter(table_name="foodrun", version=0))
+        for run_id in range(1, 8):
+            s.add(
+                FoodRun(
+                    id=run_id,
+                    runner_id=1,
+                    restaurant="Cafe",
+                    drop_point="Hunt",
+                    eta="5",
+                    # 1-5 overdue, 6 not yet due, 7 overdue but completed.
+                    status="completed" if run_id == 7 else "active",
+                    expires_at=NOW
+                    + timedelta(minutes=30 if run_id == 6 else -run_id),
+                )
+            )
+        s.commit()
+        yield s
+
+
+def test_sweeper_expires_overdue_active_runs_in_batches(session):
+    expired = expiry.expire_overdue_runs(session, now=NOW, batch_size=2)
+
+    assert sorted(expired) == [1, 2, 3, 4, 5]
+    statuses = dict(session.exec(select(FoodRun.id, FoodRun.status)).all())
+    assert statuses == {
+        1: "expired",
+        2: "expired",
+        3: "expired",
+        4: "expired",
+        5: "expired",
+        6: "active",
+        7: "completed",
+    }
+    # Bulk UPDATEs still invalidate run-list ETags.
+    assert session.get(ChangeCounter, "foodrun").version >= 3
+    assert expiry.expire_overdue_runs(session, now=NOW) == []
+
+
+def test_create_run_stores_deadline(app_client):
+    from conftest import auth_headers, register_and_login
+    from app.db import engine
+
+    token, _ = register_and_login(app_client, "expiry_runner@ncsu.edu")
+    before = datetime.now(timezone.utc)
+    run = app_client.post(
+        "/runs",
+        json={"restaurant": "Talley", "drop_point": "Hunt", "eta": "20 mins"},
+        headers=auth_headers(token),
+    ).json()
+    with Session(engine) as s:
+        stored = s.get(FoodRun, run["id"]).expires_at.replace(tzinfo=timezone.utc)
+    expected = before + timedelta(minutes=20 + expiry.RUN_EXPIRY_GRACE_MINUTES)
+    assert abs(stored - expected) < timedelta(minutes=1)
+
+
+def test_sweeper_gives_runs_without_a_deadline_the_default_lifetime(session):
+    lifetime = timedelta(minutes=expiry.RUN_EXPIRY_DEFAULT_MINUTES)
+    for run_id, age in ((8, lifetime + timedelta(minutes=1)), (9, timedelta(0))):
+        session.add(
+            FoodRun(
+                id=run_id,
+                runner_id=1,
+                restaurant="Cafe",
+                drop_point="Hunt",
+                eta="5",
+                created_at=NOW - age,
+            )
+        )
+    session.commit()
+
+    assert sorted(expiry.expire_overdue_runs(session, now=NOW)) == [1, 2, 3, 4, 5, 8]
+    assert session.get(FoodRun, 9).status == "active"
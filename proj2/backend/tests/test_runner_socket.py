@@ -0,0 +1,149 @@
+import asyncio
+
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from conftest import register_and_login, auth_headers
+from app.events import EventBroker, pump_runner_socket
+
+
+def _create_run(client, token, capacity=3):
+    return client.post(
+        "/runs",
+        json={
+            "restaurant": "Cafe",
+            "drop_point": "Hill",
+            "eta": "5",
+            "capacity": capacity,
+        },
+        headers=auth_headers(token),
+    ).json()
+
+
+def test_runner_receives_join_cancel_and_delivery(app_client):
+    runner, _ = register_and_login(app_client, "ws_runner@ncsu.edu")
+    joiner, _ = register_and_login(app_client, "ws_joiner@ncsu.edu")
+    other, _ = register_and_login(app_client, "ws_other@ncsu.edu")
+    run = _create_run(app_client, runner)
+    other_run = _create_run(app_client, other)
+
+    with app_client.websocket_connect(f"/ws/runner?token={runner}") as ws:
+        # Joins on someone else's run must not reach this runner.
+        app_client.post(
+            f"/runs/{other_run['id']}/orders",
+            json={"items": "Tea", "amount": 2},
+            headers=auth_headers(joiner),
+        )
+        order = app_client.post(
+            f"/runs/{run['id']}/orders",
+            json={"items": "Bagel", "amount": 3.5, "pin": "4321"},
+            headers=auth_headers(joiner),
+        ).json()
+        joined = ws.receive_json()
+        assert joined["type"] == "order_joined"
+        assert joined["run_id"] == run["id"]
+        assert joined["order"]["id"] == order["id"]
+        assert joined["order"]["user_email"] == "ws_joiner@ncsu.edu"
+        assert "pin" not in joined["order"]
+
+        app_client.post(
+            f"/runs/{run['id']}/orders/{order['id']}/verify-pin",
+            json={"pin": "4321"},
+            headers=auth_headers(runner),
+        )
+        delivered = ws.receive_json()
+        assert delivered["type"] == "order_delivered"
+        assert delivered["order_id"] == order["id"]
+
+        second = app_client.post(
+            f"/runs/{run['id']}/orders",
+            json={"items": "Muffin", "amount": 2},
+            headers=auth_headers(other),
+        ).json()
+        assert ws.receive_json()["type"] == "order_joined"
+        app_client.delete(f"/runs/{run['id']}/orders/me", headers=auth_headers(other))
+        cancelled = ws.receive_json()
+        assert cancelled["type"] == "order_cancelled"
+        assert cancelled["order_id"] == second["id"]
+        assert cancelled["by"] == "joiner"
+
+
+def test_runner_socket_accepts_bearer_header(app_client):
+    runner, _ = register_and_login(app_client, "ws_header@ncsu.edu")
+    joiner, _ = register_and_login(app_client, "ws_header_joiner@ncsu.edu")
+    run = _create_run(app_client, runner)
+    with app_client.websocket_connect("/ws/runner", headers=auth_headers(runner)) as ws:
+        app_client.post(
+            f"/runs/{run['id']}/orders",
+            json={"items": "Soup", "amount": 6},
+            headers=auth_headers(joiner),
+        )
+        assert ws.receive_json()["type"] == "order_joined"
+
+
+@pytest.mark.parametrize("path", ["/ws/runner", "/ws/runner?token=bogus"])
+def test_runner_socket_rejects_bad_credentials(app_client, path):
+    with pytest.raises(WebSocketDisconnect) as exc:
+        with app_client.websocket_connect(path) as ws:
+            ws.receive_json()
+    assert exc.value.code == 1008
+
+
+class FakeSocket:
+    def __init__(self, send_delay=0.0):
+        self.sent = []
+        self.closed_with = None
+        self.send_delay = send_delay
+        self.inbox: asyncio.Queue = asyncio.Queue()
+
+    async def receive(self):
+        return await self.inbox.get()
+
+    async def send_json(self, payload):
+        await asyncio.sleep(self.send_delay)
+        self.sent.append(payload)
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+def test_pump_pings_when_quiet_and_closes_idle_clients():
+    broker = EventBroker()
+
+    async def scenario():
+        ws = FakeSocket()
+        sub = broker.subscribe()
+        await pump_runner_socket(ws, sub, heartbeat=0.02, idle_timeout=0.1)
+        return ws
+
+    ws = asyncio.run(scenario())
+    assert {"type": "ping"} in ws.sent
+    assert ws.closed_with == 1001
+    assert broker.stats()["subscribers"] == 0
+
+
+def test_pump_closes_slow_consumer_and_resyncs_lagged_one():
+    broker = EventBroker(max_queue=1)
+
+    async def scenario():
+        slow = FakeSocket(send_delay=1)
+        sub = broker.subscribe()
+        broker.publish("order_joined", runner_id=1)
+        await pump_runner_socket(slow, sub, heartbeat=1, send_timeout=0.02)
+
+        lagged = FakeSocket()
+        sub = broker.subscribe()
+        broker.publish("order_joined", runner_id=1, n=1)
+        broker.publish("order_joined", runner_id=1, n=2)
+        await asyncio.sleep(0)
+        task = asyncio.create_task(pump_runner_socket(lagged, sub, heartbeat=1))
+        await asyncio.sleep(0.05)
+        lagged.inbox.put_nowait({"type": "websocket.disconnect"})
+        await task
+        return slow, lagged
+
+    slow, lagged = asyncio.run(scenario())
+    assert slow.closed_with == 1013
+    assert lagged.sent[0] == {"type": "resync"}
+    assert lagged.sent[1]["n"] == 2
+    assert broker.stats()["subscribers"] == 0
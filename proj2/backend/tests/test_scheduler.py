@@ -0,0 +1,83 @@
+import asyncio
+import threading
+import time
+
+from sqlalchemy import create_engine, text
+
+from app import db
+from app.scheduler import JobScheduler, next_tick
+
+
+def _run_for(scheduler, seconds):
+    async def go():
+        scheduler.start()
+        await asyncio.sleep(seconds)
+        await scheduler.stop()
+
+    asyncio.run(go())
+
+
+def test_ticks_align_to_the_interval():
+    assert next_tick(1000.5, 60, earliest=1000.5) == 1020
+    assert next_tick(1000.5, 60, earliest=1030) == 1080
+    # Already past the earliest time: the next aligned tick from now.
+    assert next_tick(1090, 60, earliest=1030) == 1140
+    assert 1020 <= next_tick(1000.5, 60, earliest=0, jitter=5) <= 1025
+
+
+def test_failures_are_isolated_and_recorded():
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("db locked")
+
+    scheduler = JobScheduler(workers=1)
+    job = scheduler.register("flaky", flaky, 0.02, initial_delay=0, jitter=0)
+    _run_for(scheduler, 0.2)
+    stats = scheduler.stats()["jobs"]["flaky"]
+    assert stats["failures"] == 1
+    assert stats["last_error"] == "RuntimeError: db locked"
+    assert stats["runs"] >= 2
+    assert job.last_success is not None
+
+
+def test_overlapping_ticks_are_skipped():
+    active = []
+    peak = []
+
+    def slow():
+        active.append(1)
+        peak.append(len(active))
+        time.sleep(0.1)
+        active.pop()
+
+    scheduler = JobScheduler(workers=4)
+    scheduler.register("slow", slow, 0.02, initial_delay=0, jitter=0)
+    _run_for(scheduler, 0.25)
+    stats = scheduler.stats()["jobs"]["slow"]
+    assert max(peak) == 1
+    assert stats["skipped"] > 0
+
+
+def test_jobs_run_on_the_dedicated_executor():
+    names = []
+    scheduler = JobScheduler(workers=1)
+    scheduler.register(
+        "who",
+        lambda: names.append(threading.current_thread().name),
+        0.02,
+        initial_delay=0,
+        jitter=0,
+    )
+    _run_for(scheduler, 0.1)
+    assert names and all(name.startswith("job") for name in names)
+
+
+def test_vacuum_database_runs_outside_a_transaction(tmp_path):
+    engine = create_engine(f"sqlite:///{(tmp_path / 'v.db').as_posix()}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE t (x INTEGER)"))
+    db.vacuum_database(engine)
+    engine.dispose()
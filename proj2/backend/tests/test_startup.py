@@ -0,0 +1,47 @@
+import asyncio
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def test_importing_app_defers_ai_auth_and_analytics_modules():
+    code = (
+        "import sys, app.main; "
+        "print(','.join(m for m in ('httpx', 'jose', 'passlib', 'app.analytics') "
+        "if m in sys.modules))"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert out.stdout.strip() == ""
+
+
+def test_forecast_job_waits_before_first_cycle(monkeypatch):
+    from app import main
+    from app.scheduler import JobScheduler
+
+    calls = []
+    monkeypatch.setattr(main, "_run_peak_forecast_cycle", lambda: calls.append(1))
+    monkeypatch.setattr(main, "scheduler", JobScheduler())
+    monkeypatch.setattr(main, "PEAK_FORECAST_INITIAL_DELAY_SECONDS", 60)
+
+    async def run_briefly():
+        main._register_jobs()
+        main.scheduler.start()
+        await asyncio.sleep(0.05)
+        await main.scheduler.stop()
+
+    asyncio.run(run_briefly())
+    assert calls == []
+    assert set(main.scheduler.jobs) >= {
+        "peak_forecast",
+        "peak_rewards",
+        "run_expiry",
+        "archive",
+    }
@@ -1,7 +1,7 @@
 import { render, screen, fireEvent, waitFor } from "@testing-library/react";
 import Home from "../pages/Home";
 import { useAuth } from "../hooks/useAuth";
-import { listAvailableRuns, listJoinedRuns, joinRun } from "../services/runsService";
+import { getFeed, joinRun } from "../services/runsService";
 import { useToast } from "../context/ToastContext";
 
 vi.mock("../hooks/useAuth");
@@ -29,23 +29,24 @@ describe("Home Page Unit Tests", () => {
   });
 
   test("shows error if API fails", async () => {
-    listAvailableRuns.mockRejectedValue(new Error("Network error"));
-    listJoinedRuns.mockRejectedValue(new Error("Network error"));
+    getFeed.mockRejectedValue(new Error("Network error"));
 
     render(<Home />);
     expect(await screen.findByText(/network error/i)).toBeInTheDocument();
   });
 
   test("opens and closes the menu when joining a run", async () => {
-    listAvailableRuns.mockResolvedValue([
-      {
-        id: 1,
-        restaurant: "Cafe",
-        runner_username: "alice",
-        available_seats: 2,
-      },
-    ]);
-    listJoinedRuns.mockResolvedValue([]);
+    getFeed.mockResolvedValue({
+      available: [
+        {
+          id: 1,
+          restaurant: "Cafe",
+          runner_username: "alice",
+          available_seats: 2,
+        },
+      ],
+      joined: [],
+    });
 
     render(<Home />);
 
@@ -64,15 +65,17 @@ describe("Home Page Unit Tests", () => {
   });
 
   test("calls joinRun on confirm order", async () => {
-    listAvailableRuns.mockResolvedValue([
-      {
-        id: 1,
-        restaurant: "Cafe",
-        runner_username: "alice",
-        available_seats: 2,
-      },
-    ]);
-    listJoinedRuns.mockResolvedValue([]);
+    getFeed.mockResolvedValue({
+      available: [
+        {
+          id: 1,
+          restaurant: "Cafe",
+          runner_username: "alice",
+          available_seats: 2,
+        },
+      ],
+      joined: [],
+    });
     joinRun.mockResolvedValue({ pin: "1234" });
 
     render(<Home />);
@@ -89,15 +92,17 @@ describe("Home Page Unit Tests", () => {
   });
 
   test("prevents joining own run", async () => {
-    listAvailableRuns.mockResolvedValue([
-      {
-        id: 1,
-        restaurant: "Cafe",
-        runner_username: "bob", // same user
-        available_seats: 2,
-      },
-    ]);
-    listJoinedRuns.mockResolvedValue([]);
+    getFeed.mockResolvedValue({
+      available: [
+        {
+          id: 1,
+          restaurant: "Cafe",
+          runner_username: "bob", // same user
+          available_seats: 2,
+        },
+      ],
+      joined: [],
+    });
 
     render(<Home />);
 
@@ -109,3 +109,39 @@ describe("RunDetails AI load estimate", () => {
     );
   });
 });
+
+describe("RunDetails completion", () => {
+  beforeEach(() => {
+    vi.clearAllMocks();
+    getRunById.mockResolvedValue(baseRun);
+    vi.spyOn(window, "confirm").mockReturnValue(true);
+    vi.spyOn(window, "alert").mockImplementation(() => {});
+  });
+
+  afterEach(() => {
+    vi.restoreAllMocks();
+  });
+
+  it("says the peak bonus is still pending", async () => {
+    completeRun.mockResolvedValue({
+      points_earned: 3,
+      peak_bonus_points: 0,
+      peak_bonus_pending: true,
+    });
+    render(
+      <MemoryRouter>
+        <RunDetails />
+      </MemoryRouter>
+    );
+
+    await waitFor(() => expect(getRunById).toHaveBeenCalled());
+
+    fireEvent.click(screen.getByRole("button", { name: /^complete$/i }));
+
+    await waitFor(() =>
+      expect(window.alert).toHaveBeenCalledWith(
+        "Congrats! You earned 3 points. Any peak-hour bonus is added to your points shortly."
+      )
+    );
+  });
+});
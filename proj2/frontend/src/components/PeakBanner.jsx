@@ -26,7 +26,7 @@ export default function PeakBanner({ offset = 0 }) {
         return;
       }
       try {
-        const data = await analyticsService.getPeakForecast();
+        const data = await analyticsService.getPeakHours();
         setPeakHours(data?.peak_forecast || []);
         setError('');
       } catch (err) {
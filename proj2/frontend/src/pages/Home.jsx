@@ -3,7 +3,7 @@ import RunCard from "../components/RunCard";
 import Menu from "../components/Menu";
 import { useAuth } from '../hooks/useAuth';
 import menuData from "../mock_data/menuData.json";
-import { listAvailableRuns, listJoinedRuns, joinRun, unjoinRun, getRunLoadEstimate } from "../services/runsService";
+import { getFeed, joinRun, unjoinRun, getRunLoadEstimate } from "../services/runsService";
 import { useToast } from "../context/ToastContext";
 
 export default function Home() {
@@ -42,9 +42,9 @@ export default function Home() {
   async function refresh() {
     setError("");
     try {
-      const [a, j] = await Promise.all([listAvailableRuns(), listJoinedRuns()]);
-      setAvailable(a);
-      setJoined(j);
+      const feed = await getFeed(['available', 'joined']);
+      setAvailable(feed?.available || []);
+      setJoined(feed?.joined || []);
       setLoadInsights({});
       setLoadInsightLoading({});
     } catch (e) {
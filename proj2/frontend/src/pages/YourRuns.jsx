@@ -30,7 +30,10 @@ export default function YourRuns() {
     try {
       const result = await completeRun(run.id);
       if (result?.points_earned > 0) {
-        window.alert(`Congrats! You earned ${result.points_earned} points (including any peak bonus).`);
+        const bonusNote = result.peak_bonus_pending
+          ? " Any peak-hour bonus is added to your points shortly."
+          : "";
+        window.alert(`Congrats! You earned ${result.points_earned} points.${bonusNote}`);
       }
       await refresh();
     } catch (e) {
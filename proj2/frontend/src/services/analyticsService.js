@@ -36,3 +36,10 @@ async function fetchWithAuth(path, options = {}) {
 export async function getPeakForecast() {
   return fetchWithAuth('/analytics/peak-forecast');
 }
+
+// Slim, publicly cacheable peak windows; no auth header keeps it a simple CORS GET.
+export async function getPeakHours() {
+  const res = await fetch(`${API_BASE}/analytics/peak-hours`);
+  if (!res.ok) throw new Error('Unable to load peak hours');
+  return res.json();
+}
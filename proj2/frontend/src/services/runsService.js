@@ -70,6 +70,12 @@ export async function cancelRun(runId) {
   return fetchWithAuth(`/runs/${runId}/cancel`, { method: 'PUT' });
 }
 
+// One round trip for the landing page; sections: available, joined, points, peak_hours.
+export async function getFeed(sections) {
+  const query = sections?.length ? `?sections=${sections.join(',')}` : '';
+  return fetchWithAuth(`/feed${query}`);
+}
+
 export async function listJoinedRuns() {
   return fetchWithAuth('/runs/joined');
 }